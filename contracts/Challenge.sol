@@ -0,0 +1,466 @@
+pragma solidity >=0.5.2 <0.6.0;
+
+import "./lib/Owned.sol";
+import "./lib/SafeMath.sol";
+import "./lib/Signatures.sol";
+import "./interface/IBidStore.sol";
+import "./interface/IChallengeStore.sol";
+import "./interface/IRouter.sol";
+import "./storage/Env.sol";
+
+/**
+ * The chunk challenge lifecycle from docs/protocol.md:
+ *
+ * - two hosters stake half of the bid value each (stake()) and submit the uniqueHash of their
+ *   chunk (prove())
+ * - either one can challenge the other (challenge()), at most 3 times per bid and once every
+ *   duration / 3
+ * - both answer the challenge seed with a signed uniqueHash (defend())
+ * - a validator of the bid checks the answers against the file and rules on the defendant
+ *   (mediate())
+ * - anyone settles the challenge (settle()).  The loser's stake goes to the winner, less the
+ *   mediator's 20%, and the loser's spot on the bid is freed for another hoster.  A hoster who
+ *   loses more than maxLosses challenges in 30 days is banned from this contract.
+ * - after the bid's duration, once the bid has been paid out and passed validation, hosters who
+ *   proved and are not in a challenge take their stake back (claim())
+ *
+ * Every step touches a fixed amount of storage, so costs don't grow with the amount of bids,
+ * challenges or losses of a hoster.
+ */
+
+/* Challenge
+ * @title Stakes and chunk challenges between the hosters of a bid
+ * @author Mike Shultz <mike@mikeshultz.com>
+ */
+contract Challenge is Owned {  /// interface: IChallenge
+    using SafeMath for uint;
+
+    event Staked(int indexed bidId, address indexed hoster, uint value);
+    event Proved(int indexed bidId, address indexed hoster, bytes32 uniqueHash);
+    event ChallengeOpened(
+        uint indexed challengeId,
+        int indexed bidId,
+        address indexed defendant,
+        address challenger,
+        bytes32 seed
+    );
+    event Defended(uint indexed challengeId, address indexed hoster, bytes32 uniqueHash);
+    event Mediated(uint indexed challengeId, address indexed mediator, bool defendantValid);
+    event ChallengeSettled(
+        uint indexed challengeId,
+        address indexed winner,
+        address indexed loser,
+        uint value
+    );
+    event StakeClaimed(int indexed bidId, address indexed hoster, uint value);
+    event Withdraw(uint indexed value, address indexed hoster);
+    event HosterBanned(address indexed hoster, uint losses);
+
+    Env public env;
+    IBidStore public bidStore;
+    IChallengeStore public challengeStore;
+    IRouter public router;
+
+    mapping(address => uint) private balanceSheet;
+
+    bytes32 private constant ENV_HASH = keccak256("Env");
+    bytes32 private constant BID_STORE_HASH = keccak256("BidStore");
+    bytes32 private constant CHALLENGE_STORE_HASH = keccak256("ChallengeStore");
+    bytes32 private constant ENV_CHALLENGE_DEFEND_DURATION = keccak256("challengeDefendDuration");
+    bytes32 private constant ENV_MAX_LOSSES = keccak256("maxLosses");
+    uint private constant STATE_OPEN = 1;
+    uint private constant STATE_MEDIATED = 2;
+    uint private constant MAX_CHALLENGES = 3;
+    uint private constant MEDIATOR_PERCENT = 20;
+
+    modifier notBanned() {
+        require(!env.isBanned(msg.sender) && !challengeStore.isBanned(msg.sender), "banned");
+        _;
+    }
+
+    /** constructor(address)
+     *  @dev initialize the contract
+     *  @param  _router    The address of the Router contract
+     */
+    constructor(address _router) public
+    {
+        router = IRouter(_router);
+        updateReferences();
+    }
+
+    /** stake(int)
+     *  @notice Take one of the two hoster spots on a bid.  msg.value must be half the bid value.
+     *  @param bidId    The ID of the bid
+     */
+    function stake(int bidId) public payable notBanned
+    {
+        (address bidder, , , , , , , bool paid) = bidStore.getBidState(bidId);
+        require(bidder != address(0), "no bid");
+        require(!paid, "bid closed");
+        require(msg.value > 0 && msg.value == bidStore.getBidAmount(bidId) / 2, "wrong stake");
+        require(challengeStore.addStake(bidId, msg.sender, msg.value), "no spot");
+
+        emit Staked(bidId, msg.sender, msg.value);
+    }
+
+    /** prove(int, bytes32, uint8, bytes32, bytes32)
+     *  @notice Submit the uniqueHash of a hoster's chunk and a signature of proofHash().  Each
+     *      stake is proved once.  Anyone can relay it.
+     *  @param bidId        The ID of the bid
+     *  @param uniqueHash   The hash of the hoster's chunk
+     *  @param v            The signature recovery ID
+     *  @param r            The signature r value
+     *  @param s            The signature s value
+     */
+    function prove(int bidId, bytes32 uniqueHash, uint8 v, bytes32 r, bytes32 s)
+    public notBanned
+    {
+        require(uniqueHash != bytes32(0), "zero hash");
+
+        address hoster = Signatures.recover(proofHash(bidId, uniqueHash), v, r, s);
+        (uint value, , , bytes32 proved) = challengeStore.getStake(bidId, hoster);
+        require(value > 0, "not staked");
+        require(proved == bytes32(0), "already proved");
+
+        challengeStore.setUniqueHash(bidId, hoster, uniqueHash);
+
+        emit Proved(bidId, hoster, uniqueHash);
+    }
+
+    /** challenge(int, address)
+     *  @notice Challenge the other hoster of a bid to prove they have the file.  The challenger
+     *      has to have proved their own stake.
+     *  @param bidId        The ID of the bid
+     *  @param defendant    The hoster to challenge
+     *  @return uint        The ID of the challenge
+     */
+    function challenge(int bidId, address defendant) public notBanned returns (uint)
+    {
+        require(defendant != msg.sender, "self");
+        requireChallengeable(bidId, msg.sender);
+        requireChallengeable(bidId, defendant);
+
+        (, , , bytes32 proved) = challengeStore.getStake(bidId, msg.sender);
+        require(proved != bytes32(0), "not proved");
+
+        (, , uint lastChallenge, uint challengeCount) = challengeStore.getBidStakes(bidId);
+        require(challengeCount < MAX_CHALLENGES, "too many challenges");
+        require(
+            challengeCount == 0
+            || block.timestamp >= lastChallenge.add(bidStore.getDuration(bidId) / 3),
+            "too soon"
+        );
+
+        bytes32 seed = blockhash(block.number - 1);
+        uint challengeId = challengeStore.addChallenge(bidId, msg.sender, defendant, seed);
+
+        emit ChallengeOpened(challengeId, bidId, defendant, msg.sender, seed);
+
+        return challengeId;
+    }
+
+    /** defend(uint, bytes32, uint8, bytes32, bytes32)
+     *  @notice Answer a challenge seed with a uniqueHash and a signature of defenseHash().  Both
+     *      the challenger and the defendant have to answer within challengeDefendDuration.
+     *      Anyone can relay it.
+     *  @param challengeId  The ID of the challenge
+     *  @param uniqueHash   The hash of the hoster's chunk for the challenge seed
+     *  @param v            The signature recovery ID
+     *  @param r            The signature r value
+     *  @param s            The signature s value
+     */
+    function defend(uint challengeId, bytes32 uniqueHash, uint8 v, bytes32 r, bytes32 s)
+    public notBanned
+    {
+        require(uniqueHash != bytes32(0), "zero hash");
+
+        address hoster = Signatures.recover(defenseHash(challengeId, uniqueHash), v, r, s);
+        challengeStore.setDefense(challengeId, isChallenger(challengeId, hoster), uniqueHash);
+
+        emit Defended(challengeId, hoster, uniqueHash);
+    }
+
+    /** mediate(uint, bool)
+     *  @notice Rule on a challenge both hosters have answered, after checking the answers
+     *      against the file.  Only a validator of the bid who isn't a party can mediate.
+     *  @param challengeId      The ID of the challenge
+     *  @param defendantValid   If the defendant's uniqueHash is valid
+     */
+    function mediate(uint challengeId, bool defendantValid) public notBanned
+    {
+        (int bidId, address challenger, address defendant, uint opened, uint state) =
+            challengeStore.getChallenge(challengeId);
+        require(state == STATE_OPEN, "not open");
+        require(msg.sender != challenger && msg.sender != defendant, "party");
+        require(bidStore.hasValidated(bidId, msg.sender), "not a validator");
+        require(block.timestamp <= opened.add(defendDuration().mul(2)), "too late");
+
+        (, bytes32 challengerHash, bytes32 defendantHash, , ) =
+            challengeStore.getDefense(challengeId);
+        require(challengerHash != bytes32(0) && defendantHash != bytes32(0), "not defended");
+
+        challengeStore.setMediation(challengeId, msg.sender, defendantValid);
+
+        emit Mediated(challengeId, msg.sender, defendantValid);
+    }
+
+    /** settle(uint)
+     *  @notice Move the loser's stake to the winner and the mediator.  A mediated challenge can
+     *      be settled right away.  Otherwise, once the defend window has passed, whoever didn't
+     *      answer loses (the challenger first), and once the mediation window has passed with
+     *      no ruling, the stakes are unlocked and nobody loses.  A loser with more than
+     *      maxLosses losses in the current 30 day period is banned.
+     *  @param challengeId  The ID of the challenge
+     */
+    function settle(uint challengeId) public notBanned
+    {
+        (int bidId, address winner, address loser, address mediator) = ruling(challengeId);
+
+        uint losses = challengeStore.settle(challengeId, loser);
+        if (losses > env.getuint(ENV_MAX_LOSSES))
+        {
+            challengeStore.ban(loser);
+            emit HosterBanned(loser, losses);
+        }
+
+        uint value = 0;
+        if (loser != address(0))
+        {
+            value = challengeStore.removeStake(bidId, loser);
+            uint mediatorCut = 0;
+            if (mediator != address(0))
+            {
+                mediatorCut = value.mul(MEDIATOR_PERCENT) / 100;
+                balanceSheet[mediator] = balanceSheet[mediator].add(mediatorCut);
+            }
+            balanceSheet[winner] = balanceSheet[winner].add(value - mediatorCut);
+        }
+
+        emit ChallengeSettled(challengeId, winner, loser, value);
+    }
+
+    /** claim(int)
+     *  @notice Take back a stake once the bid's duration has passed since staking and the bid
+     *      has been paid out and passed validation.  Only a stake that was proved can be claimed.
+     *  @param bidId    The ID of the bid
+     */
+    function claim(int bidId) public notBanned
+    {
+        (uint value, uint since, uint openChallenge, bytes32 proved) = challengeStore.getStake(
+            bidId,
+            msg.sender
+        );
+        require(value > 0, "not staked");
+        require(openChallenge == 0, "in challenge");
+        require(proved != bytes32(0), "not proved");
+        require(block.timestamp >= since.add(bidStore.getDuration(bidId)), "too soon");
+        require(passedValidation(bidId), "not validated");
+
+        challengeStore.removeStake(bidId, msg.sender);
+        balanceSheet[msg.sender] = balanceSheet[msg.sender].add(value);
+
+        emit StakeClaimed(bidId, msg.sender, value);
+    }
+
+    /** withdraw()
+     *  @notice Transfer the sender's entire balance to their Ethereum account
+     */
+    function withdraw() public notBanned
+    {
+        uint senderBalance = balanceSheet[msg.sender];
+        require(senderBalance > 0, "zero balance");
+
+        balanceSheet[msg.sender] = 0;
+        msg.sender.transfer(senderBalance);
+
+        emit Withdraw(senderBalance, msg.sender);
+    }
+
+    /** proofHash(int, bytes32)
+     *  @notice The hash a hoster signs to submit their uniqueHash with prove().  It covers the
+     *      bid, so the signature can't be used on another bid.
+     *  @param bidId        The ID of the bid
+     *  @param uniqueHash   The hash of the hoster's chunk
+     *  @return bytes32     The hash to sign
+     */
+    function proofHash(int bidId, bytes32 uniqueHash) public view returns (bytes32)
+    {
+        return keccak256(abi.encodePacked(address(this), bidId, uniqueHash));
+    }
+
+    /** defenseHash(uint, bytes32)
+     *  @notice The hash a hoster signs to answer a challenge.  It covers the challenge and its
+     *      seed, so a signature from prove() or another challenge can't be replayed as an answer.
+     *  @param challengeId  The ID of the challenge
+     *  @param uniqueHash   The hash of the hoster's chunk for the challenge seed
+     *  @return bytes32     The hash to sign
+     */
+    function defenseHash(uint challengeId, bytes32 uniqueHash) public view returns (bytes32)
+    {
+        (bytes32 seed, , , , ) = challengeStore.getDefense(challengeId);
+        return keccak256(abi.encodePacked(address(this), challengeId, seed, uniqueHash));
+    }
+
+    /** getBalance(address)
+     *  @notice Get the balance of an account
+     *  @param _address The account to look up
+     *  @return uint    The balance
+     */
+    function getBalance(address _address) public view returns (uint)
+    {
+        return balanceSheet[_address];
+    }
+
+    /** updateReferences()
+     *  @dev Using the router, update all the addresses
+     *  @return bool If anything was updated
+     */
+    function updateReferences() public ownerOnly returns (bool)
+    {
+        bool updated = false;
+
+        bytes32[] memory names = new bytes32[](3);
+        names[0] = ENV_HASH;
+        names[1] = BID_STORE_HASH;
+        names[2] = CHALLENGE_STORE_HASH;
+        address[] memory targets = router.getMany(names);
+
+        if (targets[0] != address(env))
+        {
+            env = Env(targets[0]);
+            updated = true;
+        }
+
+        if (targets[1] != address(bidStore))
+        {
+            bidStore = IBidStore(targets[1]);
+            updated = true;
+        }
+
+        if (targets[2] != address(challengeStore))
+        {
+            challengeStore = IChallengeStore(targets[2]);
+            updated = true;
+        }
+
+        return updated;
+    }
+
+    /** isChallenger(uint, address)
+     *  @dev Revert unless the hoster can still answer the challenge
+     *  @param challengeId  The ID of the challenge
+     *  @param hoster       The hoster answering
+     *  @return bool        If the hoster is the challenger, rather than the defendant
+     */
+    function isChallenger(uint challengeId, address hoster) internal view returns (bool)
+    {
+        (, address challenger, address defendant, uint opened, uint state) =
+            challengeStore.getChallenge(challengeId);
+        require(state == STATE_OPEN, "not open");
+        require(block.timestamp <= opened.add(defendDuration()), "too late");
+
+        (, bytes32 challengerHash, bytes32 defendantHash, , ) =
+            challengeStore.getDefense(challengeId);
+
+        if (hoster == challenger)
+        {
+            require(challengerHash == bytes32(0), "already defended");
+            return true;
+        }
+
+        require(hoster == defendant, "not a party");
+        require(defendantHash == bytes32(0), "already defended");
+        return false;
+    }
+
+    /** ruling(uint)
+     *  @dev Decide who won a challenge.  Reverts if it can't be settled yet.
+     *  @param challengeId  The ID of the challenge
+     *  @return int         The ID of the bid
+     *  @return address     The winner, or the zero address if nobody lost
+     *  @return address     The loser, or the zero address if nobody lost
+     *  @return address     The mediator, or the zero address if not mediated
+     */
+    function ruling(uint challengeId) internal view returns (
+        int bidId,
+        address winner,
+        address loser,
+        address mediator
+    )
+    {
+        address challenger;
+        address defendant;
+        uint opened;
+        uint state;
+        (bidId, challenger, defendant, opened, state) = challengeStore.getChallenge(challengeId);
+
+        if (state == STATE_MEDIATED)
+        {
+            bool defendantValid;
+            (, , , mediator, defendantValid) = challengeStore.getDefense(challengeId);
+            if (defendantValid)
+            {
+                return (bidId, defendant, challenger, mediator);
+            }
+            return (bidId, challenger, defendant, mediator);
+        }
+
+        require(state == STATE_OPEN, "not open");
+        require(block.timestamp > opened.add(defendDuration()), "too soon");
+
+        (, bytes32 challengerHash, bytes32 defendantHash, , ) =
+            challengeStore.getDefense(challengeId);
+        if (challengerHash == bytes32(0))
+        {
+            return (bidId, defendant, challenger, address(0));
+        }
+        if (defendantHash == bytes32(0))
+        {
+            return (bidId, challenger, defendant, address(0));
+        }
+
+        // Both answered and nobody ruled in time
+        require(block.timestamp > opened.add(defendDuration().mul(2)), "needs mediation");
+        return (bidId, address(0), address(0), address(0));
+    }
+
+    /** passedValidation(int)
+     *  @dev Has the bid been paid out with enough valid validations?  The same rule as
+     *      Scatter.satisfied().
+     *  @param bidId    The ID of the bid
+     *  @return bool    If the bid passed validation
+     */
+    function passedValidation(int bidId) internal view returns (bool)
+    {
+        (, , , , , , , bool paid) = bidStore.getBidState(bidId);
+        if (!paid)
+        {
+            return false;
+        }
+
+        (uint validCount, uint invalidCount, int16 minValidations) =
+            bidStore.getValidationTally(bidId);
+        return validCount > invalidCount && validCount - invalidCount >= uint(minValidations);
+    }
+
+    /** requireChallengeable(int, address)
+     *  @dev Revert unless the hoster is staked on the bid and not in a challenge
+     *  @param bidId    The ID of the bid
+     *  @param hoster   The hoster
+     */
+    function requireChallengeable(int bidId, address hoster) internal view
+    {
+        (uint value, , uint openChallenge, ) = challengeStore.getStake(bidId, hoster);
+        require(value > 0, "not staked");
+        require(openChallenge == 0, "in challenge");
+    }
+
+    /** defendDuration()
+     *  @dev How long hosters have to answer a challenge
+     *  @return uint    Seconds
+     */
+    function defendDuration() internal view returns (uint)
+    {
+        return env.getuint(ENV_CHALLENGE_DEFEND_DURATION);
+    }
+}
@@ -0,0 +1,72 @@
+pragma solidity >=0.5.5 <0.6.0;  // CREATE2 needs a Constantinople (Petersburg) target
+
+import "./lib/Owned.sol";
+
+
+/* Create2Factory
+@title Deploy contracts to addresses that only depend on a salt and their init code
+@author Mike Shultz <mike@mikeshultz.com>
+
+The address of a contract deployed by this factory is:
+
+    keccak256(0xff ++ factory ++ salt ++ keccak256(initCode))[12:]
+
+so clients can compute it offline.  Deploys are owner only since anyone deploying the same init
+code with the same salt first would otherwise take the address (and with deployOwned, the
+ownership).
+*/
+contract Create2Factory is Owned {
+
+    event Deployed(address indexed addr, bytes32 indexed salt);
+
+    /** deploy(bytes, bytes32)
+     *  @notice Deploy a contract with CREATE2
+     *  @param initCode  The linked contract bytecode with the constructor arguments appended
+     *  @param salt      The salt for the address
+     *  @return address  The address of the new contract
+     */
+    function deploy(bytes memory initCode, bytes32 salt) public ownerOnly returns (address)
+    {
+        return create(initCode, salt);
+    }
+
+    /** deployOwned(bytes, bytes32)
+     *  @notice Deploy an Owned contract with CREATE2 and pass its ownership to the sender.  The
+     *      factory is the owner of anything it creates.
+     *  @param initCode  The linked contract bytecode with the constructor arguments appended
+     *  @param salt      The salt for the address
+     *  @return address  The address of the new contract
+     */
+    function deployOwned(bytes memory initCode, bytes32 salt) public ownerOnly returns (address)
+    {
+        address addr = create(initCode, salt);
+        Owned(addr).setOwner(msg.sender);
+        return addr;
+    }
+
+    /** computeAddress(bytes32, bytes32)
+     *  @notice The address a deploy from this factory would have
+     *  @param salt          The salt for the address
+     *  @param initCodeHash  keccak256 of the init code
+     *  @return address      The address of the contract
+     */
+    function computeAddress(bytes32 salt, bytes32 initCodeHash) public view returns (address)
+    {
+        return address(uint160(uint256(keccak256(abi.encodePacked(
+            byte(0xff),
+            address(this),
+            salt,
+            initCodeHash
+        )))));
+    }
+
+    function create(bytes memory initCode, bytes32 salt) internal returns (address addr)
+    {
+        assembly {
+            addr := create2(0, add(initCode, 0x20), mload(initCode), salt)
+        }
+        require(addr != address(0), "deploy failed");
+        emit Deployed(addr, salt);
+    }
+
+}
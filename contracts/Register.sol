@@ -68,7 +68,12 @@ contract Register is Owned {  /// interface: IRegister
 
         bool updated = false;
 
-        address newStoreAddress = router.get(USER_STORE_HASH);
+        bytes32[] memory names = new bytes32[](2);
+        names[0] = USER_STORE_HASH;
+        names[1] = ENV_HASH;
+        address[] memory targets = router.getMany(names);
+
+        address newStoreAddress = targets[0];
 
         if (newStoreAddress != address(userStore))
         {
@@ -76,7 +81,7 @@ contract Register is Owned {  /// interface: IRegister
             updated = true;
         }
 
-        address newEnvAddress = router.get(ENV_HASH);
+        address newEnvAddress = targets[1];
 
         if (newEnvAddress != address(env))
         {
@@ -3,8 +3,10 @@ pragma solidity >=0.5.2 <0.6.0;
 import "./interface/IRouter.sol";
 import "./interface/IScatter.sol";
 
+import "./lib/Merkle.sol";
 import "./lib/Owned.sol";
 import "./lib/SafeMath.sol";
+import "./lib/Signatures.sol";
 import "./lib/Structures.sol";
 import "./lib/Rewards.sol";
 
@@ -22,7 +24,10 @@ General steps of use
 - hoster accepts, pins the file on their node, then.. (accept())
 - hoster marks it as 'pinned' (pinned())
 - validators verify that it is indeed pinned on the node (validate()/invalidate())
-- the first validator after duration triggers payouts for everyone
+    or sign verdicts off-chain for a relayer to submit together (attest())
+- the first validator after duration triggers payouts for the hoster and settles the validation
+    pool
+- validators claim their share of the validation pool (claim()/claimAttestation())
 */
 contract Scatter is Owned {  /// interface: IScatter
     using SafeMath for uint;
@@ -44,7 +49,10 @@ contract Scatter is Owned {  /// interface: IScatter
     event NotAcceptedByPinner(int indexed bidId, address indexed hoster);
     event WithdrawFailed(address indexed sender, string reason);
     event Withdraw(uint indexed value, address indexed hoster);
+    event HosterPaid(int indexed bidId, address indexed hoster, uint value);
     event ValidationOcurred(int indexed bidId, address indexed validator, bool indexed isValid);
+    event Claimed(int indexed bidId, address indexed validator, uint value);
+    event Attested(int indexed bidId, bytes32 root, uint validCount, uint invalidCount);
 
     Env public env;
     IBidStore public bidStore;
@@ -61,8 +69,21 @@ contract Scatter is Owned {  /// interface: IScatter
     bytes32 private constant ENV_MIN_BID = keccak256("minBid");
     bytes32 private constant ENV_HASH = keccak256("Env");
     bytes32 private constant BID_STORE_HASH = keccak256("BidStore");
+    uint private constant JOB_SCAN_LIMIT = 50;
+    uint private constant MAX_UINT64 = 2**64 - 1;
+    uint private constant MAX_UINT128 = 2**128 - 1;
 
-    modifier notBanned() { require(!env.isBanned(msg.sender), "banned"); _; }
+    Structures.EnvCache private envCache;
+
+    modifier notBanned() {
+        (bool banned, uint version) = env.banStatus(msg.sender);
+        require(!banned, "banned");
+        if (version != envCache.version)
+        {
+            refreshEnv();
+        }
+        _;
+    }
 
     /** constructor(address, address)
      *  @dev initialize the contract
@@ -81,14 +102,15 @@ contract Scatter is Owned {  /// interface: IScatter
      */
     function satisfied(int bidId) external view returns (bool)
     {
-        uint total = bidStore.getValidationCount(bidId);
-        uint minValid = uint(bidStore.getMinValidations(bidId));
-        if (total < minValid)
+        (uint validCount, uint invalidCount, int16 minValidations) =
+            bidStore.getValidationTally(bidId);
+        uint minValid = uint(minValidations);
+        if (validCount + invalidCount < minValid)
         {
             return false;
         }
 
-        uint sway = validationSway(bidId);
+        uint sway = validCount - invalidCount;
 
         if (sway == 0) // No ties
         {
@@ -124,28 +146,89 @@ contract Scatter is Owned {  /// interface: IScatter
     }
 
     /** getJob()
-     *  @notice Return a bid that needs to be services
-     *  @return int     The bid ID
+     *  @notice Return a bid that needs to be services.  Only the first JOB_SCAN_LIMIT bids of the
+     *      open queue are looked at, so -1 does not mean there are no jobs for the sender, e.g.
+     *      when their own bids fill the front of the queue.  Page through getOpenJobs() to see
+     *      every open bid.
+     *  @dev Walks the BidStore open bid queue, which only holds bids that have not been pinned.
+     *      Reserved bids are kept at the back of the queue, so the walk is bounded by
+     *      JOB_SCAN_LIMIT regardless of how many bids have ever been made.
+     *  @return int     The bid ID, or -1 if none was found in the scan
      *  @return bytes32 The IFPS hash of the file
      *  @return int64   The size of the file in bytes
      */
     function getJob() external view returns (int, bytes32, int64)
     {
-        // TODO: Look into a queue library, maybe?
-        // TODO: Test this with thousands(or more) bids
-        int totalBids = bidStore.getBidCount();
-        for (int i = 0; i < totalBids; i++)
+        int bidId = bidStore.getFirstOpenBid();
+        for (uint i = 0; i < JOB_SCAN_LIMIT && bidId > -1; i++)
         {
-            if (isBidOpenForAccept(i))
+            (
+                address bidder,
+                ,
+                bytes32 fileHash,
+                int64 fileSize,
+                uint accepted,
+                uint pinnedAt,
+                ,
+            ) = bidStore.getBidState(bidId);
+
+            if (canAccept(bidder, fileHash, accepted, pinnedAt, msg.sender))
             {
-                bytes32 fileHash = bidStore.getFileHash(i);
-                int64 fileSize = bidStore.getFileSize(i);
-                return (i, fileHash, fileSize);
+                return (bidId, fileHash, fileSize);
             }
+            bidId = bidStore.getNextOpenBid(bidId);
         }
         return (-1, 0, 0);
     }
 
+    /** getOpenJobs(int, uint)
+     *  @notice Get a page of bids from the open queue that can be accepted by the sender
+     *  @param cursor       The bid ID to continue after, or -1 to start at the front of the queue
+     *  @param limit        The maximum amount of open bids to look at, at least 1
+     *  @return int[]       The bid IDs
+     *  @return bytes32[]   The IPFS file hashes
+     *  @return int64[]     The file sizes in bytes
+     *  @return int         The cursor for the next page, or -1 if this is the last page
+     */
+    function getOpenJobs(int cursor, uint limit) external view returns (
+        int[] memory,
+        bytes32[] memory,
+        int64[] memory,
+        int
+    )
+    {
+        (
+            int[] memory bidIds,
+            address[] memory bidders,
+            bytes32[] memory fileHashes,
+            int64[] memory fileSizes,
+            uint[] memory accepted,
+            int next
+        ) = bidStore.getOpenBids(cursor, limit);
+
+        uint found = 0;
+        for (uint i = 0; i < bidIds.length; i++)
+        {
+            // Open bids are never pinned
+            if (canAccept(bidders[i], fileHashes[i], accepted[i], 0, msg.sender))
+            {
+                bidIds[found] = bidIds[i];
+                fileHashes[found] = fileHashes[i];
+                fileSizes[found] = fileSizes[i];
+                found += 1;
+            }
+        }
+
+        // Trim the arrays down to the jobs we found
+        assembly {
+            mstore(bidIds, found)
+            mstore(fileHashes, found)
+            mstore(fileSizes, found)
+        }
+
+        return (bidIds, fileHashes, fileSizes, next);
+    }
+
     /** isBidOpenForPin(int, address)
      *  @notice Check if a file for a bid can be pinned by an address
      *  @param  bidId   The bid ID
@@ -155,23 +238,17 @@ contract Scatter is Owned {  /// interface: IScatter
     function isBidOpenForPin(int bidId, address _hoster) public view
     returns (bool)
     {
-        uint acceptWait = env.getuint(ENV_ACCEPT_HOLD_DURATION);
-        bytes32 fileHash = bidStore.getFileHash(bidId);
-        uint accepted = bidStore.getAccepted(bidId);
-        address hoster = bidStore.getHoster(bidId);
-
-        return (
-            fileHash != bytes32(0)
-            && !bidStore.isPinned(bidId)
-            && (
-                accepted == 0
-                || now - uint(accepted) >= acceptWait
-                || (
-                    now - uint(accepted) < acceptWait
-                    && hoster == _hoster
-                )
-            )
-        );
+        (
+            ,
+            address hoster,
+            bytes32 fileHash,
+            ,
+            uint accepted,
+            uint pinnedAt,
+            ,
+        ) = bidStore.getBidState(bidId);
+
+        return canPin(hoster, fileHash, accepted, pinnedAt, _hoster);
     }
 
     /** isBidOpenForPin(int)
@@ -194,16 +271,17 @@ contract Scatter is Owned {  /// interface: IScatter
     function isBidOpenForAccept(int bidId, address _hoster) public view
     returns (bool)
     {
-        uint acceptWait = env.getuint(ENV_ACCEPT_HOLD_DURATION);
-        bytes32 fileHash = bidStore.getFileHash(bidId);
-        uint accepted = bidStore.getAccepted(bidId);
-        address bidder = bidStore.getBidder(bidId);
-        return (
-            fileHash != bytes32(0)
-            && !bidStore.isPinned(bidId)
-            && (accepted == 0 || now - uint(accepted) >= acceptWait)
-            && bidder != _hoster
-        );
+        (
+            address bidder,
+            ,
+            bytes32 fileHash,
+            ,
+            uint accepted,
+            uint pinnedAt,
+            ,
+        ) = bidStore.getBidState(bidId);
+
+        return canAccept(bidder, fileHash, accepted, pinnedAt, _hoster);
     }
 
     /** isBidOpenForAccept(int)
@@ -224,20 +302,8 @@ contract Scatter is Owned {  /// interface: IScatter
      */
     function validationSway(int bidId) public view returns (uint)
     {
-        uint total = bidStore.getValidationCount(bidId);
-        uint sway = 0;
-        for (uint i = 0; i < total; i++)
-        {
-            if (bidStore.getValidationIsValid(bidId, i))
-            {
-                sway += 1;
-            }
-            else
-            {
-                sway -= 1;
-            }
-        }
-        return sway;
+        (uint validCount, uint invalidCount, ) = bidStore.getValidationTally(bidId);
+        return validCount - invalidCount;
     }
 
     /** getBidCount()
@@ -283,6 +349,18 @@ contract Scatter is Owned {  /// interface: IScatter
         return bidStore.getHoster(bidId);
     }
 
+    /** attestationHash(int, bool)
+     *  @notice The hash a validator signs as an Ethereum signed message to attest to a pin
+     *      off-chain
+     *  @param bidId    The ID of the bid
+     *  @param verdict  If the validator found the pin valid
+     *  @return bytes32 The hash to sign
+     */
+    function attestationHash(int bidId, bool verdict) public view returns (bytes32)
+    {
+        return keccak256(abi.encodePacked(address(this), bidId, verdict));
+    }
+
     /** balance(address)
      *  @notice Return the balance of a user's address
      *  @param _address is the address to check
@@ -326,29 +404,8 @@ contract Scatter is Owned {  /// interface: IScatter
     payable
     returns (bool)
     {
-
-        if (!validateBid(fileHash, fileSize, durationSeconds, bidValue, validationPool,
-            minValidations))
-        {
-            emit BidInvalid(fileHash, "failed validation");
-            return false;
-        }
-
-        int bidId = bidStore.addBid(msg.sender, fileHash, fileSize, bidValue, validationPool,
-                                    minValidations, durationSeconds);
-
-        assert(bidId > -1);
-
-        emit BidSuccessful(
-            bidId,
-            address(msg.sender),
-            bidValue,
-            validationPool,
-            fileHash,
-            fileSize
-        );
-
-        return true;
+        return placeBid(fileHash, fileSize, durationSeconds, bidValue, validationPool,
+                        minValidations);
     }
 
     /** bid(bytes32, int64, uint, uint, uint)
@@ -369,13 +426,85 @@ contract Scatter is Owned {  /// interface: IScatter
         uint bidValue,
         uint validationPool
     )
-    public
+    public notBanned
     payable
     returns (bool)
     {
         // Use the minimum validations default from the Env contract
-        uint minValid = env.getuint(ENV_DEFAULT_MIN_VALIDATIONS);
-        return bid(fileHash, fileSize, durationSeconds, bidValue, validationPool, int16(minValid));
+        uint minValid = envCache.defaultMinValidations;
+        return placeBid(fileHash, fileSize, durationSeconds, bidValue, validationPool,
+                        int16(minValid));
+    }
+
+    /** bidMany(bytes32[], int64[], uint[], uint[], uint[])
+     *  @notice Make many bids in one transaction, using the default minValidations.  msg.value
+     *      must cover the sum of all bid values and validation pools.
+     *  @dev If any bid fails validation, none of them are stored.
+     *  @param fileHashes       The IPFS file hashes to be pinned
+     *  @param fileSizes        The sizes of the files in bytes
+     *  @param durations        The requested durations of the IPFS pins
+     *  @param bidValues        The values provided to compensate the hosters
+     *  @param validationPools  The values to be split between validators for each bid
+     *  @return bool    Succeeded?
+     */
+    function bidMany(
+        bytes32[] memory fileHashes,
+        int64[] memory fileSizes,
+        uint[] memory durations,
+        uint[] memory bidValues,
+        uint[] memory validationPools
+    )
+    public notBanned
+    payable
+    returns (bool)
+    {
+        require(fileHashes.length > 0, "no bids");
+        require(
+            fileHashes.length == fileSizes.length
+            && fileHashes.length == durations.length
+            && fileHashes.length == bidValues.length
+            && fileHashes.length == validationPools.length,
+            "length mismatch"
+        );
+
+        int16 minValidations = int16(envCache.defaultMinValidations);
+        uint total = 0;
+
+        for (uint i = 0; i < fileHashes.length; i++)
+        {
+            if (!validateBidParams(fileHashes[i], fileSizes[i], durations[i], bidValues[i],
+                validationPools[i], minValidations))
+            {
+                emit BidInvalid(fileHashes[i], "failed validation");
+                return false;
+            }
+            total = total.add(bidValues[i]).add(validationPools[i]);
+        }
+
+        if (msg.value < total)
+        {
+            emit BidInvalid(fileHashes[0], "failed validation");
+            return false;
+        }
+
+        int firstBidId = bidStore.addBids(msg.sender, fileHashes, fileSizes, bidValues,
+                                          validationPools, minValidations, durations);
+
+        assert(firstBidId > -1);
+
+        for (uint i = 0; i < fileHashes.length; i++)
+        {
+            emit BidSuccessful(
+                firstBidId + int(i),
+                address(msg.sender),
+                bidValues[i],
+                validationPools[i],
+                fileHashes[i],
+                fileSizes[i]
+            );
+        }
+
+        return true;
     }
 
     /** accept(int)
@@ -387,10 +516,18 @@ contract Scatter is Owned {  /// interface: IScatter
     function accept(int bidId) public notBanned
     returns (bool)
     {
-
-        if (!isBidOpenForAccept(bidId))
+        (
+            address bidder,
+            ,
+            bytes32 fileHash,
+            ,
+            uint accepted,
+            uint pinnedAt,
+            ,
+        ) = bidStore.getBidState(bidId);
+
+        if (!canAccept(bidder, fileHash, accepted, pinnedAt, msg.sender))
         {
-            uint accepted = bidStore.getAccepted(bidId);
             emit AcceptWait(now - accepted);
             return false;
         }
@@ -410,18 +547,26 @@ contract Scatter is Owned {  /// interface: IScatter
     function pinned(int bidId) public notBanned
     returns (bool)
     {
-        require(!bidStore.isPinned(bidId), "already pinned");
-
-        if (!isBidOpenForPin(bidId))
+        (
+            ,
+            address storedHoster,
+            bytes32 fileHash,
+            ,
+            uint accepted,
+            uint pinnedAt,
+            ,
+        ) = bidStore.getBidState(bidId);
+
+        require(pinnedAt == 0, "already pinned");
+
+        if (!canPin(storedHoster, fileHash, accepted, pinnedAt, msg.sender))
         {
-            address storedHoster = bidStore.getHoster(bidId);
             emit NotAcceptedByPinner(bidId, storedHoster);
             return false;
         }
 
         require(bidStore.setPinned(bidId, msg.sender), "accept error");
 
-        bytes32 fileHash = bidStore.getFileHash(bidId);
         emit Pinned(bidId, msg.sender, fileHash);
 
         return true;
@@ -447,6 +592,137 @@ contract Scatter is Owned {  /// interface: IScatter
         addValidation(bidId, false);
     }
 
+    /** validateMany(int[], bool[])
+     *  @notice For a validator to mark the pins of many bids as valid or invalid at once.  Bids
+     *      that are closed or were already validated by the sender are skipped so one stale
+     *      verdict does not revert the whole batch.
+     *  @param bidIds   The IDs of the bids to be validated
+     *  @param verdicts If the validator marked each pin as valid
+     */
+    function validateMany(int[] memory bidIds, bool[] memory verdicts)
+    public notBanned
+    {
+        require(bidIds.length > 0 && bidIds.length == verdicts.length, "length mismatch");
+
+        (uint[] memory pinnedTimes, uint[] memory durations) = bidStore.addValidations(
+            bidIds,
+            msg.sender,
+            verdicts
+        );
+
+        for (uint i = 0; i < bidIds.length; i++)
+        {
+            if (pinnedTimes[i] == 0)
+            {
+                continue;
+            }
+
+            if (Rewards.durationHasPassed(pinnedTimes[i], durations[i]))
+            {
+                payout(bidIds[i]);
+            }
+
+            emit ValidationOcurred(bidIds[i], msg.sender, verdicts[i]);
+        }
+    }
+
+    /** claim(int)
+     *  @notice For a validator to claim their share of a bid's validation pool once the bid has
+     *      been paid out
+     *  @param bidId    The ID of the bid that was validated
+     *  @return bool    If anything was claimed
+     */
+    function claim(int bidId) public notBanned
+    returns (bool)
+    {
+        uint value = Rewards.claimValidator(address(bidStore), bidId, msg.sender, balanceSheet);
+
+        if (value == 0)
+        {
+            return false;
+        }
+
+        emit Claimed(bidId, msg.sender, value);
+
+        return true;
+    }
+
+    /** attest(int, bool[], uint8[], bytes32[], bytes32[])
+     *  @notice Submit the signed verdicts of many validators on a bid in one transaction.  Only
+     *      the tally and a Merkle root of the attestations are stored, and each validator claims
+     *      their share with claimAttestation().
+     *  @dev Signatures have to be ordered by validator address, ascending, so duplicates are
+     *      rejected without storing anything.  A bid takes attestations once, after its duration
+     *      has passed and not after validate(), and is paid out in the same call.
+     *  @param bidId    The ID of the bid
+     *  @param verdicts If each validator found the pin valid
+     *  @param vs       The v of each validator's signature of attestationHash()
+     *  @param rs       The r of each signature
+     *  @param ss       The s of each signature
+     */
+    function attest(
+        int bidId,
+        bool[] memory verdicts,
+        uint8[] memory vs,
+        bytes32[] memory rs,
+        bytes32[] memory ss
+    )
+    public notBanned
+    {
+        require(
+            verdicts.length > 0
+            && verdicts.length == vs.length
+            && verdicts.length == rs.length
+            && verdicts.length == ss.length,
+            "length mismatch"
+        );
+
+        (bytes32 root, uint validCount) = attestationRoot(bidId, verdicts, vs, rs, ss);
+        (uint whenPinned, uint durationSeconds) = bidStore.addAttestations(
+            bidId,
+            root,
+            validCount,
+            verdicts.length - validCount
+        );
+
+        // The root closes the bid to other validations, so it has to settle it too
+        require(Rewards.durationHasPassed(whenPinned, durationSeconds), "duration not passed");
+        payout(bidId);
+
+        emit Attested(bidId, root, validCount, verdicts.length - validCount);
+    }
+
+    /** claimAttestation(int, uint, bool, bytes32[])
+     *  @notice For a validator to claim their share of a bid's validation pool for an
+     *      attestation, once the bid has been paid out
+     *  @param bidId    The ID of the bid that was attested
+     *  @param index    The position of the sender's attestation in attest()
+     *  @param verdict  The sender's verdict
+     *  @param proof    The Merkle proof of the attestation
+     *  @return bool    If anything was claimed
+     */
+    function claimAttestation(int bidId, uint index, bool verdict, bytes32[] memory proof)
+    public notBanned returns (bool)
+    {
+        require(Merkle.verify(
+            proof,
+            bidStore.getAttestationRoot(bidId),
+            attestationLeaf(index, msg.sender, verdict)
+        ), "invalid proof");
+
+        uint value = bidStore.claimAttestationShare(bidId, index);
+
+        if (value == 0)
+        {
+            return false;
+        }
+
+        balanceSheet[msg.sender] += value;
+        emit Claimed(bidId, msg.sender, value);
+
+        return true;
+    }
+
     /** validatorIndex(int, address payable)
      *  @notice Get the index in the array of a Validation that has a specific address set as
      *      validator
@@ -492,6 +768,19 @@ contract Scatter is Owned {  /// interface: IScatter
         transfer(msg.sender);
     }
 
+    /** refreshEnv()
+     *  @notice Reload the cached Env values.  This happens automatically on any state changing
+     *      call once the Env config version moves, but views only see the cached values.
+     */
+    function refreshEnv() public
+    {
+        envCache.version = uint64(env.configVersion());
+        envCache.acceptHoldDuration = toUint64(env.getuint(ENV_ACCEPT_HOLD_DURATION));
+        envCache.minDuration = toUint64(env.getuint(ENV_MIN_DURATION));
+        envCache.defaultMinValidations = toUint64(env.getuint(ENV_DEFAULT_MIN_VALIDATIONS));
+        envCache.minBid = env.getuint(ENV_MIN_BID);
+    }
+
     /** updateReferences()
      *  @dev Using the router, update all the addresses
      *  @return bool If anything was updated
@@ -500,14 +789,24 @@ contract Scatter is Owned {  /// interface: IScatter
     {
         bool updated = false;
 
-        address newEnvAddress = router.get(ENV_HASH);
+        bytes32[] memory names = new bytes32[](2);
+        names[0] = ENV_HASH;
+        names[1] = BID_STORE_HASH;
+        address[] memory targets = router.getMany(names);
+
+        address newEnvAddress = targets[0];
         if (newEnvAddress != address(env))
         {
             env = Env(newEnvAddress);
+            envCache.version = 0;
+            if (newEnvAddress != address(0))
+            {
+                refreshEnv();
+            }
             updated = true;
         }
 
-        address newBSAddress = router.get(BID_STORE_HASH);
+        address newBSAddress = targets[1];
         if (newBSAddress != address(bidStore))
         {
             bidStore = IBidStore(newBSAddress);
@@ -526,15 +825,20 @@ contract Scatter is Owned {  /// interface: IScatter
         uint validationPool = bidStore.getValidationPool(bidId);
 
         // Payout
-        require(bidStore.getValidationCount(bidId) > 0, "non validators");
-        uint amountPaid = Rewards.payValidators(address(bidStore), bidId, balanceSheet);
+        uint amountPaid = Rewards.settleValidators(address(bidStore), bidId);
 
         uint remainder = validationPool - amountPaid;
         if (remainder > 0)
         {
             remainderFunds += remainder;
         }
-        Rewards.payHoster(address(bidStore), bidId, balanceSheet);
+        (address hoster, uint bidAmount) = Rewards.payHoster(
+            address(bidStore),
+            bidId,
+            balanceSheet
+        );
+
+        emit HosterPaid(bidId, hoster, bidAmount);
     }
 
     /** addValidation(int, bool)
@@ -545,11 +849,22 @@ contract Scatter is Owned {  /// interface: IScatter
     function addValidation(int bidId, bool isValid)
     internal
     {
-        require(bidStore.isPinned(bidId), "not open");
+        (
+            ,
+            ,
+            ,
+            ,
+            ,
+            uint whenPinned,
+            uint durationSeconds,
+            bool paid
+        ) = bidStore.getBidState(bidId);
+
+        require(whenPinned > 0, "not open");
+        require(!paid, "bid closed");
+        require(!bidStore.hasValidated(bidId, msg.sender), "already validated");
         require(bidStore.addValidation(bidId, msg.sender, isValid), "add failed");
 
-        uint whenPinned = bidStore.getPinned(bidId);
-        uint durationSeconds = bidStore.getDuration(bidId);
         if (Rewards.durationHasPassed(whenPinned, durationSeconds))
         {
             payout(bidId);
@@ -558,6 +873,166 @@ contract Scatter is Owned {  /// interface: IScatter
         emit ValidationOcurred(bidId, msg.sender, isValid);
     }
 
+    /** attestationRoot(int, bool[], uint8[], bytes32[], bytes32[])
+     *  @dev Recover the validator of each attestation and hash the attestations into a Merkle
+     *      root
+     *  @return bytes32 The Merkle root
+     *  @return uint    The amount of verdicts marking the pin valid
+     */
+    function attestationRoot(
+        int bidId,
+        bool[] memory verdicts,
+        uint8[] memory vs,
+        bytes32[] memory rs,
+        bytes32[] memory ss
+    )
+    internal returns (bytes32 root, uint validCount)
+    {
+        bytes32[] memory leaves = new bytes32[](verdicts.length);
+        address last = address(0);
+
+        for (uint i = 0; i < verdicts.length; i++)
+        {
+            address validator = Signatures.recover(
+                attestationHash(bidId, verdicts[i]),
+                vs[i],
+                rs[i],
+                ss[i]
+            );
+            require(validator > last, "unsorted");
+            (bool banned, ) = env.banStatus(validator);
+            require(!banned, "banned");
+
+            leaves[i] = attestationLeaf(i, validator, verdicts[i]);
+            if (verdicts[i])
+            {
+                validCount += 1;
+            }
+            last = validator;
+
+            emit ValidationOcurred(bidId, validator, verdicts[i]);
+        }
+
+        root = Merkle.root(leaves);
+    }
+
+    /** attestationLeaf(uint, address, bool)
+     *  @dev The Merkle leaf for an attestation
+     *  @param index        The position of the attestation in attest()
+     *  @param validator    The validator that signed it
+     *  @param verdict      If the validator found the pin valid
+     *  @return bytes32     The leaf
+     */
+    function attestationLeaf(uint index, address validator, bool verdict)
+    internal pure returns (bytes32)
+    {
+        return keccak256(abi.encodePacked(index, validator, verdict));
+    }
+
+    /** placeBid(bytes32, int64, uint, uint, uint, int16)
+     *  @dev Validate and store a bid, and send out an event
+     *  @param fileHash         The IPFS file hash to be pinned
+     *  @param fileSize         The size of the file in bytes
+     *  @param durationSeconds  The requested duration of the IPFS pin
+     *  @param bidValue         The value provided to compensate the hoster
+     *  @param validationPool   The value to be split between validators
+     *  @param minValidations   The minimum amount of majority validations
+     *  @return bool    Succeeded?
+     */
+    function placeBid(
+        bytes32 fileHash,
+        int64 fileSize,
+        uint durationSeconds,
+        uint bidValue,
+        uint validationPool,
+        int16 minValidations
+    )
+    internal
+    returns (bool)
+    {
+
+        if (!validateBid(fileHash, fileSize, durationSeconds, bidValue, validationPool,
+            minValidations))
+        {
+            emit BidInvalid(fileHash, "failed validation");
+            return false;
+        }
+
+        int bidId = bidStore.addBid(msg.sender, fileHash, fileSize, bidValue, validationPool,
+                                    minValidations, durationSeconds);
+
+        assert(bidId > -1);
+
+        emit BidSuccessful(
+            bidId,
+            address(msg.sender),
+            bidValue,
+            validationPool,
+            fileHash,
+            fileSize
+        );
+
+        return true;
+    }
+
+    /** canAccept(address, bytes32, uint, uint, address)
+     *  @dev Check if a bid in the given state can be accepted by an address
+     *  @param bidder       The bidder's address
+     *  @param fileHash     The IPFS file hash of the bid
+     *  @param accepted     The timestamp of the last accept
+     *  @param pinnedAt     The timestamp of the pin
+     *  @param _hoster      The hoster that would like to accept the file
+     *  @return bool        If the file can be accepted
+     */
+    function canAccept(
+        address bidder,
+        bytes32 fileHash,
+        uint accepted,
+        uint pinnedAt,
+        address _hoster
+    ) internal view returns (bool)
+    {
+        uint acceptWait = envCache.acceptHoldDuration;
+        return (
+            fileHash != bytes32(0)
+            && pinnedAt == 0
+            && (accepted == 0 || now - accepted >= acceptWait)
+            && bidder != _hoster
+        );
+    }
+
+    /** canPin(address, bytes32, uint, uint, address)
+     *  @dev Check if a bid in the given state can be pinned by an address
+     *  @param hoster       The hoster currently set on the bid
+     *  @param fileHash     The IPFS file hash of the bid
+     *  @param accepted     The timestamp of the last accept
+     *  @param pinnedAt     The timestamp of the pin
+     *  @param _hoster      The hoster that would like to pin the file
+     *  @return bool        If the file can be pinned
+     */
+    function canPin(
+        address hoster,
+        bytes32 fileHash,
+        uint accepted,
+        uint pinnedAt,
+        address _hoster
+    ) internal view returns (bool)
+    {
+        uint acceptWait = envCache.acceptHoldDuration;
+        return (
+            fileHash != bytes32(0)
+            && pinnedAt == 0
+            && (
+                accepted == 0
+                || now - accepted >= acceptWait
+                || (
+                    now - accepted < acceptWait
+                    && hoster == _hoster
+                )
+            )
+        );
+    }
+
     /** validateBid(bytes32, int64, uint, uint, uint, int16)
      *  @dev Validate bid() input values
      *  @param fileHash         The IPFS file hash to be pinned
@@ -576,15 +1051,45 @@ contract Scatter is Owned {  /// interface: IScatter
         uint validationPool,
         int16 minValidations
     ) internal view returns (bool)
+    {
+        if (msg.value < bidValue.add(validationPool))
+        {
+            return false;
+        }
+
+        return validateBidParams(fileHash, fileSize, durationSeconds, bidValue, validationPool,
+                                 minValidations);
+    }
+
+    /** validateBidParams(bytes32, int64, uint, uint, uint, int16)
+     *  @dev Validate the values of a single bid, not including the value sent with it
+     *  @param fileHash         The IPFS file hash to be pinned
+     *  @param fileSize         The size of the file in bytes
+     *  @param durationSeconds  The requested duration of the IPFS pin
+     *  @param bidValue         The value provided to compensate the hoster
+     *  @param validationPool   The value to be split between validators
+     *  @param minValidations   The minimum amount of majority validations
+     *  @return bool            If the values passed validation
+     */
+    function validateBidParams(
+        bytes32 fileHash,
+        int64 fileSize,
+        uint durationSeconds,
+        uint bidValue,
+        uint validationPool,
+        int16 minValidations
+    ) internal view returns (bool)
     {
         if (
-            msg.value < bidValue.add(validationPool)
-            || fileHash == bytes32(0) || fileSize < 1
+            fileHash == bytes32(0) || fileSize < 1
             || fileHash == EMPTY_IPFS_FILE
             || bidValue < 1
+            || bidValue > MAX_UINT128
+            || validationPool > MAX_UINT128
+            || durationSeconds > MAX_UINT64
             || validationPool < uint(minValidations)
-            || bidValue < env.getuint(ENV_MIN_BID)
-            || durationSeconds < env.getuint(ENV_MIN_DURATION)
+            || bidValue < envCache.minBid
+            || durationSeconds < envCache.minDuration
         )
         {
             return false;
@@ -593,4 +1098,18 @@ contract Scatter is Owned {  /// interface: IScatter
         return true;
     }
 
+    /** toUint64(uint)
+     *  @dev Narrow a uint to uint64, capping it instead of truncating
+     *  @param value    The value to narrow
+     *  @return uint64  The capped value
+     */
+    function toUint64(uint value) internal pure returns (uint64)
+    {
+        if (value > MAX_UINT64)
+        {
+            return uint64(MAX_UINT64);
+        }
+        return uint64(value);
+    }
+
 }
\ No newline at end of file
@@ -7,10 +7,26 @@ interface IBidStore {
                     uint validationPool, int16 minValidations, uint durationSeconds)
         external returns (int);
 
+    function addBids(address payable _sender, bytes32[] calldata fileHashes,
+                     int64[] calldata fileSizes, uint[] calldata bidValues,
+                     uint[] calldata validationPools, int16 minValidations,
+                     uint[] calldata durations)
+        external returns (int);
+
     function addValidation(int bidId, address payable _validator, bool _isValid)
         external returns (bool);
 
+    function addValidations(int[] calldata bidIds, address payable _validator,
+                            bool[] calldata verdicts)
+        external returns (
+            uint[] memory,  // pinned
+            uint[] memory   // duration
+        );
+
     function getBidCount() external view returns (int);
+    function getFirstOpenBid() external view returns (int);
+    function getNextOpenBid(int bidId) external view returns (int);
+    function getOpenBidCount() external view returns (int);
     function getBid(int bidId) external view returns (
         address,    // bidder
         bytes32,    // fileHash
@@ -20,6 +36,16 @@ interface IBidStore {
         uint,       // duration
         int16       // minValidations
     );
+    function getBidState(int bidId) external view returns (
+        address,    // bidder
+        address,    // hoster
+        bytes32,    // fileHash
+        int64,      // fileSize
+        uint,       // accepted
+        uint,       // pinned
+        uint,       // duration
+        bool        // paid
+    );
     function isPinned(int bidId) external view returns (bool);
     function getPinned(int bidId) external view returns (uint);
     function getBidder(int bidId) external view returns (address payable);
@@ -31,9 +57,19 @@ interface IBidStore {
     function getValidationPool(int bidId) external view returns (uint);
     function getBidAmount(int bidId) external view returns (uint);
     function getMinValidations(int bidId) external view returns (int16);
+    function getValidatorShare(int bidId) external view returns (
+        uint,       // validatorShare
+        uint        // validatorCount
+    );
     function getValidatorIndex(int bidId, address payable _validator) external view returns (uint);
+    function hasValidated(int bidId, address _validator) external view returns (bool);
     function getValidator(int bidId, uint idx) external view returns (address payable);
     function getValidationCount(int bidId) external view returns (uint);
+    function getValidationTally(int bidId) external view returns (
+        uint,       // validCount
+        uint,       // invalidCount
+        int16       // minValidations
+    );
     function getValidation(int bidId, uint idx) external view returns (
         uint,       // when
         address,    // validator
@@ -41,11 +77,53 @@ interface IBidStore {
         bool        // paid
     );
     function getValidationIsValid(int bidId, uint idx) external view returns (bool);
+    function getAttestationRoot(int bidId) external view returns (bytes32);
+    function getAttestationCount(int bidId) external view returns (uint);
+    function isAttestationClaimed(int bidId, uint index) external view returns (bool);
+    function getBids(int offset, uint limit) external view returns (
+        address[] memory,   // bidders
+        bytes32[] memory,   // fileHashes
+        int64[] memory,     // fileSizes
+        uint[] memory,      // bidAmounts
+        uint[] memory,      // validationPools
+        uint[] memory,      // durations
+        int16[] memory      // minValidations
+    );
+    function getBidStates(int offset, uint limit) external view returns (
+        address[] memory,   // hosters
+        uint[] memory,      // accepted
+        uint[] memory,      // pinned
+        bool[] memory,      // paid
+        uint[] memory,      // validCounts
+        uint[] memory       // invalidCounts
+    );
+    function getOpenBids(int cursor, uint limit) external view returns (
+        int[] memory,       // bidIds
+        address[] memory,   // bidders
+        bytes32[] memory,   // fileHashes
+        int64[] memory,     // fileSizes
+        uint[] memory,      // accepted
+        int                 // next
+    );
+    function getValidations(int bidId, uint offset, uint limit) external view returns (
+        uint[] memory,      // whens
+        address[] memory,   // validators
+        bool[] memory,      // isValids
+        bool[] memory       // paids
+    );
 
     function setHoster(int bidId, address payable hoster) external returns (bool);
     function setAcceptNow(int bidId, address payable hoster) external returns (bool);
     function setPinned(int bidId, address payable hoster) external returns (bool);
     function setHosterPaid(int bidId) external returns (bool);
     function setValidatorPaid(int bidId, uint idx) external returns (bool);
+    function setValidatorShare(int bidId, uint share, uint validatorCount) external returns (bool);
+    function claimValidatorShare(int bidId, address _validator) external returns (uint);
+    function addAttestations(int bidId, bytes32 root, uint validCount, uint invalidCount)
+        external returns (
+            uint,   // pinned
+            uint    // duration
+        );
+    function claimAttestationShare(int bidId, uint index) external returns (uint);
 
 }
\ No newline at end of file
@@ -0,0 +1,40 @@
+pragma solidity >=0.4.0 <0.6.0;
+
+interface IChallenge {
+
+    event Staked(int indexed bidId, address indexed hoster, uint value);
+    event Proved(int indexed bidId, address indexed hoster, bytes32 uniqueHash);
+    event ChallengeOpened(
+        uint indexed challengeId,
+        int indexed bidId,
+        address indexed defendant,
+        address challenger,
+        bytes32 seed
+    );
+    event Defended(uint indexed challengeId, address indexed hoster, bytes32 uniqueHash);
+    event Mediated(uint indexed challengeId, address indexed mediator, bool defendantValid);
+    event ChallengeSettled(
+        uint indexed challengeId,
+        address indexed winner,
+        address indexed loser,
+        uint value
+    );
+    event StakeClaimed(int indexed bidId, address indexed hoster, uint value);
+    event Withdraw(uint indexed value, address indexed hoster);
+    event HosterBanned(address indexed hoster, uint losses);
+
+    function stake(int bidId) external payable;
+    function prove(int bidId, bytes32 uniqueHash, uint8 v, bytes32 r, bytes32 s) external;
+    function challenge(int bidId, address defendant) external returns (uint);
+    function defend(uint challengeId, bytes32 uniqueHash, uint8 v, bytes32 r, bytes32 s)
+        external;
+    function mediate(uint challengeId, bool defendantValid) external;
+    function settle(uint challengeId) external;
+    function claim(int bidId) external;
+    function withdraw() external;
+    function getBalance(address _address) external view returns (uint);
+    function proofHash(int bidId, bytes32 uniqueHash) external view returns (bytes32);
+    function defenseHash(uint challengeId, bytes32 uniqueHash) external view returns (bytes32);
+    function updateReferences() external returns (bool);
+
+}
@@ -0,0 +1,46 @@
+pragma solidity >=0.4.0 <0.6.0;
+
+
+interface IChallengeStore {
+
+    function addStake(int bidId, address hoster, uint value) external returns (bool);
+    function removeStake(int bidId, address hoster) external returns (uint);
+    function setUniqueHash(int bidId, address hoster, bytes32 uniqueHash) external;
+    function addChallenge(int bidId, address challenger, address defendant, bytes32 seed)
+        external returns (uint);
+    function setDefense(uint challengeId, bool isChallenger, bytes32 uniqueHash) external;
+    function setMediation(uint challengeId, address mediator, bool defendantValid) external;
+    function settle(uint challengeId, address loser) external returns (uint);
+    function ban(address hoster) external;
+
+    function challengeCount() external view returns (uint);
+    function getLosses(address hoster) external view returns (uint);
+    function isBanned(address hoster) external view returns (bool);
+    function getStake(int bidId, address hoster) external view returns (
+        uint,     // value
+        uint,     // since
+        uint,     // openChallenge
+        bytes32   // uniqueHash
+    );
+    function getBidStakes(int bidId) external view returns (
+        address,  // hosterA
+        address,  // hosterB
+        uint,     // lastChallenge
+        uint      // challengeCount
+    );
+    function getChallenge(uint challengeId) external view returns (
+        int,      // bidId
+        address,  // challenger
+        address,  // defendant
+        uint,     // opened
+        uint      // state
+    );
+    function getDefense(uint challengeId) external view returns (
+        bytes32,  // seed
+        bytes32,  // challengerHash
+        bytes32,  // defendantHash
+        address,  // mediator
+        bool      // defendantValid
+    );
+
+}
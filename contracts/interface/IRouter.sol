@@ -3,4 +3,6 @@ pragma solidity >=0.4.0 <0.6.0;
 interface IRouter {
     function get(bytes32 _name) external view returns (address);
     function set(bytes32 _name, address _target) external;
+    function getMany(bytes32[] calldata _names) external view returns (address[] memory);
+    function setMany(bytes32[] calldata _names, address[] calldata _targets) external;
 }
\ No newline at end of file
@@ -39,7 +39,11 @@ interface IScatter {
     event AcceptWait(int waitLeft);
     event Pinned(int indexed bidId, address indexed hoster, bytes32 fileHash);
     event NotAcceptedByPinner(int indexed bidId, address indexed hoster);
+    event Withdraw(uint indexed value, address indexed hoster);
+    event HosterPaid(int indexed bidId, address indexed hoster, uint value);
     event ValidationOcurred(int indexed bidId, address indexed validator, bool indexed isValid);
+    event Claimed(int indexed bidId, address indexed validator, uint value);
+    event Attested(int indexed bidId, bytes32 root, uint validCount, uint invalidCount);
 
     function getBid(int bidId) external view returns (
         address,
@@ -51,6 +55,12 @@ interface IScatter {
         int16
     );
     function getJob() external view returns (int, bytes32, int);
+    function getOpenJobs(int cursor, uint limit) external view returns (
+        int[] memory,
+        bytes32[] memory,
+        int64[] memory,
+        int
+    );
     function getBidCount() external view returns (int);
     function getHoster(int bidId) external view returns (address);
     function getValidation(int bidId, int idx) external view returns (uint, address, bool, bool);
@@ -59,6 +69,7 @@ interface IScatter {
     function isBidOpenForAccept(int bidId) external view returns (bool);
     function isBidOpenForPin(int bidId) external view returns (bool);
     function validationSway(int bidId) external view returns (uint);
+    function attestationHash(int bidId, bool verdict) external view returns (bytes32);
     function satisfied(int bidId) external view returns (bool);
 
     function balance(address _address) external view returns (uint);
@@ -87,11 +98,34 @@ interface IScatter {
     payable
     returns (bool);
 
+    function bidMany(
+        bytes32[] calldata fileHashes,
+        int64[] calldata fileSizes,
+        uint[] calldata durations,
+        uint[] calldata bidValues,
+        uint[] calldata validationPools
+    )
+    external
+    payable
+    returns (bool);
+
     function accept(int bidId) external returns (bool);
     function pinned(int bidId) external returns (bool);
     function validate(int bidId) external;
     function invalidate(int bidId) external;
+    function validateMany(int[] calldata bidIds, bool[] calldata verdicts) external;
+    function claim(int bidId) external returns (bool);
+    function attest(
+        int bidId,
+        bool[] calldata verdicts,
+        uint8[] calldata vs,
+        bytes32[] calldata rs,
+        bytes32[] calldata ss
+    ) external;
+    function claimAttestation(int bidId, uint index, bool verdict, bytes32[] calldata proof)
+        external returns (bool);
     function transfer(address payable _dest) external;
     function withdraw() external;
+    function refreshEnv() external;
 
 }
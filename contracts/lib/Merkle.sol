@@ -0,0 +1,67 @@
+pragma solidity >=0.5.2 <0.6.0;
+
+
+/* Merkle
+ * @title Merkle roots and inclusion proofs
+ * @dev Pairs are hashed in sorted order, so proofs don't need to say which side a node is on.
+ *      The last node of a level with an odd number of nodes is carried up as is.
+ */
+library Merkle {
+
+    /** root(bytes32[])
+     *  @dev Compute the root of a list of leaves.  The list is overwritten.
+     *  @return bytes32 The root, or zero for no leaves
+     */
+    function root(bytes32[] memory nodes) internal pure returns (bytes32)
+    {
+        if (nodes.length == 0)
+        {
+            return bytes32(0);
+        }
+
+        uint count = nodes.length;
+        while (count > 1)
+        {
+            uint next = 0;
+            for (uint i = 0; i < count; i += 2)
+            {
+                if (i + 1 < count)
+                {
+                    nodes[next] = hashPair(nodes[i], nodes[i + 1]);
+                }
+                else
+                {
+                    nodes[next] = nodes[i];
+                }
+                next += 1;
+            }
+            count = next;
+        }
+        return nodes[0];
+    }
+
+    /** verify(bytes32[], bytes32, bytes32)
+     *  @dev Check a leaf is under a root
+     *  @return bool    If the proof leads from the leaf to the root
+     */
+    function verify(bytes32[] memory proof, bytes32 _root, bytes32 leaf)
+    internal pure returns (bool)
+    {
+        bytes32 node = leaf;
+        for (uint i = 0; i < proof.length; i++)
+        {
+            node = hashPair(node, proof[i]);
+        }
+        return node == _root;
+    }
+
+    function hashPair(bytes32 a, bytes32 b) private pure returns (bytes32)
+    {
+        if (a < b)
+        {
+            return keccak256(abi.encodePacked(a, b));
+        }
+        return keccak256(abi.encodePacked(b, a));
+    }
+
+}
@@ -29,42 +29,49 @@ library Rewards {
         return true;
     }
 
-    function payValidators(address _store, int bidId, mapping(address => uint) storage sheet)
+    function settleValidators(address _store, int bidId)
     internal returns (uint)
     {
         IBidStore store = IBidStore(_store);
         uint validationPool = store.getValidationPool(bidId);
-        uint validatorCount = store.getValidationCount(bidId);
+        // A bid has either stored validations or relayed attestations, never both
+        uint validatorCount = store.getValidationCount(bidId) + store.getAttestationCount(bidId);
 
-        uint totalPaid = 0;
-        //assert(validatorCount > 0);
         require(validatorCount > 0, "no validations");
         uint split = validationPool.div(validatorCount);
 
-        for (uint i = 0; i < validatorCount; i++)
-        {
-            address payable validator = store.getValidator(bidId, i);
-            require(store.setValidatorPaid(bidId, i), "set paid failed");
-            sheet[validator] += split;
-            totalPaid += split;
-        }
+        // Validators claim their own share later with claimValidator()
+        require(store.setValidatorShare(bidId, split, validatorCount), "set share failed");
+
+        uint totalAllotted = split.mul(validatorCount);
+        require(totalAllotted <= validationPool, "invalid payouts");
 
-        require(totalPaid <= validationPool, "invalid payouts");
+        return totalAllotted;
+    }
 
-        return totalPaid;
+    function claimValidator(
+        address _store,
+        int bidId,
+        address _validator,
+        mapping(address => uint) storage sheet
+    )
+    internal returns (uint)
+    {
+        IBidStore store = IBidStore(_store);
+        uint share = store.claimValidatorShare(bidId, _validator);
+        sheet[_validator] += share;
+        return share;
     }
 
     function payHoster(address _store, int bidId, mapping(address => uint) storage sheet)
-    internal returns (bool)
+    internal returns (address hoster, uint bidAmount)
     {
         IBidStore store = IBidStore(_store);
-        uint bidAmount = store.getBidAmount(bidId);
-        address hoster = store.getHoster(bidId);
+        bidAmount = store.getBidAmount(bidId);
+        hoster = store.getHoster(bidId);
 
         require(store.setHosterPaid(bidId), "set paid failed");
         sheet[hoster] += bidAmount;
-
-        return true;
     }
 
 }
@@ -0,0 +1,21 @@
+pragma solidity >=0.5.2 <0.6.0;
+
+
+/* Signatures
+ * @title Recovering the signers of hashes signed off-chain
+ */
+library Signatures {
+
+    /** recover(bytes32, uint8, bytes32, bytes32)
+     *  @dev Recover the account that signed a hash as an Ethereum signed message (eth_sign)
+     *  @return address The signer
+     */
+    function recover(bytes32 hash, uint8 v, bytes32 r, bytes32 s) internal pure returns (address)
+    {
+        bytes32 prefixed = keccak256(abi.encodePacked("\x19Ethereum Signed Message:\n32", hash));
+        address signer = ecrecover(prefixed, v, r, s);
+        require(signer != address(0), "bad signature");
+        return signer;
+    }
+
+}
@@ -2,27 +2,97 @@ pragma solidity >0.4.0 <0.6.0;
 
 library Structures {
     
+    // Packed into a single storage slot
     struct Validation {
-        int bidId;
-        uint when;
         address payable validator;
+        uint64 when;
         bool isValid;
         bool paid;
     }
 
+    // Validator reward split recorded when a bid is paid out, packed into one slot
+    struct Payout {
+        uint128 validatorShare;
+        uint64 validatorCount;
+    }
+
+    // Env values cached by Scatter, packed into two slots
+    struct EnvCache {
+        uint64 version;
+        uint64 acceptHoldDuration;
+        uint64 minDuration;
+        uint64 defaultMinValidations;
+        uint minBid;
+    }
+
+    // Members are ordered so they pack into 5 storage slots
     struct Bid {
+        // slot 0
         address payable bidder;
-        bytes32 fileHash;
-        int64 fileSize;
-        uint bidAmount;
-        uint validationPool;
-        uint duration;
-        uint accepted;
+        uint64 duration;
+        int16 minValidations;  // Also, kind of, minimum majority (e.g. win by X)
         bool paid;
+        // slot 1
+        bytes32 fileHash;
+        // slot 2
         address payable hoster;
-        uint pinned;
-        int16 minValidations;  // Also, kind of, minimum majority (e.g. win by X)
+        uint64 accepted;
+        // slot 3
+        uint128 bidAmount;
+        uint128 validationPool;
+        // slot 4
+        int64 fileSize;
+        uint64 pinned;
+        uint64 validCount;
+        uint64 invalidCount;
         //Validation[] validations;
     }
 
+    // A hoster's stake on a bid, packed into 2 storage slots
+    struct Stake {
+        // slot 0
+        uint128 value;
+        uint64 since;
+        uint64 openChallenge;  // ID of the challenge the stake is in, 0 if none
+        // slot 1
+        bytes32 uniqueHash;
+    }
+
+    // The two staked hosters of a bid and its challenge schedule, packed into 2 storage slots
+    struct BidStakes {
+        // slot 0
+        address hosterA;
+        uint64 lastChallenge;
+        uint8 challengeCount;
+        // slot 1
+        address hosterB;
+    }
+
+    // A hoster's challenge losses in the current loss period, packed into 1 storage slot
+    struct Losses {
+        uint64 period;  // block.timestamp / the period length when count was last updated
+        uint64 count;
+        bool banned;
+    }
+
+    // Members are ordered so they pack into 6 storage slots
+    struct Challenge {
+        // slot 0
+        address challenger;
+        uint64 opened;
+        uint8 state;
+        // slot 1
+        address defendant;
+        int64 bidId;
+        // slot 2
+        bytes32 seed;
+        // slot 3
+        bytes32 challengerHash;
+        // slot 4
+        bytes32 defendantHash;
+        // slot 5
+        address mediator;
+        bool defendantValid;
+    }
+
 }
\ No newline at end of file
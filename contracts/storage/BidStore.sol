@@ -14,12 +14,25 @@ import "../interface/IRouter.sol";
 contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that ref
 
     bytes32 private constant SCATTER_HASH = keccak256("Scatter");
+    int private constant OPEN_HEAD = -1;
+    uint private constant MAX_UINT64 = 2**64 - 1;
+    uint private constant MAX_UINT128 = 2**128 - 1;
 
     int public bidCount;
     mapping(int => Structures.Bid) private bids;
     mapping(int => Structures.Validation[]) private validations;
+    mapping(int => mapping(address => uint)) private validatorIndexes;  // index + 1
+    mapping(int => Structures.Payout) private payouts;
+    // Merkle root of the off-chain attestations relayed for a bid, and a bitmap of claimed leaves
+    mapping(int => bytes32) private attestationRoots;
+    mapping(int => mapping(uint => uint)) private attestationClaims;
     address public scatterAddress;
 
+    // Doubly linked list of bids that have not yet been pinned, anchored at OPEN_HEAD
+    int public openBidCount;
+    mapping(int => int) private nextOpen;
+    mapping(int => int) private prevOpen;
+
     IRouter public router;
 
     modifier scatterOnly() {
@@ -33,6 +46,8 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
      */
     constructor(address _router) public {
         router = IRouter(_router);
+        nextOpen[OPEN_HEAD] = OPEN_HEAD;
+        prevOpen[OPEN_HEAD] = OPEN_HEAD;
         updateReferences();
     }
 
@@ -46,24 +61,55 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
     function addValidation(int bidId, address payable _validator, bool _isValid)
     external scatterOnly returns (bool)
     {
-        if (bids[bidId].bidder == address(0))
+        if (bids[bidId].bidder == address(0) || attestationRoots[bidId] != bytes32(0))
         {
             return false;
         }
 
-        Structures.Validation memory vlad = Structures.Validation(
-            bidId,      // bidId
-            now,        // when
-            _validator, // validator
-            _isValid,   // isvalid
-            false       // paid
-        );
-
-        validations[bidId].push(vlad);
+        storeValidation(bidId, _validator, _isValid);
 
         return true;
     }
 
+    /** addValidations(int[], address payable, bool[])
+     *  @dev Add validations from one validator to many pinned bids.  Bids that are not open,
+     *      were attested or were already validated by this validator are skipped and get a pin
+     *      timestamp of zero.
+     *  @param  bidIds      The IDs of the bids to add the validations to
+     *  @param  _validator  The address of the validator
+     *  @param  verdicts    Whether or not each pin was marked valid
+     *  @return uint[]      The pin timestamps of the bids, zero for skipped bids
+     *  @return uint[]      The pin durations of the bids
+     */
+    function addValidations(int[] memory bidIds, address payable _validator, bool[] memory verdicts)
+    public scatterOnly returns (uint[] memory, uint[] memory)
+    {
+        require(bidIds.length == verdicts.length, "length mismatch");
+
+        uint[] memory pinnedTimes = new uint[](bidIds.length);
+        uint[] memory durations = new uint[](bidIds.length);
+
+        for (uint i = 0; i < bidIds.length; i++)
+        {
+            int bidId = bidIds[i];
+
+            if (bids[bidId].pinned == 0
+                || bids[bidId].paid
+                || attestationRoots[bidId] != bytes32(0)
+                || validatorIndexes[bidId][_validator] != 0)
+            {
+                continue;
+            }
+
+            storeValidation(bidId, _validator, verdicts[i]);
+
+            pinnedTimes[i] = bids[bidId].pinned;
+            durations[i] = bids[bidId].duration;
+        }
+
+        return (pinnedTimes, durations);
+    }
+
     /** setValidatorPaid(int, uint)
      *  @dev Set the Validation as paid
      *  @param  bidId   The ID of the bid to add the validation to
@@ -81,6 +127,104 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
         return true;
     }
 
+    /** setValidatorShare(int, uint, uint)
+     *  @dev Record the validator reward split for a bid.  Only the first validatorCount
+     *      Validations are eligible to claim a share.
+     *  @param  bidId           The ID of the bid
+     *  @param  share           The amount each eligible validator may claim
+     *  @param  validatorCount  The total validations eligible for a share
+     *  @return bool Success?
+     */
+    function setValidatorShare(int bidId, uint share, uint validatorCount)
+    external scatterOnly returns (bool)
+    {
+        if (
+            bids[bidId].bidder == address(0)
+            || payouts[bidId].validatorCount > 0
+            || validatorCount == 0
+            || validatorCount > validations[bidId].length + attestationCount(bidId)
+        )
+        {
+            return false;
+        }
+
+        require(share <= MAX_UINT128 && validatorCount <= MAX_UINT64, "overflow");
+
+        payouts[bidId] = Structures.Payout(uint128(share), uint64(validatorCount));
+        return true;
+    }
+
+    /** claimValidatorShare(int, address)
+     *  @dev Mark a validator's share of the validation pool as paid
+     *  @param  bidId       The ID of the bid
+     *  @param  _validator  The address of the validator claiming
+     *  @return uint        The amount to credit the validator, 0 if nothing is owed
+     */
+    function claimValidatorShare(int bidId, address _validator)
+    external scatterOnly returns (uint)
+    {
+        uint idx = validatorIndexes[bidId][_validator];
+        if (idx == 0 || idx > payouts[bidId].validatorCount)
+        {
+            return 0;
+        }
+
+        Structures.Validation storage vlad = validations[bidId][idx - 1];
+        if (vlad.paid)
+        {
+            return 0;
+        }
+
+        vlad.paid = true;
+        return payouts[bidId].validatorShare;
+    }
+
+    /** addAttestations(int, bytes32, uint, uint)
+     *  @dev Record the Merkle root and tally of the attestations relayed for a pinned bid.  A bid
+     *      takes attestations once, and only if it has no stored validations.
+     *  @param  bidId           The ID of the bid
+     *  @param  root            The Merkle root of the attestations
+     *  @param  validCount      The attestations that marked the pin valid
+     *  @param  invalidCount    The attestations that marked the pin invalid
+     *  @return uint            The pin timestamp of the bid
+     *  @return uint            The pin duration of the bid
+     */
+    function addAttestations(int bidId, bytes32 root, uint validCount, uint invalidCount)
+    external scatterOnly returns (uint, uint)
+    {
+        Structures.Bid storage b = bids[bidId];
+        require(b.pinned > 0 && !b.paid, "not open");
+        require(root != bytes32(0), "zero root");
+        require(attestationRoots[bidId] == bytes32(0) && validations[bidId].length == 0,
+                "already validated");
+        require(validCount + invalidCount <= MAX_UINT64, "overflow");
+
+        attestationRoots[bidId] = root;
+        b.validCount = uint64(validCount);
+        b.invalidCount = uint64(invalidCount);
+
+        return (b.pinned, b.duration);
+    }
+
+    /** claimAttestationShare(int, uint)
+     *  @dev Mark an attestation's share of the validation pool as paid.  The caller proves the
+     *      attestation is under the bid's root.
+     *  @param  bidId   The ID of the bid
+     *  @param  index   The index of the attestation under the root
+     *  @return uint    The amount to credit the validator, 0 if nothing is owed
+     */
+    function claimAttestationShare(int bidId, uint index)
+    external scatterOnly returns (uint)
+    {
+        if (index >= payouts[bidId].validatorCount || isAttestationClaimed(bidId, index))
+        {
+            return 0;
+        }
+
+        attestationClaims[bidId][index / 256] |= uint(1) << (index % 256);
+        return payouts[bidId].validatorShare;
+    }
+
     /** setHoster(int, address payable)
      *  @dev Set the hoster for a bid
      *  @param  bidId   The ID of the bid to add the validation to
@@ -127,8 +271,15 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
             return false;
         }
 
-        bids[bidId].accepted = now;
+        bids[bidId].accepted = uint64(now);
         bids[bidId].hoster = hoster;
+
+        // Reserved bids go to the back of the queue so getJob() finds unreserved bids first
+        if (bids[bidId].pinned == 0)
+        {
+            moveOpenToBack(bidId);
+        }
+
         return true;
     }
 
@@ -145,7 +296,12 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
             return false;
         }
 
-        bids[bidId].pinned = now;
+        if (bids[bidId].pinned == 0)
+        {
+            unlinkOpen(bidId);
+        }
+
+        bids[bidId].pinned = uint64(now);
 
         if (bids[bidId].hoster != hoster)
         {
@@ -173,19 +329,72 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
 
         int bidId = bidCount;
 
-        bids[bidId].bidder = _sender;
-        bids[bidId].fileHash = fileHash;
-        bids[bidId].fileSize = fileSize;
-        bids[bidId].bidAmount = bidValue;
-        bids[bidId].validationPool = validationPool;
-        bids[bidId].duration = durationSeconds;
-        bids[bidId].minValidations = minValidations;
+        storeBid(bidId, _sender, fileHash, fileSize, bidValue, validationPool, minValidations,
+                 durationSeconds);
+
+        appendOpen(bidId);
 
         bidCount += 1;
 
         return bidId;
     }
 
+    /** addBids(address payable, bytes32[], int64[], uint[], uint[], int16, uint[])
+     *  @dev Add many bids from one bidder to the Store.  Bid IDs are sequential, starting with
+     *      the returned ID.
+     *  @param  _sender         The bidder
+     *  @param  fileHashes      The IPFS file hashes
+     *  @param  fileSizes       The sizes of the files in bytes
+     *  @param  bidValues       The values of the bids to be paid to the hoster
+     *  @param  validationPools The funds to be split by validators for each bid
+     *  @param  minValidations  Minimum validations for every bid
+     *  @param  durations       The requested durations of the pins
+     *  @return int             The ID for the first bid created
+     */
+    function addBids(
+        address payable _sender,
+        bytes32[] memory fileHashes,
+        int64[] memory fileSizes,
+        uint[] memory bidValues,
+        uint[] memory validationPools,
+        int16 minValidations,
+        uint[] memory durations
+    )
+    public scatterOnly returns (int)
+    {
+        require(
+            fileHashes.length == fileSizes.length
+            && fileHashes.length == bidValues.length
+            && fileHashes.length == validationPools.length
+            && fileHashes.length == durations.length,
+            "length mismatch"
+        );
+
+        int firstBidId = bidCount;
+        int last = prevOpen[OPEN_HEAD];
+
+        for (uint i = 0; i < fileHashes.length; i++)
+        {
+            int bidId = firstBidId + int(i);
+
+            storeBid(bidId, _sender, fileHashes[i], fileSizes[i], bidValues[i],
+                     validationPools[i], minValidations, durations[i]);
+
+            // Link the whole batch into the open queue, closing it off once after the loop
+            nextOpen[last] = bidId;
+            prevOpen[bidId] = last;
+            last = bidId;
+        }
+
+        nextOpen[last] = OPEN_HEAD;
+        prevOpen[OPEN_HEAD] = last;
+
+        openBidCount += int(fileHashes.length);
+        bidCount += int(fileHashes.length);
+
+        return firstBidId;
+    }
+
     /** getBidCount()
      *  @dev Return the total bids stored in this contract.
      *  @return int     The total bids stored in the contract
@@ -195,6 +404,35 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
         return bidCount;
     }
 
+    /** getFirstOpenBid()
+     *  @dev Get the oldest bid that has not been pinned.  Bids that have been accepted are moved
+     *      to the back of the queue.
+     *  @return int     The bid ID or -1 if there are no open bids
+     */
+    function getFirstOpenBid() external view returns (int)
+    {
+        return nextOpen[OPEN_HEAD];
+    }
+
+    /** getNextOpenBid(int)
+     *  @dev Get the open bid that follows another in the queue
+     *  @param bidId    The ID of the bid in question
+     *  @return int     The next bid ID or -1 if this is the end of the queue
+     */
+    function getNextOpenBid(int bidId) external view returns (int)
+    {
+        return nextOpen[bidId];
+    }
+
+    /** getOpenBidCount()
+     *  @dev Return the total of bids that have not been pinned
+     *  @return int     The total open bids
+     */
+    function getOpenBidCount() external view returns (int)
+    {
+        return openBidCount;
+    }
+
     /** isPinned(int)
      *  @dev Is a bid pinned?
      *  @param bidId  The ID of the bid in question
@@ -315,6 +553,64 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
         return validations[bidId].length;
     }
 
+    /** getValidationTally(int)
+     *  @dev Get the running totals of validations for a pin
+     *  @param bidId    The ID of the bid in question
+     *  @return uint    The total validations that marked the pin valid
+     *  @return uint    The total validations that marked the pin invalid
+     *  @return int16   The amount of validations needed for a bid to be satisfied
+     */
+    function getValidationTally(int bidId) external view returns (uint, uint, int16)
+    {
+        return (
+            bids[bidId].validCount,
+            bids[bidId].invalidCount,
+            bids[bidId].minValidations
+        );
+    }
+
+    /** getAttestationRoot(int)
+     *  @dev Get the Merkle root of the attestations relayed for a bid
+     *  @param bidId    The ID of the bid in question
+     *  @return bytes32 The root, zero if the bid has no attestations
+     */
+    function getAttestationRoot(int bidId) external view returns (bytes32)
+    {
+        return attestationRoots[bidId];
+    }
+
+    /** getAttestationCount(int)
+     *  @dev Get the amount of attestations relayed for a bid
+     *  @param bidId    The ID of the bid in question
+     *  @return uint    The amount of attestations
+     */
+    function getAttestationCount(int bidId) external view returns (uint)
+    {
+        return attestationCount(bidId);
+    }
+
+    /** isAttestationClaimed(int, uint)
+     *  @dev Has the share for an attestation been claimed?
+     *  @param bidId    The ID of the bid in question
+     *  @param index    The index of the attestation under the root
+     *  @return bool    If it was claimed
+     */
+    function isAttestationClaimed(int bidId, uint index) public view returns (bool)
+    {
+        return attestationClaims[bidId][index / 256] & (uint(1) << (index % 256)) != 0;
+    }
+
+    /** getValidatorShare(int)
+     *  @dev Get the validator reward split recorded for a bid
+     *  @param bidId    The ID of the bid in question
+     *  @return uint    The amount each eligible validator may claim
+     *  @return uint    The total validations eligible for a share
+     */
+    function getValidatorShare(int bidId) external view returns (uint, uint)
+    {
+        return (payouts[bidId].validatorShare, payouts[bidId].validatorCount);
+    }
+
     /** getValidatorIndex(int, address payable)
      *  @dev Get the Validation index of a specific validator account
      *  @param bidId        The ID of the bid in question
@@ -323,20 +619,19 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
      */
     function getValidatorIndex(int bidId, address payable _validator) external view returns (uint)
     {
-        if (bids[bidId].bidder == address(0))
-        {
-            return uint(-1);
-        }
-
-        for (uint i = 0; i < validations[bidId].length; i++)
-        {
-            if (validations[bidId][i].validator == _validator)
-            {
-                return i;
-            }
-        }
+        // uint(-1) if the validator is unknown
+        return validatorIndexes[bidId][_validator] - 1;
+    }
 
-        return uint(-1);
+    /** hasValidated(int, address)
+     *  @dev Has an address already added a Validation to a bid?
+     *  @param bidId        The ID of the bid in question
+     *  @param _validator   The address of the validator to look for.
+     *  @return bool        If the address has validated the bid
+     */
+    function hasValidated(int bidId, address _validator) external view returns (bool)
+    {
+        return validatorIndexes[bidId][_validator] > 0;
     }
     
     /** getValidator(int, uint)
@@ -431,6 +726,232 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
         );
     }
 
+    /** getBidState(int)
+     *  @dev Get the lifecycle state of a Bid in one call
+     *  @param bidId    The ID of the bid in question
+     *  @return address Address of the bidder
+     *  @return address Address of the hoster
+     *  @return bytes32 IPFS File hash
+     *  @return int64   File size in bytes
+     *  @return uint    The timestamp of the accept
+     *  @return uint    The timestamp of the pin
+     *  @return uint    The duration in seconds for the pin
+     *  @return bool    Has the hoster been paid?
+     */
+    function getBidState(int bidId) external view returns (
+        address,
+        address,
+        bytes32,
+        int64,
+        uint,
+        uint,
+        uint,
+        bool
+    )
+    {
+        Structures.Bid storage b = bids[bidId];
+        return(
+            b.bidder,
+            b.hoster,
+            b.fileHash,
+            b.fileSize,
+            b.accepted,
+            b.pinned,
+            b.duration,
+            b.paid
+        );
+    }
+
+    /** getBids(int, uint)
+     *  @dev Get the primary attributes of a range of Bids
+     *  @param offset           The ID of the first bid to return
+     *  @param limit            The maximum amount of bids to return
+     *  @return address[]       Addresses of the bidders
+     *  @return bytes32[]       IPFS File hashes
+     *  @return int64[]         File sizes in bytes
+     *  @return uint[]          The amounts of the bids in wei
+     *  @return uint[]          The amounts to be split by validators in wei
+     *  @return uint[]          The durations in seconds for the pins
+     *  @return int16[]         The minimum validations
+     */
+    function getBids(int offset, uint limit) external view returns (
+        address[] memory bidders,
+        bytes32[] memory fileHashes,
+        int64[] memory fileSizes,
+        uint[] memory bidAmounts,
+        uint[] memory validationPools,
+        uint[] memory durations,
+        int16[] memory minValidations
+    )
+    {
+        uint count = pageSize(offset, limit);
+
+        bidders = new address[](count);
+        fileHashes = new bytes32[](count);
+        fileSizes = new int64[](count);
+        bidAmounts = new uint[](count);
+        validationPools = new uint[](count);
+        durations = new uint[](count);
+        minValidations = new int16[](count);
+
+        for (uint i = 0; i < count; i++)
+        {
+            Structures.Bid storage b = bids[offset + int(i)];
+            bidders[i] = b.bidder;
+            fileHashes[i] = b.fileHash;
+            fileSizes[i] = b.fileSize;
+            bidAmounts[i] = b.bidAmount;
+            validationPools[i] = b.validationPool;
+            durations[i] = b.duration;
+            minValidations[i] = b.minValidations;
+        }
+    }
+
+    /** getBidStates(int, uint)
+     *  @dev Get the lifecycle state of a range of Bids
+     *  @param offset           The ID of the first bid to return
+     *  @param limit            The maximum amount of bids to return
+     *  @return address[]       Addresses of the hosters
+     *  @return uint[]          The timestamps of the accepts
+     *  @return uint[]          The timestamps of the pins
+     *  @return bool[]          Have the hosters been paid?
+     *  @return uint[]          The total validations that marked the pins valid
+     *  @return uint[]          The total validations that marked the pins invalid
+     */
+    function getBidStates(int offset, uint limit) external view returns (
+        address[] memory hosters,
+        uint[] memory accepted,
+        uint[] memory pinned,
+        bool[] memory paid,
+        uint[] memory validCounts,
+        uint[] memory invalidCounts
+    )
+    {
+        uint count = pageSize(offset, limit);
+
+        hosters = new address[](count);
+        accepted = new uint[](count);
+        pinned = new uint[](count);
+        paid = new bool[](count);
+        validCounts = new uint[](count);
+        invalidCounts = new uint[](count);
+
+        for (uint i = 0; i < count; i++)
+        {
+            Structures.Bid storage b = bids[offset + int(i)];
+            hosters[i] = b.hoster;
+            accepted[i] = b.accepted;
+            pinned[i] = b.pinned;
+            paid[i] = b.paid;
+            validCounts[i] = b.validCount;
+            invalidCounts[i] = b.invalidCount;
+        }
+    }
+
+    /** getOpenBids(int, uint)
+     *  @dev Walk the open bid queue a page at a time
+     *  @param cursor       The bid ID to continue after, or -1 to start at the front of the queue
+     *  @param limit        The maximum amount of bids to return, at least 1
+     *  @return int[]       The bid IDs
+     *  @return address[]   Addresses of the bidders
+     *  @return bytes32[]   IPFS File hashes
+     *  @return int64[]     File sizes in bytes
+     *  @return uint[]      The timestamps of the accepts
+     *  @return int         The cursor for the next page, or -1 if this is the last page
+     */
+    function getOpenBids(int cursor, uint limit) external view returns (
+        int[] memory bidIds,
+        address[] memory bidders,
+        bytes32[] memory fileHashes,
+        int64[] memory fileSizes,
+        uint[] memory accepted,
+        int next
+    )
+    {
+        // An empty page would have no last bid to continue after
+        require(limit > 0, "zero limit");
+        // A cursor that has since been pinned is no longer linked into the queue
+        require(
+            cursor == OPEN_HEAD
+            || (bids[cursor].bidder != address(0) && bids[cursor].pinned == 0),
+            "stale cursor"
+        );
+
+        uint size = limit;
+        if (uint(openBidCount) < size)
+        {
+            size = uint(openBidCount);
+        }
+
+        bidIds = new int[](size);
+        bidders = new address[](size);
+        fileHashes = new bytes32[](size);
+        fileSizes = new int64[](size);
+        accepted = new uint[](size);
+
+        uint found = 0;
+        int bidId = nextOpen[cursor];
+        next = OPEN_HEAD;
+
+        while (found < size && bidId != OPEN_HEAD)
+        {
+            bidIds[found] = bidId;
+            bidders[found] = bids[bidId].bidder;
+            fileHashes[found] = bids[bidId].fileHash;
+            fileSizes[found] = bids[bidId].fileSize;
+            accepted[found] = bids[bidId].accepted;
+            found += 1;
+            bidId = nextOpen[bidId];
+        }
+
+        if (bidId != OPEN_HEAD)
+        {
+            next = bidIds[found - 1];
+        }
+    }
+
+    /** getValidations(int, uint, uint)
+     *  @dev Return the key attributes for a range of a bid's Validations
+     *  @param bidId        The ID of the bid in question
+     *  @param offset       The index of the first Validation to return
+     *  @param limit        The maximum amount of Validations to return
+     *  @return uint[]      The timestamps of the validations
+     *  @return address[]   The addresses of the validators
+     *  @return bool[]      Did the validators validate?
+     *  @return bool[]      Have the validators been paid?
+     */
+    function getValidations(int bidId, uint offset, uint limit) external view returns (
+        uint[] memory whens,
+        address[] memory validators,
+        bool[] memory isValids,
+        bool[] memory paids
+    )
+    {
+        uint count = 0;
+        if (offset < validations[bidId].length)
+        {
+            count = validations[bidId].length - offset;
+            if (count > limit)
+            {
+                count = limit;
+            }
+        }
+
+        whens = new uint[](count);
+        validators = new address[](count);
+        isValids = new bool[](count);
+        paids = new bool[](count);
+
+        for (uint i = 0; i < count; i++)
+        {
+            Structures.Validation storage vlad = validations[bidId][offset + i];
+            whens[i] = vlad.when;
+            validators[i] = vlad.validator;
+            isValids[i] = vlad.isValid;
+            paids[i] = vlad.paid;
+        }
+    }
+
     /** setScatter(address)
      *  @dev Set the address for the Scatter contract
      *  @param _newAddress The new address for the Scatter contract
@@ -466,4 +987,160 @@ contract BidStore is Owned {  // Also is IBidStore, but solc doesn't like that r
         return updated;
     }
 
+    /** pageSize(int, uint)
+     *  @dev Get the amount of bids in a page starting at offset
+     *  @param offset   The ID of the first bid in the page
+     *  @param limit    The maximum size of the page
+     *  @return uint    The amount of bids in the page
+     */
+    function pageSize(int offset, uint limit) internal view returns (uint)
+    {
+        if (offset < 0 || offset >= bidCount)
+        {
+            return 0;
+        }
+
+        uint count = uint(bidCount - offset);
+        if (count > limit)
+        {
+            return limit;
+        }
+        return count;
+    }
+
+    /** storeBid(int, address payable, bytes32, int64, uint, uint, int16, uint)
+     *  @dev Write a new bid to storage
+     *  @param  bidId           The ID for the new bid
+     *  @param  _sender         The bidder
+     *  @param  fileHash        The IPFS file hash
+     *  @param  fileSize        The size of the file in bytes
+     *  @param  bidValue        The value of the bid to be paid to the hoster
+     *  @param  validationPool  The funds to be split by validators
+     *  @param  minValidations  Minimum validations for the bid
+     *  @param  durationSeconds The requested duration of the pin
+     */
+    function storeBid(int bidId, address payable _sender, bytes32 fileHash, int64 fileSize,
+                      uint bidValue, uint validationPool, int16 minValidations,
+                      uint durationSeconds)
+    internal
+    {
+        // Never clobber an existing bid or the open queue will be corrupted
+        require(bids[bidId].bidder == address(0), "bid exists");
+
+        // Values are stored packed and must not be truncated
+        require(
+            bidValue <= MAX_UINT128
+            && validationPool <= MAX_UINT128
+            && durationSeconds <= MAX_UINT64,
+            "overflow"
+        );
+
+        bids[bidId].bidder = _sender;
+        bids[bidId].duration = uint64(durationSeconds);
+        bids[bidId].minValidations = minValidations;
+        bids[bidId].fileHash = fileHash;
+        bids[bidId].bidAmount = uint128(bidValue);
+        bids[bidId].validationPool = uint128(validationPool);
+        bids[bidId].fileSize = fileSize;
+    }
+
+    /** attestationCount(int)
+     *  @dev Attestations only go to bids without stored validations, so the tally counts them
+     *  @param bidId    The ID of the bid in question
+     *  @return uint    The amount of attestations
+     */
+    function attestationCount(int bidId) internal view returns (uint)
+    {
+        if (attestationRoots[bidId] == bytes32(0))
+        {
+            return 0;
+        }
+        return uint(bids[bidId].validCount) + uint(bids[bidId].invalidCount);
+    }
+
+    /** storeValidation(int, address payable, bool)
+     *  @dev Write a new Validation to storage and update the bid's validation tally
+     *  @param  bidId       The ID of the bid to add the validation to
+     *  @param  _validator  The address of the validator
+     *  @param  _isValid    Whether or not the pin was marked valid
+     */
+    function storeValidation(int bidId, address payable _validator, bool _isValid) internal
+    {
+        Structures.Validation memory vlad = Structures.Validation(
+            _validator,     // validator
+            uint64(now),    // when
+            _isValid,       // isvalid
+            false           // paid
+        );
+
+        uint length = validations[bidId].push(vlad);
+
+        // Only the first validation from an address is indexed
+        if (validatorIndexes[bidId][_validator] == 0)
+        {
+            validatorIndexes[bidId][_validator] = length;
+        }
+
+        if (_isValid)
+        {
+            bids[bidId].validCount += 1;
+        }
+        else
+        {
+            bids[bidId].invalidCount += 1;
+        }
+    }
+
+    /** appendOpen(int)
+     *  @dev Add a bid to the end of the open bid queue
+     *  @param bidId    The ID of the bid to add
+     */
+    function appendOpen(int bidId) internal
+    {
+        int last = prevOpen[OPEN_HEAD];
+        nextOpen[last] = bidId;
+        prevOpen[bidId] = last;
+        nextOpen[bidId] = OPEN_HEAD;
+        prevOpen[OPEN_HEAD] = bidId;
+        openBidCount += 1;
+    }
+
+    /** moveOpenToBack(int)
+     *  @dev Move a bid already in the open bid queue to the end of it
+     *  @param bidId    The ID of the bid to move
+     */
+    function moveOpenToBack(int bidId) internal
+    {
+        int last = prevOpen[OPEN_HEAD];
+        if (last == bidId)
+        {
+            return;
+        }
+
+        int prev = prevOpen[bidId];
+        int next = nextOpen[bidId];
+        nextOpen[prev] = next;
+        prevOpen[next] = prev;
+
+        nextOpen[last] = bidId;
+        prevOpen[bidId] = last;
+        nextOpen[bidId] = OPEN_HEAD;
+        prevOpen[OPEN_HEAD] = bidId;
+    }
+
+    /** unlinkOpen(int)
+     *  @dev Remove a bid from the open bid queue
+     *  @param bidId    The ID of the bid to remove
+     */
+    function unlinkOpen(int bidId) internal
+    {
+        int prev = prevOpen[bidId];
+        int next = nextOpen[bidId];
+        nextOpen[prev] = next;
+        prevOpen[next] = prev;
+        delete nextOpen[bidId];
+        delete prevOpen[bidId];
+        openBidCount -= 1;
+    }
+
 }
\ No newline at end of file
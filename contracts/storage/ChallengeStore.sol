@@ -0,0 +1,361 @@
+pragma solidity ^0.5.2;
+
+import "../lib/Owned.sol";
+import "../lib/Structures.sol";
+import "../interface/IRouter.sol";
+
+
+/* ChallengeStore
+ * @title Storage for hoster stakes and chunk challenges
+ * @dev This contract is only intended to be used by the Challenge contract.  Every record is a
+ *      fixed size and is reached by key, so no call loops over hosters or challenges.
+ * @author Mike Shultz <mike@mikeshultz.com>
+ */
+contract ChallengeStore is Owned {  /// interface: IChallengeStore
+
+    bytes32 private constant CHALLENGE_HASH = keccak256("Challenge");
+    uint8 private constant STATE_OPEN = 1;
+    uint8 private constant STATE_MEDIATED = 2;
+    uint8 private constant STATE_SETTLED = 3;
+    int private constant MAX_INT64 = 2**63 - 1;
+    uint private constant MAX_UINT128 = 2**128 - 1;
+    uint private constant LOSS_PERIOD = 30 days;
+
+    // Challenge IDs start at 1 so 0 can mean "no challenge"
+    uint public challengeCount;
+    mapping(uint => Structures.Challenge) private challenges;
+    mapping(int => Structures.BidStakes) private bidStakes;
+    mapping(int => mapping(address => Structures.Stake)) private stakes;
+    mapping(address => Structures.Losses) private losses;
+    address public challengeAddress;
+
+    IRouter public router;
+
+    modifier challengeOnly() {
+        require(msg.sender == challengeAddress, "not allowed");
+        _;
+    }
+
+    /** constructor(address)
+     *  @dev initialize the contract
+     *  @param  _router    The address of the Router contract
+     */
+    constructor(address _router) public {
+        router = IRouter(_router);
+        updateReferences();
+    }
+
+    /** addStake(int, address, uint)
+     *  @dev Take one of the two hoster spots on a bid
+     *  @param  bidId   The ID of the bid
+     *  @param  hoster  The staking hoster
+     *  @param  value   The value staked
+     *  @return bool    If there was a spot free for the hoster
+     */
+    function addStake(int bidId, address hoster, uint value)
+    external challengeOnly returns (bool)
+    {
+        require(value <= MAX_UINT128, "too large");
+
+        Structures.BidStakes storage bs = bidStakes[bidId];
+        if (bs.hosterA == hoster || bs.hosterB == hoster)
+        {
+            return false;
+        }
+
+        if (bs.hosterA == address(0))
+        {
+            bs.hosterA = hoster;
+        }
+        else if (bs.hosterB == address(0))
+        {
+            bs.hosterB = hoster;
+        }
+        else
+        {
+            return false;
+        }
+
+        Structures.Stake storage st = stakes[bidId][hoster];
+        st.value = uint128(value);
+        st.since = uint64(block.timestamp);
+        st.uniqueHash = bytes32(0);
+
+        return true;
+    }
+
+    /** removeStake(int, address)
+     *  @dev Free a hoster's spot on a bid
+     *  @param  bidId   The ID of the bid
+     *  @param  hoster  The hoster to remove
+     *  @return uint    The value that was staked
+     */
+    function removeStake(int bidId, address hoster) external challengeOnly returns (uint)
+    {
+        Structures.BidStakes storage bs = bidStakes[bidId];
+        if (bs.hosterA == hoster)
+        {
+            bs.hosterA = address(0);
+        }
+        else if (bs.hosterB == hoster)
+        {
+            bs.hosterB = address(0);
+        }
+        else
+        {
+            return 0;
+        }
+
+        uint value = stakes[bidId][hoster].value;
+        delete stakes[bidId][hoster];
+        return value;
+    }
+
+    /** setUniqueHash(int, address, bytes32)
+     *  @dev Record the uniqueHash a staked hoster submitted for a bid
+     *  @param  bidId       The ID of the bid
+     *  @param  hoster      The staked hoster
+     *  @param  uniqueHash  The hash of the hoster's chunk
+     */
+    function setUniqueHash(int bidId, address hoster, bytes32 uniqueHash) external challengeOnly
+    {
+        stakes[bidId][hoster].uniqueHash = uniqueHash;
+    }
+
+    /** addChallenge(int, address, address, bytes32)
+     *  @dev Open a challenge between the two hosters of a bid and lock both stakes
+     *  @param  bidId       The ID of the bid
+     *  @param  challenger  The hoster opening the challenge
+     *  @param  defendant   The hoster being challenged
+     *  @param  seed        The seed for the chunk both hosters have to hash
+     *  @return uint        The ID of the new challenge
+     */
+    function addChallenge(int bidId, address challenger, address defendant, bytes32 seed)
+    external challengeOnly returns (uint)
+    {
+        require(bidId >= 0 && bidId <= MAX_INT64, "invalid bid");
+
+        challengeCount += 1;
+        uint challengeId = challengeCount;
+
+        Structures.Challenge storage c = challenges[challengeId];
+        c.challenger = challenger;
+        c.opened = uint64(block.timestamp);
+        c.state = STATE_OPEN;
+        c.defendant = defendant;
+        c.bidId = int64(bidId);
+        c.seed = seed;
+
+        stakes[bidId][challenger].openChallenge = uint64(challengeId);
+        stakes[bidId][defendant].openChallenge = uint64(challengeId);
+
+        Structures.BidStakes storage bs = bidStakes[bidId];
+        bs.lastChallenge = uint64(block.timestamp);
+        bs.challengeCount += 1;
+
+        return challengeId;
+    }
+
+    /** setDefense(uint, bool, bytes32)
+     *  @dev Record the uniqueHash one side of a challenge answered with
+     *  @param  challengeId     The ID of the challenge
+     *  @param  isChallenger    If it's the challenger's answer
+     *  @param  uniqueHash      The hash of the hoster's chunk
+     */
+    function setDefense(uint challengeId, bool isChallenger, bytes32 uniqueHash)
+    external challengeOnly
+    {
+        if (isChallenger)
+        {
+            challenges[challengeId].challengerHash = uniqueHash;
+        }
+        else
+        {
+            challenges[challengeId].defendantHash = uniqueHash;
+        }
+    }
+
+    /** setMediation(uint, address, bool)
+     *  @dev Record a mediator's ruling
+     *  @param  challengeId     The ID of the challenge
+     *  @param  mediator        The mediator
+     *  @param  defendantValid  If the mediator found the defendant's uniqueHash valid
+     */
+    function setMediation(uint challengeId, address mediator, bool defendantValid)
+    external challengeOnly
+    {
+        Structures.Challenge storage c = challenges[challengeId];
+        c.state = STATE_MEDIATED;
+        c.mediator = mediator;
+        c.defendantValid = defendantValid;
+    }
+
+    /** settle(uint, address)
+     *  @dev Close a challenge, unlock the stakes and count a loss against the loser
+     *  @param  challengeId The ID of the challenge
+     *  @param  loser       The hoster who lost the challenge, or the zero address for a draw
+     *  @return uint        The loser's losses in the current loss period, 0 for a draw
+     */
+    function settle(uint challengeId, address loser) external challengeOnly returns (uint)
+    {
+        Structures.Challenge storage c = challenges[challengeId];
+        c.state = STATE_SETTLED;
+
+        int bidId = int(c.bidId);
+        stakes[bidId][c.challenger].openChallenge = 0;
+        stakes[bidId][c.defendant].openChallenge = 0;
+
+        if (loser == address(0))
+        {
+            return 0;
+        }
+
+        // Losses are counted per period, so the count starts over in a new one
+        Structures.Losses storage l = losses[loser];
+        uint64 period = uint64(block.timestamp / LOSS_PERIOD);
+        if (l.period != period)
+        {
+            l.period = period;
+            l.count = 0;
+        }
+        l.count += 1;
+
+        return l.count;
+    }
+
+    /** ban(address)
+     *  @dev Ban a hoster from the Challenge contract
+     *  @param  hoster  The hoster to ban
+     */
+    function ban(address hoster) external challengeOnly
+    {
+        losses[hoster].banned = true;
+    }
+
+    /** getStake(int, address)
+     *  @dev Get a hoster's stake on a bid
+     *  @param  bidId   The ID of the bid
+     *  @param  hoster  The hoster
+     *  @return uint    The value staked
+     *  @return uint    When the stake was made
+     *  @return uint    The ID of the challenge the stake is in, 0 if none
+     *  @return bytes32 The uniqueHash the hoster submitted
+     */
+    function getStake(int bidId, address hoster) external view returns (
+        uint,
+        uint,
+        uint,
+        bytes32
+    )
+    {
+        Structures.Stake storage st = stakes[bidId][hoster];
+        return (st.value, st.since, st.openChallenge, st.uniqueHash);
+    }
+
+    /** getLosses(address)
+     *  @dev Get a hoster's challenge losses in the current loss period
+     *  @param  hoster  The hoster
+     *  @return uint    The amount of challenges lost in the current period
+     */
+    function getLosses(address hoster) external view returns (uint)
+    {
+        Structures.Losses storage l = losses[hoster];
+        if (l.period != uint64(block.timestamp / LOSS_PERIOD))
+        {
+            return 0;
+        }
+        return l.count;
+    }
+
+    /** isBanned(address)
+     *  @dev Has a hoster been banned for losing too many challenges?
+     *  @param  hoster  The hoster
+     *  @return bool    If the hoster is banned
+     */
+    function isBanned(address hoster) external view returns (bool)
+    {
+        return losses[hoster].banned;
+    }
+
+    /** getBidStakes(int)
+     *  @dev Get the staked hosters of a bid and its challenge schedule
+     *  @param  bidId   The ID of the bid
+     *  @return address The first hoster, or the zero address if the spot is free
+     *  @return address The second hoster, or the zero address if the spot is free
+     *  @return uint    When the last challenge on the bid was opened
+     *  @return uint    The amount of challenges opened on the bid
+     */
+    function getBidStakes(int bidId) external view returns (address, address, uint, uint)
+    {
+        Structures.BidStakes storage bs = bidStakes[bidId];
+        return (bs.hosterA, bs.hosterB, bs.lastChallenge, bs.challengeCount);
+    }
+
+    /** getChallenge(uint)
+     *  @dev Get the parties and state of a challenge
+     *  @param  challengeId The ID of the challenge
+     *  @return int     The ID of the bid
+     *  @return address The challenger
+     *  @return address The defendant
+     *  @return uint    When the challenge was opened
+     *  @return uint    The state: 1 open, 2 mediated, 3 settled
+     */
+    function getChallenge(uint challengeId) external view returns (
+        int,
+        address,
+        address,
+        uint,
+        uint
+    )
+    {
+        Structures.Challenge storage c = challenges[challengeId];
+        return (int(c.bidId), c.challenger, c.defendant, c.opened, c.state);
+    }
+
+    /** getDefense(uint)
+     *  @dev Get the seed, answers and ruling of a challenge
+     *  @param  challengeId The ID of the challenge
+     *  @return bytes32 The seed
+     *  @return bytes32 The challenger's uniqueHash, zero until answered
+     *  @return bytes32 The defendant's uniqueHash, zero until answered
+     *  @return address The mediator, or the zero address if not mediated
+     *  @return bool    If the mediator found the defendant's uniqueHash valid
+     */
+    function getDefense(uint challengeId) external view returns (
+        bytes32,
+        bytes32,
+        bytes32,
+        address,
+        bool
+    )
+    {
+        Structures.Challenge storage c = challenges[challengeId];
+        return (c.seed, c.challengerHash, c.defendantHash, c.mediator, c.defendantValid);
+    }
+
+    /** setChallenge(address)
+     *  @dev Set the address for the Challenge contract
+     *  @param _newAddress The new address for the Challenge contract
+     */
+    function setChallenge(address _newAddress) public ownerOnly
+    {
+        assert(_newAddress != address(0));
+        challengeAddress = _newAddress;
+    }
+
+    /** updateReferences()
+     *  @dev Using the router, update all the addresses
+     *  @return bool If anything was updated
+     */
+    function updateReferences() public ownerOnly returns (bool)
+    {
+        bool updated = false;
+        address newChallengeAddress = router.get(CHALLENGE_HASH);
+        if (newChallengeAddress != challengeAddress)
+        {
+            challengeAddress = newChallengeAddress;
+            updated = true;
+        }
+        return updated;
+    }
+}
@@ -15,10 +15,15 @@ contract Env is Owned {
     mapping (bytes32 => uint) internal varUints;
     mapping (address => bool) internal banned;
 
+    // Bumped whenever a stored value changes so consumers know when to refresh their caches
+    uint public configVersion;
+
     bytes32 private constant ENV_ACCEPT_HOLD_DURATION = keccak256("acceptHoldDuration");
     bytes32 private constant ENV_DEFAULT_MIN_VALIDATIONS = keccak256("defaultMinValidations");
     bytes32 private constant ENV_MIN_DURATION = keccak256("minDuration");
     bytes32 private constant ENV_MIN_BID = keccak256("minBid");
+    bytes32 private constant ENV_CHALLENGE_DEFEND_DURATION = keccak256("challengeDefendDuration");
+    bytes32 private constant ENV_MAX_LOSSES = keccak256("maxLosses");
 
     /** constructor()
      *  @dev Initialize this contract
@@ -30,6 +35,9 @@ contract Env is Owned {
         varUints[ENV_DEFAULT_MIN_VALIDATIONS] = 2;
         varUints[ENV_MIN_DURATION] = 1 weeks;
         varUints[ENV_ACCEPT_HOLD_DURATION] = 15 minutes;
+        varUints[ENV_CHALLENGE_DEFEND_DURATION] = 1 days;
+        varUints[ENV_MAX_LOSSES] = 3;
+        configVersion = 1;
 
         banned[0x0000000000000000000000000000000000000000] = true;
     }
@@ -42,6 +50,7 @@ contract Env is Owned {
     function setstr(bytes32 keyHash, string memory value) public ownerOnly
     {
         varStrings[keyHash] = value;
+        configVersion += 1;
     }
 
     /** getstr(bytes32)
@@ -62,6 +71,7 @@ contract Env is Owned {
     function setuint(bytes32 keyHash, uint value) public ownerOnly
     {
         varUints[keyHash] = value;
+        configVersion += 1;
     }
 
     /** getuint(bytes32)
@@ -102,4 +112,16 @@ contract Env is Owned {
         return banned[_addr];
     }
 
+    /** banStatus(address)
+     *  @dev Is an address set as banned?  Also returns the current config version so callers
+     *      can check both with one call.
+     *  @param  _addr  The address to check
+     *  @return bool   Is the address banned?
+     *  @return uint   The current config version
+     */
+    function banStatus(address _addr) public view returns (bool, uint)
+    {
+        return (banned[_addr], configVersion);
+    }
+
 }
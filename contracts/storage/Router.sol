@@ -22,4 +22,23 @@ contract Router is Owned, IRouter {
         return records[_name];
     }
 
+    function setMany(bytes32[] calldata _names, address[] calldata _targets) external ownerOnly
+    {
+        require(_names.length == _targets.length, "length mismatch");
+        for (uint i = 0; i < _names.length; i++)
+        {
+            records[_names[i]] = _targets[i];
+        }
+    }
+
+    function getMany(bytes32[] calldata _names) external view returns (address[] memory)
+    {
+        address[] memory targets = new address[](_names.length);
+        for (uint i = 0; i < _names.length; i++)
+        {
+            targets[i] = records[_names[i]];
+        }
+        return targets;
+    }
+
 }
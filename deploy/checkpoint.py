@@ -0,0 +1,81 @@
+""" Deployment progress kept in metafile.json
+
+Solidbyte keeps deployed contract addresses in metafile.json.  Progress for every other
+deployment step goes next to them under a top level "checkpoints" key, by network ID:
+
+    "checkpoints": {
+        "1": {
+            "registerStores": {
+                "call": "<hash of the contract call>",
+                "status": "confirmed",
+                "txHash": "0x...",
+                "blockNumber": 123
+            }
+        }
+    }
+
+A checkpoint only counts for the same contract call, so a step that would now send something
+different (e.g. new addresses after a redeploy) is sent again.
+"""
+import json
+from web3 import Web3
+
+CHECKPOINTS_KEY = 'checkpoints'
+
+PENDING = 'pending'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+
+
+def call_fingerprint(contract_fn):
+    """ Hash a contract call by contract address, function and arguments """
+    call = [contract_fn.address, contract_fn.fn_name, list(contract_fn.args)]
+    return Web3.sha3(text=json.dumps(call, default=str)).hex()
+
+
+class Checkpoints(object):
+    """ Read and write step checkpoints for one network in a metafile """
+
+    def __init__(self, metafile_path, network_id):
+        self.path = metafile_path
+        self.network_id = str(network_id)
+
+    def load_metafile(self):
+        with open(self.path) as metafile:
+            return json.load(metafile)
+
+    def all(self):
+        """ Return every checkpoint for this network """
+        return self.load_metafile().get(CHECKPOINTS_KEY, {}).get(self.network_id, {})
+
+    def get(self, step_name, fingerprint=None):
+        """ Return the checkpoint for a step, if it was for the same call """
+        checkpoint = self.all().get(step_name)
+        if checkpoint is None:
+            return None
+        if fingerprint is not None and checkpoint.get('call') != fingerprint:
+            return None
+        return checkpoint
+
+    def record(self, step_name, status, **fields):
+        """ Save the state of a step
+
+        The metafile is read and written each time since Solidbyte writes to it between steps.
+        """
+        meta = self.load_metafile()
+        network = meta.setdefault(CHECKPOINTS_KEY, {}).setdefault(self.network_id, {})
+
+        checkpoint = {'status': status}
+        checkpoint.update(fields)
+        network[step_name] = checkpoint
+
+        with open(self.path, 'w') as metafile:
+            json.dump(meta, metafile, indent=2)
+        return checkpoint
+
+    def clear(self):
+        """ Forget all checkpoints for this network """
+        meta = self.load_metafile()
+        meta.get(CHECKPOINTS_KEY, {}).pop(self.network_id, None)
+        with open(self.path, 'w') as metafile:
+            json.dump(meta, metafile, indent=2)
@@ -0,0 +1,128 @@
+""" CREATE2 addresses that can be computed offline
+
+Contracts deployed through Create2Factory land at
+
+    keccak256(0xff ++ factory ++ salt ++ keccak256(init_code))[12:]
+
+init_code is the linked bytecode with the ABI encoded constructor arguments appended.  Given the
+factory address for a network and the compiled contracts, a client can find Env, BidStore,
+Scatter, UserStore and Register without asking the Router.
+"""
+import os
+import re
+from eth_abi import encode_abi
+from web3 import Web3
+
+CREATE2_PREFIX = b'\xff'
+
+# Salts are namespaced so other deployments through the same factory can't collide with ours
+SALT_NAMESPACE = 'scatter'
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'contracts')
+
+# solc >= 0.5 uses __$<34 hex chars of keccak256(fully qualified name)>$__, earlier versions
+# __<fully qualified name, truncated and padded with _>__.  Both are 40 chars.
+PLACEHOLDER_RE = re.compile(r'__\$[0-9a-fA-F]{34}\$__|__[^_$][^$]{34}[^$]__')
+
+
+def to_bytes(value):
+    """ Bytes from bytes or a hex string """
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return Web3.toBytes(hexstr=value)
+
+
+def salt_for(name, version=None):
+    """ The salt for a contract name, and optionally a version so it can be redeployed to a new
+    address
+    """
+    text = '{}:{}'.format(SALT_NAMESPACE, name)
+    if version is not None:
+        text = '{}:{}'.format(text, version)
+    return Web3.sha3(text=text)
+
+
+def compute_address(factory, salt, init_code):
+    """ The address init_code deployed with salt by the factory at address factory will have """
+    return compute_address_from_hash(factory, salt, Web3.sha3(to_bytes(init_code)))
+
+
+def compute_address_from_hash(factory, salt, init_code_hash):
+    """ Same as compute_address but with keccak256(init_code) already known """
+    digest = Web3.sha3(
+        CREATE2_PREFIX
+        + to_bytes(factory)
+        + to_bytes(salt)
+        + to_bytes(init_code_hash)
+    )
+    return Web3.toChecksumAddress(Web3.toHex(digest[12:]))
+
+
+def library_names(name):
+    """ Fully qualified names a library in contracts/ could have been compiled under """
+    if ':' in name:
+        return [name]
+
+    names = []
+    for root, _, files in os.walk(CONTRACTS_DIR):
+        source = '{}.sol'.format(name)
+        if source not in files:
+            continue
+        path = os.path.abspath(os.path.join(root, source))
+        relative = os.path.relpath(path, os.path.abspath(CONTRACTS_DIR))
+        for source_name in (path, relative, os.path.join('contracts', relative), source):
+            names.append('{}:{}'.format(source_name, name))
+    names.append(name)
+    return names
+
+
+def placeholders(name):
+    """ Every placeholder solc could have put in bytecode for a library """
+    found = []
+    for qualified in library_names(name):
+        found.append('__${}$__'.format(Web3.sha3(text=qualified).hex()[2:36]))
+        found.append('__{}__'.format(qualified[:36].ljust(36, '_')))
+    return found
+
+
+def link_bytecode(bytecode, links):
+    """ Replace library placeholders in hex bytecode with addresses
+
+    links maps library names (or fully qualified names, e.g. lib/SafeMath.sol:SafeMath) to
+    addresses.
+    """
+    linked = bytecode[2:] if bytecode.startswith('0x') else bytecode
+    for name, address in links.items():
+        for placeholder in placeholders(name):
+            linked = linked.replace(placeholder, address[2:].lower())
+
+    unlinked = PLACEHOLDER_RE.findall(linked)
+    if unlinked:
+        raise ValueError("Bytecode has unlinked libraries: {}".format(
+            ', '.join(sorted(set(unlinked)))
+        ))
+    return '0x' + linked
+
+
+def init_code(abi, bytecode, args=None, links=None):
+    """ Linked bytecode with the constructor arguments appended """
+    code = to_bytes(link_bytecode(bytecode, links or {}))
+    args = list(args or [])
+
+    constructor = [item for item in abi if item.get('type') == 'constructor']
+    inputs = constructor[0].get('inputs', []) if constructor else []
+    assert len(inputs) == len(args), "Constructor takes {} arguments, got {}".format(
+        len(inputs),
+        len(args),
+    )
+    if inputs:
+        code += encode_abi([item['type'] for item in inputs], args)
+    return code
+
+
+def contract_addresses(factory, codes, version=None):
+    """ Compute addresses for a dict of contract name to init code """
+    return {
+        name: compute_address(factory, salt_for(name, version), code)
+        for name, code in codes.items()
+    }
@@ -1,3 +1,39 @@
+import os
+
+try:
+    from .checkpoint import Checkpoints
+    from .create2 import compute_address, init_code, salt_for
+    from .fees import (
+        DEFAULT_SPEED,
+        BlockGasPriceOracle,
+        Fees,
+        StaticGasPrice,
+        find_deploy_receipt,
+    )
+    from .pipeline import Pipeline
+except ImportError:  # Loaded as a plain script rather than from the deploy package
+    from checkpoint import Checkpoints
+    from create2 import compute_address, init_code, salt_for
+    from fees import (
+        DEFAULT_SPEED,
+        BlockGasPriceOracle,
+        Fees,
+        StaticGasPrice,
+        find_deploy_receipt,
+    )
+    from pipeline import Pipeline
+
+METAFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'metafile.json')
+
+# How fast deploy transactions should confirm: slow, standard or fast
+DEPLOY_SPEED_ENV = 'SCATTER_DEPLOY_SPEED'
+
+# Set to deploy through Create2Factory so addresses can be computed offline (see create2.py)
+CREATE2_ENV = 'SCATTER_CREATE2'
+
+# Test chains have no fee market to sample
+TEST_GAS_PRICE = int(3e9)
+
 
 def main(assertions, web3, contracts, deployer_account, network):
     assert contracts is not None
@@ -5,7 +41,11 @@ def main(assertions, web3, contracts, deployer_account, network):
     assert web3 is not None
     assert network is not None
 
-    GAS_PRICE = int(3e9)
+    if network in ('dev', 'test'):
+        oracle = StaticGasPrice(TEST_GAS_PRICE)
+    else:
+        oracle = BlockGasPriceOracle(web3)
+    fees = Fees(oracle, os.environ.get(DEPLOY_SPEED_ENV, DEFAULT_SPEED))
 
     deployer_balance = web3.eth.getBalance(deployer_account)
 
@@ -17,7 +57,7 @@ def main(assertions, web3, contracts, deployer_account, network):
                 'from': web3.eth.accounts[0],  # The pre-funded account in ganace-cli
                 'to': deployer_account,
                 'value': fund_value,
-                'gasPrice': GAS_PRICE,
+                'gasPrice': fees.gas_price(),
                 })
             receipt = web3.eth.waitForTransactionReceipt(tx)
             assert receipt.status == 1, "Funding deployer_account failed"
@@ -32,14 +72,125 @@ def main(assertions, web3, contracts, deployer_account, network):
     print("deployer_balance: {} Ether".format(deployer_balance / 1e18))
     print("contracts: ", contracts)
 
+    checkpoints = Checkpoints(METAFILE, web3.net.version)
+    pipeline = Pipeline(web3, deployer_account, fees, checkpoints)
+    use_create2 = bool(os.environ.get(CREATE2_ENV))
+
+    def deploy_contract(name, args=None, links=None):
+        """ Deploy a contract with Solidbyte if it changed, with an estimated gas limit, and add
+        the deploy to the fee report
+        """
+        Contract = contracts.get(name)
+        assert Contract is not None, "Unable to get {} contract".format(name)
+
+        args = list(args or [])
+        links = links or {}
+        code = init_code(Contract.source_abi, Contract.source_bytecode, args, links)
+        gas_price = fees.gas_price()
+        kwargs = {
+            'gas': fees.estimate_deploy_gas(web3, deployer_account, code),
+            'gas_price': gas_price,
+        }
+        if links:
+            kwargs['links'] = links
+
+        from_block = web3.eth.blockNumber + 1
+        deployed = Contract.deployed(*args, **kwargs)
+        assert deployed.address is not None, "Deploy of {} failed.  No address found".format(name)
+
+        if Contract.new_deployment:
+            receipt = find_deploy_receipt(web3, deployer_account, deployed.address, from_block)
+            assert receipt is not None, "No deploy receipt for {}".format(name)
+            fees.record('deploy{}'.format(name), receipt, gas_price)
+
+        return deployed
+
+    def create2_step(name, args=None, links=None, owned=True, deps=None):
+        """ Deploy a contract through Create2Factory
+
+        The factory call is a tx step so it can share a wave with the others.  The deploy step
+        after it only builds the contract object at the computed address.
+        """
+        tx_step = 'create2{}'.format(name)
+        links = links or []
+
+        def build(results):
+            Contract = contracts.get(name)
+            assert Contract is not None, "Unable to get {} contract".format(name)
+            code = init_code(
+                Contract.source_abi,
+                Contract.source_bytecode,
+                [results[arg].address for arg in args or []],
+                {lib: results[lib].address for lib in links},
+            )
+            address = compute_address(results['Create2Factory'].address, salt_for(name), code)
+            return Contract, code, address
+
+        def send(results):
+            _, code, address = build(results)
+            if len(web3.eth.getCode(address)) > 0:
+                return None
+            factory = results['Create2Factory'].functions
+            deploy_fn = factory.deployOwned if owned else factory.deploy
+            return (deploy_fn(code, salt_for(name)), {})
+
+        def at(results):
+            Contract, _, address = build(results)
+            assert len(web3.eth.getCode(address)) > 0, "No code for {} at {}".format(
+                name,
+                address,
+            )
+            print("{} at {}".format(name, address))
+            return web3.eth.contract(address=address, abi=Contract.source_abi)
+
+        pipeline.transact(tx_step, send, ['Create2Factory'] + list(args or []) + links
+                          + list(deps or []))
+        pipeline.deploy(name, at, [tx_step])
+
+    def deploy_step(name, action, args=None, links=None, owned=True, deps=None):
+        """ Add a contract deploy, through Create2Factory if SCATTER_CREATE2 is set """
+        if use_create2:
+            create2_step(name, args, links, owned, deps)
+        else:
+            pipeline.deploy(name, action, list(args or []) + list(links or []) + list(deps or []))
+
+    if use_create2:
+        def deploy_factory(results):
+            return deploy_contract('Create2Factory')
+
+        pipeline.deploy('Create2Factory', deploy_factory)
+
+    def register_step(step_name, names):
+        """ Set the Router records that differ from what was deployed in one transaction """
+        def action(results):
+            router = results['Router']
+            keys = [web3.sha3(text=name) for name in names]
+            current = router.functions.getMany(keys).call()
+
+            changed = [
+                (name, key) for name, key, address in zip(names, keys, current)
+                if address != results[name].address
+            ]
+            if not changed:
+                return None
+
+            print("Router records to update: {}".format(', '.join(n for n, _ in changed)))
+            return (
+                router.functions.setMany(
+                    [key for _, key in changed],
+                    [results[name].address for name, _ in changed],
+                ),
+                {},
+            )
+        pipeline.transact(step_name, action, ['Router'] + names)
+
     ##
     # Router
     ##
-    Router = contracts.get('Router')
-    assert Router is not None
+    def deploy_router(results):
+        return deploy_contract('Router')
 
-    router = Router.deployed()
-    assert router.address is not None, "No address on Router contract object"
+    deploy_step('Router', deploy_router)
 
     ##
     # Structures Library
@@ -53,136 +204,136 @@ def main(assertions, web3, contracts, deployer_account, network):
     ##
     # SafeMath Library
     ##
-    SafeMath = contracts.get('SafeMath')
-    assert SafeMath is not None, "Unable to get SafeMath contract"
+    def deploy_safemath(results):
+        return deploy_contract('SafeMath')
 
-    safeMath = SafeMath.deployed()
-    assert safeMath.address is not None, "SafeMath was not deployed or is unknown"
+    deploy_step('SafeMath', deploy_safemath, owned=False)
 
     ##
     # Env state contract
     ##
-    Env = contracts.get('Env')
-    assert Env is not None, "Unable to get Env contract"
-    env = Env.deployed()
-    assert env.address is not None, "Deploy of Env failed.  No address found"
-    if Env.new_deployment is True:
-        router.functions.set(web3.sha3(text='Env'), env.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    def deploy_env(results):
+        return deploy_contract('Env')
+
+    deploy_step('Env', deploy_env)
 
     ##
     # Rewards Library
     ##
-    Rewards = contracts.get('Rewards')
-    assert Rewards is not None, "Unable to get Rewards contract"
+    def deploy_rewards(results):
+        return deploy_contract('Rewards', links={'SafeMath': results['SafeMath'].address})
 
-    rewards = Rewards.deployed(links={
-            'SafeMath': safeMath.address,
-        })
-    assert rewards.address is not None, "Deploy of Rewards failed.  No address found"
-    if Rewards.new_deployment is True:
-        router.functions.set(web3.sha3(text='Rewards'), rewards.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    deploy_step('Rewards', deploy_rewards, links=['SafeMath'], owned=False)
 
     ##
     # BidStore - Primary storage contract
     ##
-    BidStore = contracts.get('BidStore')
-    assert BidStore is not None, "Unable to get BidStore contract"
+    def deploy_bidstore(results):
+        return deploy_contract('BidStore', [results['Router'].address])
 
-    store = BidStore.deployed(router.address, gas=int(6e6))
-    assert store.address is not None, "Deploy of BidStore failed.  No address found"
-    if BidStore.new_deployment is True:
-        router.functions.set(web3.sha3(text='BidStore'), store.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    deploy_step('BidStore', deploy_bidstore, ['Router'])
 
     ##
     # Scatter - Primary contract
     ##
-    Scatter = contracts.get('Scatter')
-    assert Scatter is not None, "Unable to get Scatter contract"
-
-    sb = Scatter.deployed(router.address, links={
-        'SafeMath': safeMath.address,
-        'Rewards': rewards.address
-        })
-    assert sb.address is not None, "Deploy of Scatter failed.  No address found"
-    if Scatter.new_deployment is True:
-        router.functions.set(web3.sha3(text='Scatter'), sb.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
-        store.functions.updateReferences().transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
+    def deploy_scatter(results):
+        return deploy_contract('Scatter', [results['Router'].address], {
+            'SafeMath': results['SafeMath'].address,
+            'Rewards': results['Rewards'].address,
         })
 
-    # updateReferences in Scatter only if BidStore is a new deployment and Scatter is not
-    if BidStore.new_deployment is True and not Scatter.new_deployment:
-        sb.functions.updateReferences().transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    # The constructor reads Env and BidStore from the Router
+    deploy_step('Scatter', deploy_scatter, ['Router'], ['SafeMath', 'Rewards'],
+                deps=['registerStores'])
 
-    store_sb_address = store.functions.scatterAddress().call()
-    if store_sb_address != sb.address:
-        set_hash = store.functions.setScatter(sb.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-            })
-        set_receipt = web3.eth.waitForTransactionReceipt(set_hash)
-        assert set_receipt.status == 1
+    # updateReferences in Scatter if it doesn't point at the deployed Env and BidStore
+    def scatter_references(results):
+        sb = results['Scatter']
+        if sb.functions.env().call() != results['Env'].address \
+                or sb.functions.bidStore().call() != results['BidStore'].address:
+            return (sb.functions.updateReferences(), {})
+        return None
+
+    pipeline.transact('updateScatterReferences', scatter_references, [
+        'Scatter',
+        'Env',
+        'BidStore',
+    ])
+
+    # Point BidStore straight at Scatter rather than waiting on the Router record
+    def store_scatter(results):
+        store = results['BidStore']
+        sb = results['Scatter']
+        if store.functions.scatterAddress().call() == sb.address:
+            return None
+        return (store.functions.setScatter(sb.address), {})
+
+    pipeline.transact('setBidStoreScatter', store_scatter, ['BidStore', 'Scatter'])
 
     ##
-    # UserStore - UserStore storage for user registrations
+    # ChallengeStore - Storage for hoster stakes and chunk challenges
     ##
-    UserStore = contracts.get('UserStore')
-    assert UserStore is not None, "Unable to get UserStore contract"
+    def deploy_challengestore(results):
+        return deploy_contract('ChallengeStore', [results['Router'].address])
 
-    userStore = UserStore.deployed()
-    assert userStore.address is not None, "Deploy of UserStore failed.  No address found"
+    deploy_step('ChallengeStore', deploy_challengestore, ['Router'])
 
-    if UserStore.new_deployment is True:
-        router.functions.set(web3.sha3(text='UserStore'), userStore.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    ##
+    # Challenge - Stakes and chunk challenges between hosters
+    ##
+    def deploy_challenge(results):
+        return deploy_contract('Challenge', [results['Router'].address])
+
+    # The constructor reads Env, BidStore and ChallengeStore from the Router
+    deploy_step('Challenge', deploy_challenge, ['Router'], deps=['registerStores'])
+
+    def challenge_store_challenge(results):
+        store = results['ChallengeStore']
+        challenge = results['Challenge']
+        if store.functions.challengeAddress().call() == challenge.address:
+            return None
+        return (store.functions.setChallenge(challenge.address), {})
+
+    pipeline.transact('setChallengeStoreChallenge', challenge_store_challenge, [
+        'ChallengeStore',
+        'Challenge',
+    ])
+
+    ##
+    # UserStore - UserStore storage for user registrations
+    ##
+    def deploy_userstore(results):
+        return deploy_contract('UserStore')
+
+    deploy_step('UserStore', deploy_userstore)
 
     ##
     # Register - Contrat handling user registrations
     ##
-    Register = contracts.get('Register')
-    assert Register is not None, "Unable to get Register contract"
+    def deploy_register(results):
+        return deploy_contract('Register', [results['Router'].address])
 
-    register = Register.deployed(router.address)
-    assert register.address is not None, "Deploy of Register failed.  No address found"
+    # The constructor reads Env and UserStore from the Router
+    deploy_step('Register', deploy_register, ['Router'], deps=['registerStores'])
 
-    if Register.new_deployment is True:
-        router.functions.set(web3.sha3(text='Register'), register.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-        })
+    def user_store_writer(results):
+        userStore = results['UserStore']
+        register = results['Register']
+        if userStore.functions.writer().call() == register.address:
+            return None
+        return (userStore.functions.setWriter(register.address), {})
+
+    pipeline.transact('setUserStoreWriter', user_store_writer, ['UserStore', 'Register'])
+
+    ##
+    # Router records.  Scatter, Register and Challenge read the others from the Router in their
+    # constructors, so they are registered in a second transaction.
+    ##
+    register_step('registerStores', ['Env', 'Rewards', 'BidStore', 'UserStore', 'ChallengeStore'])
+    register_step('registerApps', ['Scatter', 'Register', 'Challenge'])
 
-    if Register.new_deployment is True or UserStore.new_deployment is True:
-        userStore.functions.setWriter(register.address).transact({
-            'from': deployer_account,
-            'gas': int(1e5),
-            'gasPrice': GAS_PRICE,
-            })
+    pipeline.run()
+    print("Deployment transactions sent in {} waves".format(len(pipeline.waves)))
+    print(fees.report())
 
     return True
@@ -0,0 +1,136 @@
+""" Gas limits and gas prices for deploy transactions
+
+Gas limits come from estimateGas plus a safety margin.  Gas prices come from an oracle:
+
+- BlockGasPriceOracle takes a percentile of the gas prices paid in recent blocks.  The
+  percentile depends on how fast the transaction should confirm.
+- StaticGasPrice always gives the same price.  It is the local stand-in for test chains,
+  which have no fee market to sample.
+
+Fees records what every transaction actually cost, contract deployments included, so a
+deployment can report its total.
+"""
+from web3 import Web3
+
+SPEEDS = {
+    'slow': 30,
+    'standard': 60,
+    'fast': 90,
+}
+DEFAULT_SPEED = 'standard'
+DEFAULT_GAS_MARGIN = 1.2
+DEFAULT_ORACLE_BLOCKS = 20
+
+
+def percentile(values, pct):
+    """ Return the value at a percentile, using the nearest rank """
+    assert len(values) > 0, "No values"
+    ordered = sorted(values)
+    index = int(round((len(ordered) - 1) * pct / 100.0))
+    return ordered[index]
+
+
+class StaticGasPrice(object):
+    """ Gas price oracle that always gives the same price """
+
+    def __init__(self, price):
+        self.price = price
+
+    def gas_price(self, speed=DEFAULT_SPEED):
+        assert speed in SPEEDS, "Unknown speed {}".format(speed)
+        return self.price
+
+
+class BlockGasPriceOracle(object):
+    """ Gas price oracle based on the prices paid in recent blocks """
+
+    def __init__(self, web3, blocks=DEFAULT_ORACLE_BLOCKS):
+        self.web3 = web3
+        self.blocks = blocks
+
+    def recent_prices(self):
+        latest = self.web3.eth.blockNumber
+        prices = []
+        for number in range(max(0, latest - self.blocks + 1), latest + 1):
+            block = self.web3.eth.getBlock(number, True)
+            prices.extend(tx['gasPrice'] for tx in block.transactions)
+        return prices
+
+    def gas_price(self, speed=DEFAULT_SPEED):
+        assert speed in SPEEDS, "Unknown speed {}".format(speed)
+        prices = self.recent_prices()
+        if not prices:
+            # Nothing to sample, so go with the node's suggestion
+            return self.web3.eth.gasPrice
+        return percentile(prices, SPEEDS[speed])
+
+
+def find_deploy_receipt(web3, account, address, from_block):
+    """ Return the receipt of the transaction from account that created the contract at address,
+    looking from from_block to the latest block, or None if it isn't there
+    """
+    for number in range(from_block, web3.eth.blockNumber + 1):
+        block = web3.eth.getBlock(number, True)
+        for tx in block.transactions:
+            # Only contract creations from account
+            if tx['to'] or tx['from'].lower() != account.lower():
+                continue
+            receipt = web3.eth.getTransactionReceipt(tx['hash'])
+            if receipt.contractAddress and receipt.contractAddress.lower() == address.lower():
+                return receipt
+    return None
+
+
+class Fees(object):
+    """ Picks gas limits and prices and keeps track of what was spent """
+
+    def __init__(self, oracle, speed=DEFAULT_SPEED, margin=DEFAULT_GAS_MARGIN):
+        assert speed in SPEEDS, "Unknown speed {}".format(speed)
+        self.oracle = oracle
+        self.speed = speed
+        self.margin = margin
+        self.spent = []
+
+    def gas_price(self):
+        return self.oracle.gas_price(self.speed)
+
+    def estimate_gas(self, contract_fn, tx):
+        """ Estimate the gas for a transaction with the safety margin added """
+        return int(contract_fn.estimateGas(tx) * self.margin)
+
+    def estimate_deploy_gas(self, web3, account, code):
+        """ Estimate the gas for deploying init code with the safety margin added """
+        return int(web3.eth.estimateGas({
+            'from': account,
+            'data': Web3.toHex(code),
+        }) * self.margin)
+
+    def record(self, name, receipt, gas_price):
+        """ Record the cost of a mined transaction """
+        self.spent.append({
+            'name': name,
+            'gasUsed': receipt.gasUsed,
+            'gasPrice': gas_price,
+            'cost': receipt.gasUsed * gas_price,
+        })
+
+    def total_cost(self):
+        return sum(item['cost'] for item in self.spent)
+
+    def report(self):
+        """ Format what was spent as a plain text table """
+        rows = [['transaction', 'gasUsed', 'gasPrice (gwei)', 'cost (ether)']]
+        for item in self.spent:
+            rows.append([
+                item['name'],
+                str(item['gasUsed']),
+                '{:.2f}'.format(item['gasPrice'] / 1e9),
+                '{:.6f}'.format(item['cost'] / 1e18),
+            ])
+        rows.append(['total', '', '', '{:.6f}'.format(self.total_cost() / 1e18)])
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ['  '.join(col.ljust(widths[i]) for i, col in enumerate(row)).rstrip()
+                 for row in rows]
+        lines.insert(0, 'Fees at {} speed'.format(self.speed))
+        return '\n'.join(lines)
@@ -0,0 +1,186 @@
+""" Dependency ordered deployment steps
+
+Steps form a graph.  Each pass of Pipeline.run() takes every step whose dependencies are done:
+
+- deploy steps run one after another.  These are Solidbyte deployments, which wait on their
+  own receipts.
+- tx steps are sent back to back from one account with explicit nonces, then all of their
+  receipts are waited on together.
+
+A full deployment then takes one block per level of the graph instead of one per transaction.
+Gas limits and prices for the transactions come from a fees.Fees.
+
+With checkpoints (see checkpoint.py) a rerun skips tx steps that were confirmed and waits on
+transactions that were sent but not confirmed instead of sending them again.
+"""
+from collections import OrderedDict
+try:
+    from .checkpoint import CONFIRMED, FAILED, PENDING, call_fingerprint
+except ImportError:  # Loaded as a plain script rather than from the deploy package
+    from checkpoint import CONFIRMED, FAILED, PENDING, call_fingerprint
+
+DEPLOY = 'deploy'
+TX = 'tx'
+
+
+class Step(object):
+    """ A node in the deployment graph """
+
+    def __init__(self, name, kind, action, deps):
+        self.name = name
+        self.kind = kind
+        self.action = action
+        self.deps = deps
+
+
+class Pipeline(object):
+    """ Run deployment steps in dependency order, batching transactions into waves """
+
+    def __init__(self, web3, account, fees, checkpoints=None, timeout=300):
+        self.web3 = web3
+        self.account = account
+        self.fees = fees
+        self.checkpoints = checkpoints
+        self.timeout = timeout
+        self.steps = OrderedDict()
+        self.results = {}
+        self.waves = []
+
+    def add_step(self, name, kind, action, deps):
+        assert name not in self.steps, "Duplicate step {}".format(name)
+        self.steps[name] = Step(name, kind, action, list(deps or []))
+
+    def deploy(self, name, action, deps=None):
+        """ Add a step that deploys a contract
+
+        action(results) deploys and returns the contract.  It is stored in results[name].
+        """
+        self.add_step(name, DEPLOY, action, deps)
+
+    def transact(self, name, action, deps=None):
+        """ Add a step that sends a transaction
+
+        action(results) returns (contract function, tx dict) to send, or None if there is
+        nothing to do.  Gas is estimated unless the tx dict sets it.  The receipt is stored in
+        results[name].
+        """
+        self.add_step(name, TX, action, deps)
+
+    def ready(self, done, kind):
+        return [
+            step for step in self.steps.values()
+            if step.name not in done
+            and step.kind == kind
+            and all(dep in done for dep in step.deps)
+        ]
+
+    def run(self):
+        """ Run every step and return the results """
+        for step in self.steps.values():
+            for dep in step.deps:
+                assert dep in self.steps, "{} depends on unknown step {}".format(step.name, dep)
+
+        done = set()
+        while len(done) < len(self.steps):
+            # Deploys first so transactions that only need the new addresses make this wave
+            deployed = False
+            deploys = self.ready(done, DEPLOY)
+            while deploys:
+                for step in deploys:
+                    contract = step.action(self.results)
+                    self.results[step.name] = contract
+                    if self.checkpoints is not None:
+                        self.checkpoints.record(step.name, CONFIRMED, address=contract.address)
+                    done.add(step.name)
+                deployed = True
+                deploys = self.ready(done, DEPLOY)
+
+            txs = self.ready(done, TX)
+            if not deployed and not txs:
+                raise ValueError("Dependency cycle between steps: {}".format(
+                    ', '.join(name for name in self.steps if name not in done)
+                ))
+
+            self.send_wave(txs)
+            done.update(step.name for step in txs)
+
+        return self.results
+
+    def resume(self, step_name, fingerprint):
+        """ Return the hash of a transaction sent for this call by an earlier run, if it still
+        needs to be waited on.  Returns False if the call was already confirmed.
+        """
+        if self.checkpoints is None:
+            return None
+
+        checkpoint = self.checkpoints.get(step_name, fingerprint)
+        if checkpoint is None:
+            return None
+        if checkpoint['status'] == CONFIRMED:
+            return False
+        if checkpoint['status'] == PENDING \
+                and self.web3.eth.getTransaction(checkpoint['txHash']) is not None:
+            return checkpoint['txHash']
+
+        # Failed or dropped, so send it again
+        return None
+
+    def send_wave(self, steps):
+        """ Send a list of tx steps back to back and wait on all of the receipts """
+        nonce = self.web3.eth.getTransactionCount(self.account, 'pending')
+        gas_price = self.fees.gas_price()
+        sent = []
+
+        for step in steps:
+            built = step.action(self.results)
+            if built is None:
+                self.results[step.name] = None
+                continue
+
+            contract_fn, tx = built
+            fingerprint = call_fingerprint(contract_fn)
+
+            txhash = self.resume(step.name, fingerprint)
+            if txhash is False:
+                print("Skipping {}, already confirmed".format(step.name))
+                self.results[step.name] = None
+                continue
+            elif txhash is not None:
+                print("Waiting on {} from an earlier run".format(step.name))
+                sent.append((step.name, fingerprint, txhash))
+                continue
+
+            params = {'from': self.account}
+            params.update(tx)
+            if 'gas' not in params:
+                params['gas'] = self.fees.estimate_gas(contract_fn, params)
+            params['gasPrice'] = gas_price
+            params['nonce'] = nonce
+            txhash = contract_fn.transact(params)
+            nonce += 1
+
+            if self.checkpoints is not None:
+                self.checkpoints.record(step.name, PENDING, call=fingerprint, txHash=txhash.hex())
+            sent.append((step.name, fingerprint, txhash))
+
+        if not sent:
+            return
+
+        print("Waiting on receipts for {}".format(', '.join(name for name, _, _ in sent)))
+        self.waves.append([name for name, _, _ in sent])
+
+        for name, fingerprint, txhash in sent:
+            receipt = self.web3.eth.waitForTransactionReceipt(txhash, timeout=self.timeout)
+
+            if self.checkpoints is not None:
+                self.checkpoints.record(
+                    name,
+                    CONFIRMED if receipt.status == 1 else FAILED,
+                    call=fingerprint,
+                    txHash=receipt.transactionHash.hex(),
+                    blockNumber=receipt.blockNumber,
+                )
+
+            assert receipt.status == 1, "{} failed. Receipt: {}".format(name, receipt)
+            self.fees.record(name, receipt, self.web3.eth.getTransaction(txhash)['gasPrice'])
+            self.results[name] = receipt
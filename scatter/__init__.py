@@ -0,0 +1,9 @@
+""" Client for the Scatter contracts """
+from .client import (  # noqa: F401
+    Batch,
+    Bid,
+    Job,
+    ScatterClient,
+    Validation,
+)
+from .rpc import HTTPRPC, RPCError  # noqa: F401
@@ -0,0 +1,120 @@
+""" Encoding calls, and decoding results and logs for contract functions and events
+
+Only what eth_call and eth_getLogs need: the 4 byte selector, ABI encoded arguments, decoded
+outputs and decoded log arguments.  Values are returned the way web3 returns them, with
+checksummed addresses and bytes for fixed size byte types.
+"""
+from eth_abi import decode_abi, decode_single, encode_abi
+from web3 import Web3
+
+
+def to_python(abi_type, value):
+    """ Normalize a decoded value to what web3 would return """
+    if abi_type.endswith('[]'):
+        return [to_python(abi_type[:-2], item) for item in value]
+    if abi_type == 'address':
+        return Web3.toChecksumAddress(value)
+    return value
+
+
+class Function(object):
+    """ One function from a contract ABI """
+
+    def __init__(self, abi):
+        self.name = abi['name']
+        self.input_types = [item['type'] for item in abi.get('inputs', [])]
+        self.output_types = [item['type'] for item in abi.get('outputs', [])]
+        self.signature = '{}({})'.format(self.name, ','.join(self.input_types))
+        self.selector = Web3.sha3(text=self.signature)[:4]
+
+    def encode(self, args):
+        """ Return the hex call data for a call with args """
+        assert len(args) == len(self.input_types), "{} takes {} arguments, got {}".format(
+            self.signature,
+            len(self.input_types),
+            len(args),
+        )
+        return Web3.toHex(self.selector + encode_abi(self.input_types, args))
+
+    def decode(self, data):
+        """ Decode the hex return data of a call.  A single output is returned bare. """
+        values = decode_abi(self.output_types, Web3.toBytes(hexstr=data))
+        values = [to_python(abi_type, value) for abi_type, value in zip(self.output_types, values)]
+        if len(values) == 1:
+            return values[0]
+        return values
+
+
+class ContractABI(object):
+    """ The functions of a contract, looked up by name and argument count """
+
+    def __init__(self, abi):
+        self.functions = {}
+        for item in abi:
+            if item.get('type') == 'function':
+                fn = Function(item)
+                self.functions[(fn.name, len(fn.input_types))] = fn
+
+    def function(self, name, arg_count):
+        fn = self.functions.get((name, arg_count))
+        if fn is None:
+            raise ValueError("No function {} taking {} arguments".format(name, arg_count))
+        return fn
+
+
+class Event(object):
+    """ One event from a contract ABI """
+
+    def __init__(self, abi):
+        self.name = abi['name']
+        self.inputs = abi.get('inputs', [])
+        self.signature = '{}({})'.format(
+            self.name,
+            ','.join(item['type'] for item in self.inputs),
+        )
+        self.topic = Web3.sha3(text=self.signature)
+        self.indexed = [item for item in self.inputs if item.get('indexed')]
+        self.data = [item for item in self.inputs if not item.get('indexed')]
+
+    def decode(self, topics, data):
+        """ Decode a log's topics (without topic 0) and data into a dict of arguments """
+        args = {}
+        for item, topic in zip(self.indexed, topics):
+            args[item['name']] = to_python(item['type'], decode_single(item['type'], topic))
+
+        values = decode_abi([item['type'] for item in self.data], to_bytes(data))
+        for item, value in zip(self.data, values):
+            args[item['name']] = to_python(item['type'], value)
+        return args
+
+
+class EventDecoder(object):
+    """ Decodes logs by looking up the event ABI by topic 0 """
+
+    def __init__(self, abi, names=None):
+        self.events = {}
+        for item in abi:
+            if item.get('type') == 'event' and (names is None or item['name'] in names):
+                event = Event(item)
+                self.events[bytes(event.topic)] = event
+
+    @property
+    def topics(self):
+        return [Web3.toHex(topic) for topic in self.events]
+
+    def decode(self, log):
+        """ Return (event name, args) for a log, or None for an event not in the cache """
+        if not log['topics']:
+            return None
+        topics = [to_bytes(topic) for topic in log['topics']]
+        event = self.events.get(topics[0])
+        if event is None:
+            return None
+        return event.name, event.decode(topics[1:], log['data'])
+
+
+def to_bytes(value):
+    """ Log fields come back as HexBytes from web3 and hex strings from JSON-RPC """
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return Web3.toBytes(hexstr=value)
@@ -0,0 +1,105 @@
+""" Off-chain validator attestations (see Scatter.attest())
+
+A validator signs attestationHash(bidId, verdict) as an Ethereum signed message:
+
+    attestationHash = keccak256(scatterAddress ++ int256(bidId) ++ verdict)
+
+A relayer submits the signatures of many validators in one attest() call, ordered by validator
+address.  The contract stores only the tally and a Merkle root over the leaves
+
+    leaf = keccak256(uint256(index) ++ validatorAddress ++ verdict)
+
+where index is the attestation's position in the call.  Pairs are hashed in sorted order and the
+last node of an odd level is carried up as is, like contracts/lib/Merkle.sol.  Validators claim
+their share with claimAttestation() and the proof from merkle_proof().
+"""
+from collections import namedtuple
+from web3 import Web3
+from .abi import to_bytes
+from .prover import sign_hash
+
+Attestation = namedtuple('Attestation', ['validator', 'verdict', 'signature'])
+
+
+def attestation_hash(scatter_address, bid_id, verdict):
+    """ The hash a validator signs for a verdict on a bid """
+    return Web3.soliditySha3(
+        ['address', 'int256', 'bool'],
+        [scatter_address, bid_id, verdict],
+    )
+
+
+def sign_attestation(scatter_address, bid_id, verdict, private_key):
+    """ Return the signature of a validator's verdict on a bid """
+    return sign_hash(attestation_hash(scatter_address, bid_id, verdict), private_key)
+
+
+def leaf(index, validator, verdict):
+    """ The Merkle leaf of the attestation at index """
+    return Web3.soliditySha3(['uint256', 'address', 'bool'], [index, validator, verdict])
+
+
+def hash_pair(a, b):
+    return Web3.sha3(primitive=min(a, b) + max(a, b))
+
+
+def merkle_levels(leaves):
+    """ Return every level of the tree, leaves first and the root last """
+    levels = [[bytes(node) for node in leaves]]
+    while len(levels[-1]) > 1:
+        nodes = levels[-1]
+        levels.append([
+            hash_pair(nodes[i], nodes[i + 1]) if i + 1 < len(nodes) else nodes[i]
+            for i in range(0, len(nodes), 2)
+        ])
+    return levels
+
+
+def merkle_root(leaves):
+    """ The root of a list of leaves, or 32 zero bytes for none """
+    if not leaves:
+        return b'\x00' * 32
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_proof(leaves, index):
+    """ The sibling hashes that lead from leaves[index] to the root """
+    proof = []
+    for nodes in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(nodes):
+            proof.append(nodes[sibling])
+        index //= 2
+    return proof
+
+
+def split_signature(signature):
+    """ (v, r, s) of a 65 byte signature """
+    signature = to_bytes(signature)
+    return signature[64], signature[:32], signature[32:64]
+
+
+def order(attestations):
+    """ Sort attestations by validator address, the order attest() takes them in """
+    return sorted(attestations, key=lambda att: int(att.validator, 16))
+
+
+def attest_args(bid_id, attestations):
+    """ Return the arguments for attest() from attestations in the order attest() takes them """
+    verdicts, vs, rs, ss = [], [], [], []
+    for att in attestations:
+        v, r, s = split_signature(att.signature)
+        verdicts.append(att.verdict)
+        vs.append(v)
+        rs.append(r)
+        ss.append(s)
+    return bid_id, verdicts, vs, rs, ss
+
+
+def claim_args(bid_id, attestations, validator):
+    """ Return the arguments for claimAttestation() for a validator's attestation """
+    leaves = [leaf(i, att.validator, att.verdict) for i, att in enumerate(attestations)]
+    for index, att in enumerate(attestations):
+        if att.validator == validator:
+            return bid_id, index, att.verdict, merkle_proof(leaves, index)
+    raise ValueError("{} has no attestation".format(validator))
@@ -0,0 +1,232 @@
+""" Read access to the Scatter contracts
+
+Every read is an eth_call.  Reads that don't depend on each other are sent as one JSON-RPC
+batch:
+
+    client = ScatterClient('http://localhost:8545', abis, addresses)
+    bids = client.get_bids([1, 2, 3])       # 1 round trip for 6 calls
+
+    with client.batch() as batch:
+        count = batch.call('BidStore', 'getBidCount')
+        fee = batch.call('Env', 'getuint', Web3.sha3(text='minBid'))
+    count.value, fee.value
+"""
+from collections import namedtuple
+from web3 import Web3
+from .abi import ContractABI
+from .rpc import HTTPRPC
+
+CONTRACT_NAMES = ('Scatter', 'BidStore', 'Env', 'Register', 'Router')
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+DEFAULT_PAGE_SIZE = 100
+
+Bid = namedtuple('Bid', [
+    'bid_id',
+    'bidder',
+    'file_hash',
+    'file_size',
+    'bid_amount',
+    'validation_pool',
+    'duration',
+    'min_validations',
+    'hoster',
+    'accepted',
+    'pinned',
+    'paid',
+    'valid_count',
+    'invalid_count',
+])
+
+Validation = namedtuple('Validation', ['when', 'validator', 'is_valid', 'paid'])
+
+Job = namedtuple('Job', ['bid_id', 'file_hash', 'file_size'])
+
+
+class Call(object):
+    """ A pending eth_call.  value is set once its batch has been sent. """
+
+    def __init__(self, address, fn, args):
+        self.address = address
+        self.fn = fn
+        self.args = args
+        self.value = None
+
+    def params(self, block, account=None):
+        tx = {'to': self.address, 'data': self.fn.encode(self.args)}
+        if account is not None:
+            tx['from'] = account
+        return [tx, block]
+
+
+class Batch(object):
+    """ eth_calls to send together in one JSON-RPC batch """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def call(self, contract, name, *args):
+        """ Add a call of contract function name and return the Call """
+        call = Call(
+            self.client.address(contract),
+            self.client.abis[contract].function(name, len(args)),
+            list(args),
+        )
+        self.calls.append(call)
+        return call
+
+    def execute(self):
+        """ Send every call and return their values in order """
+        if not self.calls:
+            return []
+        results = self.client.rpc.batch([
+            ('eth_call', call.params(self.client.block, self.client.account))
+            for call in self.calls
+        ])
+        for call, result in zip(self.calls, results):
+            call.value = call.fn.decode(result)
+        return [call.value for call in self.calls]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+
+class ScatterClient(object):
+    """ Typed reads of Scatter, BidStore, Env, Register and Router
+
+    rpc is an HTTPRPC or an endpoint URI.  abis maps contract names to their ABIs.  Addresses
+    not given can be looked up with resolve() or computed offline with deploy.create2.
+    Calls are made from account, if given, since some views (e.g. open_jobs) depend on the
+    sender.
+    """
+
+    def __init__(self, rpc, abis, addresses=None, block='latest', account=None):
+        self.rpc = HTTPRPC(rpc) if isinstance(rpc, str) else rpc
+        self.abis = {name: ContractABI(abi) for name, abi in abis.items()}
+        self.addresses = dict(addresses or {})
+        self.block = block
+        self.account = account
+
+    @classmethod
+    def from_contracts(cls, rpc, contracts, **kwargs):
+        """ Build a client from web3 contract objects, e.g. the ones Solidbyte gives tests """
+        abis = {}
+        addresses = {}
+        for name in CONTRACT_NAMES:
+            contract = contracts.get(name)
+            if contract is not None:
+                abis[name] = contract.abi
+                addresses[name] = contract.address
+        return cls(rpc, abis, addresses, **kwargs)
+
+    def address(self, contract):
+        address = self.addresses.get(contract)
+        assert address is not None, "No address for {}".format(contract)
+        return address
+
+    def batch(self):
+        return Batch(self)
+
+    def call(self, contract, name, *args):
+        """ Make a single eth_call """
+        batch = self.batch()
+        call = batch.call(contract, name, *args)
+        batch.execute()
+        return call.value
+
+    def resolve(self, names=None):
+        """ Look up contract addresses in the Router, all in one call """
+        names = [name for name in (names or CONTRACT_NAMES) if name != 'Router']
+        keys = [Web3.sha3(text=name) for name in names]
+        for name, address in zip(names, self.call('Router', 'getMany', keys)):
+            if address != ZERO_ADDRESS:
+                self.addresses[name] = address
+        return self.addresses
+
+    def get_bid(self, bid_id):
+        """ Return a Bid, or None if it doesn't exist """
+        return self.get_bids([bid_id])[0]
+
+    def get_bids(self, bid_ids):
+        """ Return a Bid (or None) for each ID, in one round trip """
+        with self.batch() as batch:
+            calls = [
+                (
+                    bid_id,
+                    batch.call('BidStore', 'getBids', bid_id, 1),
+                    batch.call('BidStore', 'getBidStates', bid_id, 1),
+                )
+                for bid_id in bid_ids
+            ]
+        return [
+            bids_from_page(bid_id, bids.value, states.value)[0] if bids.value[0] else None
+            for bid_id, bids, states in calls
+        ]
+
+    def get_bid_range(self, offset, limit):
+        """ Return up to limit Bids starting at bid ID offset, in one round trip """
+        with self.batch() as batch:
+            bids = batch.call('BidStore', 'getBids', offset, limit)
+            states = batch.call('BidStore', 'getBidStates', offset, limit)
+        return bids_from_page(offset, bids.value, states.value)
+
+    def get_validations(self, bid_id, page_size=DEFAULT_PAGE_SIZE):
+        """ Return every Validation for a bid.  The count, then all pages in one batch. """
+        count = self.call('BidStore', 'getValidationCount', bid_id)
+        with self.batch() as batch:
+            pages = [
+                batch.call('BidStore', 'getValidations', bid_id, offset, page_size)
+                for offset in range(0, count, page_size)
+            ]
+        validations = []
+        for page in pages:
+            validations.extend(Validation(*fields) for fields in zip(*page.value))
+        return validations
+
+    def open_jobs(self, limit=None, page_size=DEFAULT_PAGE_SIZE):
+        """ Return Jobs the caller could accept, walking the open queue a page at a time """
+        jobs = []
+        cursor = -1
+        while limit is None or len(jobs) < limit:
+            size = page_size if limit is None else min(page_size, limit - len(jobs))
+            bid_ids, file_hashes, file_sizes, cursor = self.call(
+                'Scatter',
+                'getOpenJobs',
+                cursor,
+                size,
+            )
+            jobs.extend(Job(*fields) for fields in zip(bid_ids, file_hashes, file_sizes))
+            if cursor < 0:
+                break
+        return jobs
+
+    def env_uints(self, names):
+        """ Return a dict of Env uint values by name, in one round trip """
+        with self.batch() as batch:
+            calls = [(name, batch.call('Env', 'getuint', Web3.sha3(text=name))) for name in names]
+        return {name: call.value for name, call in calls}
+
+    def balances(self, accounts):
+        """ Return a dict of Scatter balances by account, in one round trip """
+        with self.batch() as batch:
+            calls = [(account, batch.call('Scatter', 'balance', account)) for account in accounts]
+        return {account: call.value for account, call in calls}
+
+    def get_user_file(self, user):
+        """ Return the IPFS hash of a user's registration file """
+        return self.call('Register', 'getUserFile', user)
+
+    def close(self):
+        self.rpc.close()
+
+
+def bids_from_page(offset, bids, states):
+    """ Zip the arrays from getBids and getBidStates into Bids """
+    return [
+        Bid(offset + i, *(tuple(bid) + tuple(state)))
+        for i, (bid, state) in enumerate(zip(zip(*bids), zip(*states)))
+    ]
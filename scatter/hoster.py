@@ -0,0 +1,264 @@
+""" Hoster agent
+
+Reacts to Scatter logs instead of polling getJob():
+
+- BidSuccessful adds the bid to an in memory set of open bids.  If choose(bid) takes it, accept()
+  is sent right away and the file is pinned on IPFS meanwhile.
+- Accepted removes the bid from the open set.  If it's ours, pinned() is sent once the file is
+  pinned.  If someone else got it first, pinning is dropped and the bid is held as reserved until
+  their acceptance runs out (Accepted's when plus the Env acceptHoldDuration).  If it isn't
+  Pinned by then, it goes back into the open set and can be taken again.
+- Pinned by anyone closes the bid for good.
+
+Transactions are signed locally with a locally kept nonce (see signer.py), so accept() for a bid
+is usually in the block after the bid.
+
+    python -m scatter.hoster --network geth --scatter 0x... --abi Scatter.abi
+
+The private key comes from SCATTER_HOSTER_KEY.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import namedtuple
+from web3 import Web3
+from .abi import ContractABI, EventDecoder, Function
+from .ipfs import IPFSClient
+from .node import node_from_network
+from .signer import Signer
+
+KEY_ENV = 'SCATTER_HOSTER_KEY'
+
+DEFAULT_ACCEPT_GAS = 300000
+DEFAULT_PINNED_GAS = 300000
+DEFAULT_MAX_PINS = 4
+# How long to wait on the Accepted log after sending accept()
+DEFAULT_ACCEPT_TIMEOUT = 120
+
+ENV_ACCEPT_HOLD_DURATION = Web3.sha3(text='acceptHoldDuration')
+# All we need of the Env ABI
+ENV_GETUINT_FN = Function({
+    'name': 'getuint',
+    'inputs': [{'name': 'key', 'type': 'bytes32'}],
+    'outputs': [{'name': '', 'type': 'uint256'}],
+})
+
+OpenBid = namedtuple('OpenBid', [
+    'bid_id',
+    'bidder',
+    'file_hash',
+    'file_size',
+    'bid_value',
+    'validation_pool',
+    'block_number',
+])
+
+
+def accept_all(bid):
+    return True
+
+
+def job_filter(max_file_size=None, min_value_per_byte=0):
+    """ A choose() taking bids for files up to max_file_size paying at least min_value_per_byte """
+    def choose(bid):
+        if max_file_size is not None and bid.file_size > max_file_size:
+            return False
+        return bid.bid_value >= min_value_per_byte * bid.file_size
+    return choose
+
+
+class Hoster(object):
+    """ Accepts and pins bids as they are made """
+
+    def __init__(self, node, signer, scatter_address, scatter_abi, ipfs, choose=accept_all,
+                 max_pins=DEFAULT_MAX_PINS, accept_gas=DEFAULT_ACCEPT_GAS,
+                 pinned_gas=DEFAULT_PINNED_GAS, accept_timeout=DEFAULT_ACCEPT_TIMEOUT,
+                 accept_hold_duration=None):
+        self.node = node
+        self.signer = signer
+        self.scatter_address = scatter_address
+        self.ipfs = ipfs
+        self.choose = choose
+        self.max_pins = max_pins
+        self.accept_gas = accept_gas
+        self.pinned_gas = pinned_gas
+        self.accept_timeout = accept_timeout
+        # Read from Env on run() if not given
+        self.accept_hold_duration = accept_hold_duration
+
+        functions = ContractABI(scatter_abi)
+        self.accept_fn = functions.function('accept', 1)
+        self.pinned_fn = functions.function('pinned', 1)
+        self.env_fn = functions.function('env', 0)
+        self.decoder = EventDecoder(scatter_abi, ('BidSuccessful', 'Accepted', 'Pinned'))
+
+        self.open_bids = {}
+        # Bids accepted by other hosters: bid ID -> (bid, when their acceptance runs out)
+        self.reserved = {}
+        self.jobs = {}
+        self.acceptances = {}
+        self.accepted = {}
+        self.pinned = {}
+        self.errors = []
+        # Blocks from each bid to our Accepted log
+        self.latencies = []
+        self.pins = None
+
+    async def run(self, from_block=None):
+        """ Follow the Scatter logs, starting at from_block if given """
+        self.pins = asyncio.Semaphore(self.max_pins)
+        if self.accept_hold_duration is None:
+            env_address = await self.call(self.scatter_address, self.env_fn, [])
+            self.accept_hold_duration = await self.call(env_address, ENV_GETUINT_FN, [
+                ENV_ACCEPT_HOLD_DURATION,
+            ])
+        async for log in self.node.logs(self.scatter_address, from_block):
+            self.handle(log)
+
+    async def call(self, to, fn, args):
+        return fn.decode(await self.node.call(to, fn.encode(args)))
+
+    def handle(self, log):
+        decoded = self.decoder.decode(log)
+        if decoded is None:
+            return
+        name, args = decoded
+        bid_id = args['bidId']
+
+        if log.get('removed'):
+            # Reorged out.  A bid that is gone can't be accepted.
+            if name == 'BidSuccessful':
+                self.open_bids.pop(bid_id, None)
+            return
+
+        if name == 'BidSuccessful':
+            bid = OpenBid(
+                bid_id,
+                args['bidder'],
+                args['fileHash'],
+                args['fileSize'],
+                args['bidValue'],
+                args['validationPool'],
+                log['blockNumber'],
+            )
+            self.open_bids[bid_id] = bid
+            self.start(bid)
+
+        elif name == 'Accepted':
+            bid = self.open_bids.pop(bid_id, None)
+            reservation = self.reserved.pop(bid_id, None)
+            if bid is None and reservation is not None:
+                bid = reservation[0]
+            acceptance = self.acceptances.get(bid_id)
+            if acceptance is not None and not acceptance.done():
+                acceptance.set_result(args['hoster'])
+            if args['hoster'] == self.signer.address:
+                self.accepted[bid_id] = log['blockNumber']
+                if bid is not None:
+                    self.latencies.append(log['blockNumber'] - bid.block_number)
+            elif bid is not None:
+                self.reserve(bid, args['when'] + (self.accept_hold_duration or 0))
+
+        elif name == 'Pinned':
+            self.open_bids.pop(bid_id, None)
+            self.reserved.pop(bid_id, None)
+            if args['hoster'] == self.signer.address:
+                self.pinned[bid_id] = log['blockNumber']
+
+    def start(self, bid):
+        if bid.bid_id not in self.jobs and self.choose(bid):
+            self.jobs[bid.bid_id] = asyncio.ensure_future(self.take(bid))
+
+    def reserve(self, bid, expires):
+        """ Hold a bid someone else accepted until their acceptance runs out """
+        self.reserved[bid.bid_id] = (bid, expires)
+        asyncio.get_event_loop().call_later(
+            max(0, expires - time.time()),
+            self.reopen,
+            bid.bid_id,
+            expires,
+        )
+
+    def reopen(self, bid_id, expires):
+        """ Put a reserved bid back in the open set if it wasn't pinned or accepted again """
+        reservation = self.reserved.get(bid_id)
+        if reservation is None or reservation[1] != expires:
+            return
+        del self.reserved[bid_id]
+        self.open_bids[bid_id] = reservation[0]
+        self.start(reservation[0])
+
+    async def take(self, bid):
+        """ Accept a bid, pin the file and mark it pinned.  Returns True if it was ours. """
+        if bid.bid_id not in self.open_bids:
+            return False  # Accepted by someone else before we got to it
+
+        acceptance = asyncio.get_event_loop().create_future()
+        self.acceptances[bid.bid_id] = acceptance
+        pin = None
+        try:
+            await self.signer.send(
+                self.scatter_address,
+                self.accept_fn.encode([bid.bid_id]),
+                self.accept_gas,
+            )
+            pin = asyncio.ensure_future(self.pin(bid))
+
+            try:
+                hoster = await asyncio.wait_for(asyncio.shield(acceptance), self.accept_timeout)
+            except asyncio.TimeoutError:
+                hoster = None
+            if hoster != self.signer.address or not await pin:
+                return False
+
+            await self.signer.send(
+                self.scatter_address,
+                self.pinned_fn.encode([bid.bid_id]),
+                self.pinned_gas,
+            )
+            return True
+        except Exception as err:
+            self.errors.append((bid.bid_id, err))
+            return False
+        finally:
+            if pin is not None and not pin.done():
+                pin.cancel()
+            self.acceptances.pop(bid.bid_id, None)
+            self.jobs.pop(bid.bid_id, None)
+
+    async def pin(self, bid):
+        async with self.pins:
+            return await self.ipfs.pin(bid.file_hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Accept and pin Scatter bids')
+    parser.add_argument('--network', required=True,
+                        help='websocket or IPC network in networks.yml')
+    parser.add_argument('--scatter', required=True, help='Scatter contract address')
+    parser.add_argument('--abi', required=True, help='Scatter ABI JSON file')
+    parser.add_argument('--ipfs', default='http://127.0.0.1:5001', help='IPFS API URL')
+    parser.add_argument('--max-file-size', type=int, default=None)
+    parser.add_argument('--min-value-per-byte', type=int, default=0)
+    parser.add_argument('--chain-id', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.abi) as abi_file:
+        abi = json.load(abi_file)
+
+    node = node_from_network(args.network)
+    hoster = Hoster(
+        node,
+        Signer(node, os.environ[KEY_ENV], args.chain_id),
+        args.scatter,
+        abi,
+        IPFSClient(args.ipfs),
+        job_filter(args.max_file_size, args.min_value_per_byte),
+    )
+    asyncio.get_event_loop().run_until_complete(hoster.run())
+
+
+if __name__ == '__main__':
+    main()
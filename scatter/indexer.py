@@ -0,0 +1,351 @@
+""" Index Scatter events into SQLite
+
+Indexer streams Scatter logs into a SQLite database and keeps the state of every bid there, so
+"which bids are open, accepted, pinned or paid" is a query instead of a getBid() per bid:
+
+    indexer = Indexer(web3, scatter.address, scatter.abi, 'scatter.db')
+    indexer.sync()
+    indexer.bids(status=PINNED, hoster=hoster)
+
+Logs are fetched in block ranges.  The range grows while responses are small and shrinks when
+the node returns too many logs or refuses the query.
+
+Every log is kept in the events table and applied to the bids and validations tables.  The hash
+of the last block of each range is kept too.  If it no longer matches the chain on the next
+sync, the last reorg_depth blocks of events are dropped, the bids they touched are rebuilt from
+the events that are left and syncing resumes after the rollback point.
+"""
+import json
+import sqlite3
+import time
+from .abi import EventDecoder
+
+INDEXED_EVENTS = (
+    'BidSuccessful',
+    'Accepted',
+    'Pinned',
+    'ValidationOcurred',
+    'HosterPaid',
+    'Claimed',
+    'Withdraw',
+)
+
+OPEN = 'open'
+ACCEPTED = 'accepted'
+PINNED = 'pinned'
+PAID = 'paid'
+
+DEFAULT_CHUNK_SIZE = 1000
+MIN_CHUNK_SIZE = 1
+MAX_CHUNK_SIZE = 100000
+# Ranges returning more logs than this are halved, fewer than half of it doubled
+TARGET_LOGS = 2000
+DEFAULT_REORG_DEPTH = 12
+DEFAULT_POLL_INTERVAL = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    bid_id INTEGER,
+    account TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_bid_id ON events (bid_id);
+CREATE INDEX IF NOT EXISTS events_account ON events (event, account);
+CREATE TABLE IF NOT EXISTS bids (
+    bid_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    bidder TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    bid_value TEXT NOT NULL,
+    validation_pool TEXT NOT NULL,
+    hoster TEXT,
+    accepted INTEGER,
+    pinned_block INTEGER,
+    paid_value TEXT,
+    valid_count INTEGER NOT NULL DEFAULT 0,
+    invalid_count INTEGER NOT NULL DEFAULT 0,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bids_status ON bids (status);
+CREATE INDEX IF NOT EXISTS bids_bidder ON bids (bidder, status);
+CREATE INDEX IF NOT EXISTS bids_hoster ON bids (hoster, status);
+CREATE INDEX IF NOT EXISTS bids_file_hash ON bids (file_hash);
+CREATE TABLE IF NOT EXISTS validations (
+    bid_id INTEGER NOT NULL,
+    validator TEXT NOT NULL,
+    is_valid INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    PRIMARY KEY (bid_id, validator)
+);
+CREATE INDEX IF NOT EXISTS validations_validator ON validations (validator);
+"""
+
+
+def to_json(value):
+    """ JSON default for decoded event args.  Wei values can be larger than SQLite integers. """
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    raise TypeError("Can't serialize {!r}".format(value))
+
+
+class Indexer(object):
+    """ Index the events of one Scatter contract into a SQLite database """
+
+    def __init__(self, web3, address, abi, db_path=':memory:', start_block=0,
+                 reorg_depth=DEFAULT_REORG_DEPTH, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.web3 = web3
+        self.address = address
+        self.decoder = EventDecoder(abi, INDEXED_EVENTS)
+        self.start_block = start_block
+        self.reorg_depth = reorg_depth
+        self.chunk_size = chunk_size
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    ##
+    # Syncing
+    ##
+
+    def last_block(self):
+        """ The last block indexed, or None """
+        row = self.db.execute('SELECT number, hash FROM blocks ORDER BY number DESC LIMIT 1') \
+            .fetchone()
+        return (row['number'], row['hash']) if row else None
+
+    def check_reorg(self):
+        """ Roll back until the last indexed block is still on the chain.  Returns the number of
+        rollbacks.
+        """
+        rollbacks = 0
+        last = self.last_block()
+        while last is not None:
+            number, block_hash = last
+            block = self.web3.eth.getBlock(number)
+            if block is not None and to_hex(block.hash) == block_hash:
+                break
+            self.rollback(number - self.reorg_depth)
+            rollbacks += 1
+            last = self.last_block()
+        return rollbacks
+
+    def get_logs(self, from_block, to_block):
+        """ Fetch a block range, shrinking it if the node refuses.  Returns (to_block, logs). """
+        while True:
+            try:
+                logs = self.web3.eth.getLogs({
+                    'address': self.address,
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                })
+                break
+            except ValueError:
+                # Too many results or the query timed out
+                if to_block == from_block:
+                    raise
+                self.chunk_size = max(MIN_CHUNK_SIZE, self.chunk_size // 2)
+                to_block = from_block + self.chunk_size - 1
+
+        if len(logs) > TARGET_LOGS:
+            self.chunk_size = max(MIN_CHUNK_SIZE, self.chunk_size // 2)
+        elif len(logs) < TARGET_LOGS // 2:
+            self.chunk_size = min(MAX_CHUNK_SIZE, self.chunk_size * 2)
+
+        return to_block, logs
+
+    def sync(self, to_block=None):
+        """ Index up to to_block (the latest block by default).  Returns blocks indexed. """
+        self.check_reorg()
+
+        head = self.web3.eth.blockNumber if to_block is None else to_block
+        last = self.last_block()
+        from_block = self.start_block if last is None else last[0] + 1
+        indexed = 0
+
+        while from_block <= head:
+            end, logs = self.get_logs(from_block, min(head, from_block + self.chunk_size - 1))
+            end_hash = to_hex(self.web3.eth.getBlock(end).hash)
+
+            with self.db:
+                for log in logs:
+                    self.store_log(log)
+                self.db.execute(
+                    'INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)',
+                    (end, end_hash),
+                )
+
+            indexed += end - from_block + 1
+            from_block = end + 1
+
+        return indexed
+
+    def run(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        """ Keep the index in sync with the chain """
+        while True:
+            self.sync()
+            time.sleep(poll_interval)
+
+    def store_log(self, log):
+        decoded = self.decoder.decode(log)
+        if decoded is None:
+            return
+        name, args = decoded
+
+        # Keep the first argument naming an account so events can be looked up by it
+        account = args.get('bidder') or args.get('hoster') or args.get('validator')
+        self.db.execute(
+            'INSERT OR REPLACE INTO events '
+            '(block_number, log_index, transaction_hash, event, bid_id, account, args) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (
+                log['blockNumber'],
+                log['logIndex'],
+                to_hex(log['transactionHash']),
+                name,
+                args.get('bidId'),
+                account,
+                json.dumps(args, default=to_json),
+            ),
+        )
+        self.apply(name, args, log['blockNumber'])
+
+    def apply(self, name, args, block_number):
+        """ Update the bid state for an event """
+        if name == 'BidSuccessful':
+            self.db.execute(
+                'INSERT OR REPLACE INTO bids (bid_id, status, bidder, file_hash, file_size, '
+                'bid_value, validation_pool, block_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    args['bidId'],
+                    OPEN,
+                    args['bidder'],
+                    to_hex(args['fileHash']),
+                    args['fileSize'],
+                    str(args['bidValue']),
+                    str(args['validationPool']),
+                    block_number,
+                ),
+            )
+        elif name == 'Accepted':
+            self.db.execute(
+                'UPDATE bids SET status = ?, hoster = ?, accepted = ? WHERE bid_id = ?',
+                (ACCEPTED, args['hoster'], args['when'], args['bidId']),
+            )
+        elif name == 'Pinned':
+            self.db.execute(
+                'UPDATE bids SET status = ?, hoster = ?, pinned_block = ? WHERE bid_id = ?',
+                (PINNED, args['hoster'], block_number, args['bidId']),
+            )
+        elif name == 'ValidationOcurred':
+            self.db.execute(
+                'INSERT OR REPLACE INTO validations (bid_id, validator, is_valid, block_number) '
+                'VALUES (?, ?, ?, ?)',
+                (args['bidId'], args['validator'], int(args['isValid']), block_number),
+            )
+            # Counted from the validations table, so applying a log twice doesn't count it twice
+            self.db.execute(
+                'UPDATE bids SET '
+                'valid_count = (SELECT COUNT(*) FROM validations WHERE bid_id = ? AND is_valid), '
+                'invalid_count = (SELECT COUNT(*) FROM validations WHERE bid_id = ? '
+                'AND NOT is_valid) '
+                'WHERE bid_id = ?',
+                (args['bidId'], args['bidId'], args['bidId']),
+            )
+        elif name == 'HosterPaid':
+            self.db.execute(
+                'UPDATE bids SET status = ?, paid_value = ? WHERE bid_id = ?',
+                (PAID, str(args['value']), args['bidId']),
+            )
+
+    def rollback(self, block_number):
+        """ Forget everything after block_number and rebuild the bids it touched """
+        with self.db:
+            bid_ids = [row['bid_id'] for row in self.db.execute(
+                'SELECT DISTINCT bid_id FROM events WHERE block_number > ? '
+                'AND bid_id IS NOT NULL',
+                (block_number,),
+            )]
+            self.db.execute('DELETE FROM events WHERE block_number > ?', (block_number,))
+            self.db.execute('DELETE FROM blocks WHERE number >= ?', (block_number,))
+
+            # Resume right after the rollback point, not at the end of an older range
+            if block_number >= self.start_block:
+                self.db.execute(
+                    'INSERT INTO blocks (number, hash) VALUES (?, ?)',
+                    (block_number, to_hex(self.web3.eth.getBlock(block_number).hash)),
+                )
+
+            for bid_id in bid_ids:
+                self.db.execute('DELETE FROM bids WHERE bid_id = ?', (bid_id,))
+                self.db.execute('DELETE FROM validations WHERE bid_id = ?', (bid_id,))
+                events = self.db.execute(
+                    'SELECT event, args, block_number FROM events WHERE bid_id = ? '
+                    'ORDER BY block_number, log_index',
+                    (bid_id,),
+                ).fetchall()
+                for event in events:
+                    self.apply(event['event'], json.loads(event['args']), event['block_number'])
+
+    ##
+    # Queries
+    ##
+
+    def bid(self, bid_id):
+        """ Return the row for a bid, or None """
+        return self.db.execute('SELECT * FROM bids WHERE bid_id = ?', (bid_id,)).fetchone()
+
+    def bids(self, status=None, bidder=None, hoster=None):
+        """ Return bid rows, optionally filtered by status, bidder and hoster """
+        where = []
+        params = []
+        for column, value in (('status', status), ('bidder', bidder), ('hoster', hoster)):
+            if value is not None:
+                where.append('{} = ?'.format(column))
+                params.append(value)
+        query = 'SELECT * FROM bids'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        return self.db.execute(query + ' ORDER BY bid_id', params).fetchall()
+
+    def status_counts(self):
+        """ Return a dict of how many bids are in each status """
+        return {
+            row['status']: row['count'] for row in self.db.execute(
+                'SELECT status, COUNT(*) AS count FROM bids GROUP BY status'
+            )
+        }
+
+    def validations(self, bid_id):
+        return self.db.execute(
+            'SELECT * FROM validations WHERE bid_id = ? ORDER BY block_number',
+            (bid_id,),
+        ).fetchall()
+
+    def events(self, name, account=None):
+        """ Return the decoded args of every event called name, optionally for one account """
+        query = 'SELECT args FROM events WHERE event = ?'
+        params = [name]
+        if account is not None:
+            query += ' AND account = ?'
+            params.append(account)
+        query += ' ORDER BY block_number, log_index'
+        return [json.loads(row['args']) for row in self.db.execute(query, params)]
+
+    def close(self):
+        self.db.close()
+
+
+def to_hex(value):
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    return value
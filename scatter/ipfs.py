@@ -0,0 +1,91 @@
+""" IPFS access for the agents
+
+Scatter stores IPFS files as the bytes32 sha2-256 digest of their CIDv0 multihash.  to_cid() and
+from_cid() convert between the two.
+
+IPFSClient talks to the HTTP API of an IPFS node.  Agents only need pin() (hosters) and has()
+(validators), so tests can stand in for it with anything that has those two coroutines.
+"""
+import asyncio
+import requests
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+# Multihash prefix for a 32 byte sha2-256 digest
+SHA256_PREFIX = b'\x12\x20'
+
+DEFAULT_API_URL = 'http://127.0.0.1:5001'
+DEFAULT_TIMEOUT = 60
+
+
+def b58encode(data):
+    number = int.from_bytes(data, 'big')
+    encoded = ''
+    while number > 0:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    leading = len(data) - len(data.lstrip(b'\x00'))
+    return BASE58_ALPHABET[0] * leading + encoded
+
+
+def b58decode(text):
+    number = 0
+    for char in text:
+        number = number * 58 + BASE58_ALPHABET.index(char)
+    leading = len(text) - len(text.lstrip(BASE58_ALPHABET[0]))
+    body = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    return b'\x00' * leading + body
+
+
+def to_cid(file_hash):
+    """ The CIDv0 (Qm...) for a bytes32 file hash """
+    if isinstance(file_hash, str):
+        file_hash = bytes.fromhex(file_hash[2:] if file_hash.startswith('0x') else file_hash)
+    assert len(file_hash) == 32, "File hashes are 32 bytes"
+    return b58encode(SHA256_PREFIX + file_hash)
+
+
+def from_cid(cid):
+    """ The bytes32 file hash for a CIDv0 """
+    multihash = b58decode(cid)
+    assert multihash[:2] == SHA256_PREFIX and len(multihash) == 34, "Not a CIDv0"
+    return multihash[2:]
+
+
+class IPFSClient(object):
+    """ Pin and check files through an IPFS node's HTTP API """
+
+    def __init__(self, api_url=DEFAULT_API_URL, timeout=DEFAULT_TIMEOUT, session=None):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def post(self, command, cid, timeout):
+        response = self.session.post(
+            '{}/api/v0/{}'.format(self.api_url, command),
+            params={'arg': cid},
+            timeout=timeout,
+        )
+        return response.status_code == 200
+
+    async def call(self, command, file_hash, timeout=None):
+        """ Run an API command for a file in a worker thread """
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(
+                None,
+                self.post,
+                command,
+                to_cid(file_hash),
+                timeout or self.timeout,
+            )
+        except requests.RequestException:
+            return False
+
+    async def pin(self, file_hash):
+        """ Fetch and pin a file on our node.  Returns True once it's pinned. """
+        return await self.call('pin/add', file_hash)
+
+    async def has(self, file_hash, timeout=None):
+        """ Returns True if the file can be fetched from the network within timeout """
+        return await self.call('block/stat', file_hash, timeout)
@@ -0,0 +1,355 @@
+""" Async access to an Ethereum node for the agents
+
+Agents react to logs instead of polling views.  A node gives them:
+
+    block_number()              The latest block number
+    call(to, data)              eth_call against the latest block, returning hex data
+    get_logs(address, from)     Past logs of a contract
+    logs(address, from=None)    New logs as they come, after any past ones from from_block
+    get_transaction_count(a)    The pending nonce of an account
+    send_raw_transaction(raw)   Broadcast a signed transaction
+    get_transaction_receipt(h)  The receipt of a mined transaction, or None while it's pending
+
+WebsocketNode and IPCNode subscribe with eth_subscribe, which is pushed to us as blocks come in.
+If their connection drops, requests waiting on it fail with the error, the next request connects
+again, and logs() subscribes again and sends the logs it missed meanwhile.
+Web3Node polls eth_getLogs through a web3 instance, for nodes without subscriptions like the
+eth_tester chain the tests run on.  node_from_network() builds a node from networks.yml.
+"""
+import asyncio
+import json
+import os
+import websockets
+from web3 import Web3
+
+NETWORKS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'networks.yml')
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_RECONNECT_INTERVAL = 1.0
+
+
+def to_int(value):
+    """ Quantities are hex strings over JSON-RPC and ints from web3 """
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+
+def normalize_log(log):
+    """ A log dict with int block numbers and indexes whichever way it came """
+    log = dict(log)
+    for key in ('blockNumber', 'logIndex', 'transactionIndex'):
+        if key in log:
+            log[key] = to_int(log[key])
+    return log
+
+
+def normalize_receipt(receipt):
+    """ A receipt dict with an int status and block number, or None if there is none yet """
+    if receipt is None:
+        return None
+    receipt = dict(receipt)
+    for key in ('blockNumber', 'status', 'gasUsed'):
+        if key in receipt:
+            receipt[key] = to_int(receipt[key])
+    return receipt
+
+
+def log_key(log):
+    return (log['blockNumber'], log['logIndex'])
+
+
+class Web3Node(object):
+    """ A node reached through a (synchronous) web3 instance, polled for new logs """
+
+    def __init__(self, web3, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+
+    async def block_number(self):
+        return self.web3.eth.blockNumber
+
+    async def call(self, to, data):
+        return Web3.toHex(self.web3.eth.call({'to': to, 'data': data}))
+
+    async def get_logs(self, address, from_block, to_block='latest'):
+        logs = self.web3.eth.getLogs({
+            'address': address,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+        })
+        return [normalize_log(log) for log in logs]
+
+    async def logs(self, address, from_block=None):
+        if from_block is None:
+            from_block = self.web3.eth.blockNumber + 1
+        while True:
+            head = self.web3.eth.blockNumber
+            if head >= from_block:
+                for log in await self.get_logs(address, from_block, head):
+                    yield log
+                from_block = head + 1
+            await asyncio.sleep(self.poll_interval)
+
+    async def get_transaction_count(self, account):
+        return self.web3.eth.getTransactionCount(account, 'pending')
+
+    async def send_raw_transaction(self, raw):
+        return self.web3.eth.sendRawTransaction(raw)
+
+    async def get_transaction_receipt(self, txhash):
+        return normalize_receipt(self.web3.eth.getTransactionReceipt(txhash))
+
+    async def close(self):
+        pass
+
+
+class StreamNode(object):
+    """ JSON-RPC over a persistent connection with subscriptions
+
+    Subclasses connect() and implement send_message() and receive_message(), which returns the
+    next decoded message.
+    """
+
+    def __init__(self, reconnect_interval=DEFAULT_RECONNECT_INTERVAL):
+        self.reconnect_interval = reconnect_interval
+        self.next_id = 0
+        self.pending = {}
+        self.subscriptions = {}
+        self.reader = None
+
+    async def connect(self):
+        raise NotImplementedError()
+
+    async def send_message(self, text):
+        raise NotImplementedError()
+
+    async def receive_message(self):
+        raise NotImplementedError()
+
+    async def start(self):
+        if self.reader is None:
+            await self.connect()
+            self.reader = asyncio.ensure_future(self.read())
+
+    async def read(self):
+        """ Hand responses to their requests and notifications to their subscriptions """
+        while True:
+            try:
+                message = await self.receive_message()
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                # Connect again on the next request
+                self.reader = None
+                self.fail(err)
+                return
+            for item in message if isinstance(message, list) else [message]:
+                if item.get('method') == 'eth_subscription':
+                    params = item['params']
+                    queue = self.subscriptions.get(params['subscription'])
+                    if queue is not None:
+                        queue.put_nowait(params['result'])
+                    continue
+
+                future = self.pending.pop(item.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in item:
+                    future.set_exception(ValueError(item['error']))
+                else:
+                    future.set_result(item['result'])
+
+    def fail(self, err):
+        """ Fail every request waiting on a dropped connection and end its subscriptions """
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(err)
+        subscriptions, self.subscriptions = self.subscriptions, {}
+        for queue in subscriptions.values():
+            queue.put_nowait(err)
+
+    async def request(self, method, params):
+        await self.start()
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_event_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self.send_message(json.dumps({
+                'jsonrpc': '2.0',
+                'id': request_id,
+                'method': method,
+                'params': params,
+            }))
+        except Exception:
+            self.pending.pop(request_id, None)
+            raise
+        return await future
+
+    async def block_number(self):
+        return to_int(await self.request('eth_blockNumber', []))
+
+    async def call(self, to, data):
+        return await self.request('eth_call', [{'to': to, 'data': data}, 'latest'])
+
+    async def get_logs(self, address, from_block, to_block='latest'):
+        logs = await self.request('eth_getLogs', [{
+            'address': address,
+            'fromBlock': hex(from_block),
+            'toBlock': to_block if isinstance(to_block, str) else hex(to_block),
+        }])
+        return [normalize_log(log) for log in logs]
+
+    async def logs(self, address, from_block=None):
+        """ Subscribe, then send past logs from from_block, then new logs as they come.  If the
+        connection drops, subscribe again and send the logs missed meanwhile.
+        """
+        # The key of the last log sent
+        last = None
+        reconnecting = False
+        while True:
+            queue = asyncio.Queue()
+            subscription = None
+            try:
+                subscription = await self.request('eth_subscribe', ['logs', {'address': address}])
+                self.subscriptions[subscription] = queue
+                if from_block is None:
+                    from_block = await self.block_number() + 1
+                past = await self.get_logs(address, from_block)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.subscriptions.pop(subscription, None)
+                if not reconnecting:
+                    raise
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+            reconnecting = True
+
+            seen = set()
+            try:
+                for log in past:
+                    if last is None or log_key(log) > last:
+                        last = log_key(log)
+                        seen.add(last)
+                        yield log
+
+                while True:
+                    item = await queue.get()
+                    if isinstance(item, Exception):
+                        break  # Dropped
+                    log = normalize_log(item)
+                    # Logs from before the subscription can come twice
+                    if log.get('removed') or log_key(log) not in seen:
+                        if not log.get('removed'):
+                            last = log_key(log)
+                        yield log
+                    seen.discard(log_key(log))
+            finally:
+                self.subscriptions.pop(subscription, None)
+
+            if last is not None:
+                from_block = last[0]
+
+    async def get_transaction_count(self, account):
+        return to_int(await self.request('eth_getTransactionCount', [account, 'pending']))
+
+    async def send_raw_transaction(self, raw):
+        if isinstance(raw, (bytes, bytearray)):
+            raw = '0x' + bytes(raw).hex()
+        return await self.request('eth_sendRawTransaction', [raw])
+
+    async def get_transaction_receipt(self, txhash):
+        if isinstance(txhash, (bytes, bytearray)):
+            txhash = '0x' + bytes(txhash).hex()
+        return normalize_receipt(await self.request('eth_getTransactionReceipt', [txhash]))
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+
+
+class WebsocketNode(StreamNode):
+    """ A node reached over a websocket """
+
+    def __init__(self, url, reconnect_interval=DEFAULT_RECONNECT_INTERVAL):
+        super(WebsocketNode, self).__init__(reconnect_interval)
+        self.url = url
+        self.connection = None
+
+    async def connect(self):
+        self.connection = await websockets.connect(self.url)
+
+    async def send_message(self, text):
+        await self.connection.send(text)
+
+    async def receive_message(self):
+        return json.loads(await self.connection.recv())
+
+    async def close(self):
+        await super(WebsocketNode, self).close()
+        if self.connection is not None:
+            await self.connection.close()
+
+
+class IPCNode(StreamNode):
+    """ A node reached over its IPC socket
+
+    Messages on the socket aren't delimited, so they're split by decoding JSON values off the
+    front of the buffer.
+    """
+
+    def __init__(self, path, reconnect_interval=DEFAULT_RECONNECT_INTERVAL):
+        super(IPCNode, self).__init__(reconnect_interval)
+        self.path = os.path.expanduser(path)
+        self.stream_reader = None
+        self.stream_writer = None
+        self.buffer = ''
+        self.decoder = json.JSONDecoder()
+
+    async def connect(self):
+        self.buffer = ''
+        self.stream_reader, self.stream_writer = await asyncio.open_unix_connection(self.path)
+
+    async def send_message(self, text):
+        self.stream_writer.write(text.encode('utf-8'))
+        await self.stream_writer.drain()
+
+    async def receive_message(self):
+        while True:
+            self.buffer = self.buffer.lstrip()
+            if self.buffer:
+                try:
+                    message, end = self.decoder.raw_decode(self.buffer)
+                    self.buffer = self.buffer[end:]
+                    return message
+                except ValueError:
+                    pass  # Incomplete, read more
+            chunk = await self.stream_reader.read(65536)
+            if not chunk:
+                raise ConnectionError("IPC connection closed")
+            self.buffer += chunk.decode('utf-8')
+
+    async def close(self):
+        await super(IPCNode, self).close()
+        if self.stream_writer is not None:
+            self.stream_writer.close()
+            await self.stream_writer.wait_closed()
+
+
+def node_from_network(name, networks_file=NETWORKS_FILE):
+    """ Build a node for a websocket or IPC network in networks.yml """
+    import yaml
+
+    with open(networks_file) as networks:
+        config = yaml.safe_load(networks).get(name)
+    if config is None:
+        raise ValueError("Unknown network {}".format(name))
+
+    if config.get('type') == 'websocket':
+        return WebsocketNode(config['url'])
+    elif config.get('type') == 'ipc':
+        return IPCNode(config['file'])
+    raise ValueError("Network {} has no websocket or IPC endpoint".format(name))
@@ -0,0 +1,159 @@
+""" Answers to chunk challenges (see docs/protocol.md)
+
+For a challenge seed, a hoster hashes one chunk of a file:
+
+    start = keccak256(seed ++ hosterAddress) % fileSize
+    start = start - CHUNK_SIZE if seed > fileSize, or 0 if that would be negative
+    size = min(CHUNK_SIZE, fileSize - start)
+    uniqueHash = keccak256(file[start:start + size])
+
+and signs proof_hash(), which binds uniqueHash to the Challenge contract and the bid, as an
+Ethereum signed message.  Only the chunk is read, through an mmap of the pages it is on, so the
+cost of a proof doesn't grow with the file.  Prover.prove_many() spreads batches of challenges
+over a process pool.  Answers sent with defend() sign defense_hash() instead, which covers the
+challenge ID and seed.
+"""
+import mmap
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from eth_account import Account
+from eth_account.messages import defunct_hash_message
+from web3 import Web3
+from .abi import to_bytes
+
+CHUNK_SIZE = 1000
+# Challenges per task sent to a worker process
+DEFAULT_TASK_SIZE = 64
+
+Challenge = namedtuple('Challenge', ['path', 'seed', 'bid_id'])
+Proof = namedtuple('Proof', [
+    'seed',
+    'chunk_start',
+    'chunk_size',
+    'unique_hash',
+    'signature',
+])
+
+
+def chunk_range(seed, hoster, file_size, chunk_size=CHUNK_SIZE):
+    """ Return (chunkStart, chunkSize) of the chunk to hash for a seed and hoster address """
+    if file_size <= 0:
+        raise ValueError("Can't take a chunk of an empty file")
+
+    seed = to_bytes(seed)
+    position = int.from_bytes(Web3.sha3(primitive=seed + to_bytes(hoster)), 'big') % file_size
+    if int.from_bytes(seed, 'big') > file_size:
+        position = max(position - chunk_size, 0)
+    return position, min(chunk_size, file_size - position)
+
+
+def read_chunk(path, start, size):
+    """ Read size bytes at start by mapping only the pages they're on """
+    # mmap offsets must be a multiple of the allocation granularity
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(path, 'rb') as chunk_file:
+        mapped = mmap.mmap(
+            chunk_file.fileno(),
+            start + size - offset,
+            access=mmap.ACCESS_READ,
+            offset=offset,
+        )
+        try:
+            return mapped[start - offset:start - offset + size]
+        finally:
+            mapped.close()
+
+
+@lru_cache(maxsize=16)
+def account_for(private_key):
+    return Account.privateKeyToAccount(private_key)
+
+
+def sign_hash(unique_hash, private_key):
+    """ Sign a hash as an Ethereum signed message (eth_sign) """
+    return bytes(Account.signHash(
+        defunct_hash_message(primitive=unique_hash),
+        private_key,
+    ).signature)
+
+
+def proof_hash(challenge_address, bid_id, unique_hash):
+    """ The hash a hoster signs to submit their uniqueHash with prove() """
+    return Web3.soliditySha3(
+        ['address', 'int256', 'bytes32'],
+        [challenge_address, bid_id, unique_hash],
+    )
+
+
+def sign_proof(challenge_address, bid_id, unique_hash, private_key):
+    """ Sign a uniqueHash for prove() """
+    return sign_hash(proof_hash(challenge_address, bid_id, unique_hash), private_key)
+
+
+def defense_hash(challenge_address, challenge_id, seed, unique_hash):
+    """ The hash a hoster signs to answer a challenge with defend() """
+    return Web3.soliditySha3(
+        ['address', 'uint256', 'bytes32', 'bytes32'],
+        [challenge_address, challenge_id, to_bytes(seed), unique_hash],
+    )
+
+
+def sign_defense(challenge_address, challenge_id, seed, unique_hash, private_key):
+    """ Sign the answer to a challenge for defend() """
+    return sign_hash(defense_hash(challenge_address, challenge_id, seed, unique_hash), private_key)
+
+
+def prove(path, seed, private_key, challenge_address, bid_id):
+    """ Answer a challenge for the file at path, signed for prove() on a bid """
+    account = account_for(private_key)
+    start, size = chunk_range(seed, account.address, os.path.getsize(path))
+    unique_hash = bytes(Web3.sha3(primitive=read_chunk(path, start, size)))
+    signature = sign_proof(challenge_address, bid_id, unique_hash, private_key)
+    return Proof(to_bytes(seed), start, size, unique_hash, signature)
+
+
+class Prover(object):
+    """ Answers challenges for one hoster account, many at a time over a process pool """
+
+    def __init__(self, private_key, challenge_address, processes=None,
+                 task_size=DEFAULT_TASK_SIZE):
+        self.private_key = private_key
+        self.address = account_for(private_key).address
+        self.challenge_address = challenge_address
+        self.processes = processes
+        self.task_size = task_size
+        self.executor = None
+
+    def prove(self, path, seed, bid_id):
+        return prove(path, seed, self.private_key, self.challenge_address, bid_id)
+
+    def prove_many(self, challenges):
+        """ Answer (path, seed, bid_id) challenges in worker processes.  Proofs are in the same
+        order.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.processes)
+        paths, seeds, bid_ids = zip(*challenges) if challenges else ((), (), ())
+        return list(self.executor.map(
+            prove,
+            paths,
+            seeds,
+            repeat(self.private_key),
+            repeat(self.challenge_address),
+            bid_ids,
+            chunksize=self.task_size,
+        ))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,107 @@
+""" JSON-RPC over pooled keep-alive HTTP connections
+
+Requests go through one requests.Session, so connections to the node are reused instead of
+opened per call.  batch() sends many requests in one JSON-RPC batch, which is one round trip
+instead of one per request.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+# Nodes limit batch sizes (geth allows 1000 per batch by default)
+DEFAULT_MAX_BATCH = 500
+
+
+class RPCError(Exception):
+    """ A JSON-RPC error response """
+
+    def __init__(self, error, method=None):
+        self.code = error.get('code')
+        self.data = error.get('data')
+        self.method = method
+        super(RPCError, self).__init__('{} ({}): {}'.format(
+            method,
+            self.code,
+            error.get('message'),
+        ))
+
+
+def pooled_session(pool_size=DEFAULT_POOL_SIZE):
+    """ A requests.Session keeping up to pool_size connections alive per host """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HTTPRPC(object):
+    """ A JSON-RPC client for one node endpoint
+
+    round_trips counts HTTP requests sent and requests counts the JSON-RPC requests in them.
+    """
+
+    def __init__(self, endpoint_uri, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 max_batch=DEFAULT_MAX_BATCH, session=None):
+        self.endpoint_uri = endpoint_uri
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self.session = session or pooled_session(pool_size)
+        self.next_id = 0
+        self.round_trips = 0
+        self.requests = 0
+
+    def post(self, payload):
+        self.round_trips += 1
+        response = self.session.post(self.endpoint_uri, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def payload(self, method, params):
+        self.next_id += 1
+        self.requests += 1
+        return {
+            'jsonrpc': '2.0',
+            'id': self.next_id,
+            'method': method,
+            'params': params,
+        }
+
+    def request(self, method, params=None):
+        """ Send one request and return its result """
+        response = self.post(self.payload(method, params or []))
+        if 'error' in response:
+            raise RPCError(response['error'], method)
+        return response['result']
+
+    def batch(self, calls):
+        """ Send a list of (method, params) and return their results in the same order
+
+        Calls are split into batches of at most max_batch.  An error response for any call
+        raises RPCError.
+        """
+        results = []
+        for start in range(0, len(calls), self.max_batch):
+            chunk = calls[start:start + self.max_batch]
+            payload = [self.payload(method, params) for method, params in chunk]
+            if len(payload) == 1:
+                # Not every node takes a batch of one
+                responses = [self.post(payload[0])]
+            else:
+                responses = self.post(payload)
+
+            # Responses to a batch can come back in any order
+            by_id = {response.get('id'): response for response in responses}
+            for request in payload:
+                response = by_id.get(request['id'])
+                if response is None:
+                    raise RPCError({'message': 'no response'}, request['method'])
+                if 'error' in response:
+                    raise RPCError(response['error'], request['method'])
+                results.append(response['result'])
+        return results
+
+    def close(self):
+        self.session.close()
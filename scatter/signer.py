@@ -0,0 +1,59 @@
+""" Locally signed transactions with a locally kept nonce
+
+The node is asked for the account's nonce once.  After that every transaction is signed here
+with the next nonce and broadcast as is, so sending costs one request and transactions sent
+back to back don't wait on each other.
+"""
+import asyncio
+from eth_account import Account
+
+DEFAULT_GAS_PRICE = int(3e9)
+
+
+class Signer(object):
+    """ Signs and sends transactions from one account through an agent node """
+
+    def __init__(self, node, private_key, chain_id=None, gas_price=DEFAULT_GAS_PRICE):
+        self.node = node
+        self.account = Account.privateKeyToAccount(private_key)
+        self.address = self.account.address
+        self.chain_id = chain_id
+        self.gas_price = gas_price
+        self.nonce = None
+        self.lock = None
+        self.sent = 0
+
+    def sign(self, to, data, gas, nonce, value=0):
+        tx = {
+            'to': to,
+            'data': data,
+            'gas': gas,
+            'gasPrice': self.gas_price,
+            'nonce': nonce,
+            'value': value,
+        }
+        if self.chain_id is not None:
+            tx['chainId'] = self.chain_id
+        return self.account.signTransaction(tx).rawTransaction
+
+    async def send(self, to, data, gas, value=0):
+        """ Sign and broadcast a transaction and return its hash """
+        if self.lock is None:
+            # Made here so it belongs to the running event loop
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            if self.nonce is None:
+                self.nonce = await self.node.get_transaction_count(self.address)
+
+            raw = self.sign(to, data, gas, self.nonce, value)
+            try:
+                txhash = await self.node.send_raw_transaction(raw)
+            except Exception:
+                # Maybe the nonce moved under us.  Ask the node again next time.
+                self.nonce = None
+                raise
+
+            self.nonce += 1
+            self.sent += 1
+            return txhash
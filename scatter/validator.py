@@ -0,0 +1,284 @@
+""" Validator agent
+
+Checks the pins of Scatter bids as their Pinned logs come in:
+
+- Each Pinned bid is put on a priority queue by its deadline (getPinned() + getDuration()), so
+  bids about to be paid out are checked first.
+- A fixed number of workers take bids off the queue and ask IPFS for the file.  Checks of one
+  hoster's pins are started at most once every hoster_interval seconds, so one hoster with many
+  pins can't take up every worker or get us throttled by their node.
+- Verdicts are coalesced into validateMany() transactions of up to batch_size bids, sent once a
+  batch is full or every batch_interval seconds.
+
+Bids paid out (HosterPaid) before their verdict is sent are dropped from the batch.
+validateMany() skips closed and already validated bids instead of reverting, but a batch can
+still revert (out of gas, a ban).  Each batch waits on its receipt, and a reverted batch is split
+in half and both halves are sent again, down to single bids, so one bad verdict can't lose the
+rest of its batch.
+
+    python -m scatter.validator --network geth --scatter 0x... --abi Scatter.abi \\
+        --bid-store-abi BidStore.abi
+
+The private key comes from SCATTER_VALIDATOR_KEY.
+"""
+import argparse
+import asyncio
+import json
+import os
+from collections import namedtuple
+from .abi import ContractABI, EventDecoder
+from .ipfs import IPFSClient
+from .node import node_from_network
+from .signer import Signer
+
+KEY_ENV = 'SCATTER_VALIDATOR_KEY'
+
+DEFAULT_WORKERS = 16
+DEFAULT_HOSTER_INTERVAL = 1.0
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_INTERVAL = 15
+DEFAULT_CHECK_TIMEOUT = 30
+DEFAULT_BASE_GAS = 100000
+# Storing a validation, plus a payout for bids past their duration
+DEFAULT_GAS_PER_BID = 200000
+DEFAULT_RECEIPT_INTERVAL = 1.0
+DEFAULT_RECEIPT_TIMEOUT = 300
+
+Check = namedtuple('Check', [
+    'deadline',
+    'bid_id',
+    'hoster',
+    'file_hash',
+])
+
+
+class Validator(object):
+    """ Checks pins with a bounded pool of workers and sends verdicts in batches """
+
+    def __init__(self, node, signer, scatter_address, scatter_abi, bid_store_abi, ipfs,
+                 bid_store_address=None, workers=DEFAULT_WORKERS,
+                 hoster_interval=DEFAULT_HOSTER_INTERVAL, batch_size=DEFAULT_BATCH_SIZE,
+                 batch_interval=DEFAULT_BATCH_INTERVAL, check_timeout=DEFAULT_CHECK_TIMEOUT,
+                 base_gas=DEFAULT_BASE_GAS, gas_per_bid=DEFAULT_GAS_PER_BID,
+                 receipt_interval=DEFAULT_RECEIPT_INTERVAL,
+                 receipt_timeout=DEFAULT_RECEIPT_TIMEOUT):
+        self.node = node
+        self.signer = signer
+        self.scatter_address = scatter_address
+        self.bid_store_address = bid_store_address
+        self.ipfs = ipfs
+        self.workers = workers
+        self.hoster_interval = hoster_interval
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.check_timeout = check_timeout
+        self.base_gas = base_gas
+        self.gas_per_bid = gas_per_bid
+        self.receipt_interval = receipt_interval
+        self.receipt_timeout = receipt_timeout
+
+        scatter_functions = ContractABI(scatter_abi)
+        self.validate_many_fn = scatter_functions.function('validateMany', 2)
+        self.bid_store_fn = scatter_functions.function('bidStore', 0)
+        bid_store_functions = ContractABI(bid_store_abi)
+        self.get_pinned_fn = bid_store_functions.function('getPinned', 1)
+        self.get_duration_fn = bid_store_functions.function('getDuration', 1)
+        self.has_validated_fn = bid_store_functions.function('hasValidated', 2)
+        self.decoder = EventDecoder(scatter_abi, ('Pinned', 'HosterPaid', 'ValidationOcurred'))
+
+        self.seen = set()
+        self.closed = set()
+        self.verdicts = {}
+        self.next_check = {}
+        # Bid IDs per validateMany() mined without a revert
+        self.batches = []
+        # Bid IDs per validateMany() that reverted
+        self.reverted = []
+        self.validated = {}
+        self.errors = []
+        self.queue = None
+        self.batch_full = None
+
+    async def call(self, to, fn, args):
+        return fn.decode(await self.node.call(to, fn.encode(args)))
+
+    async def run(self, from_block=None):
+        """ Follow the Scatter logs, starting at from_block if given """
+        if self.bid_store_address is None:
+            self.bid_store_address = await self.call(self.scatter_address, self.bid_store_fn, [])
+
+        # Made here so they belong to the running event loop
+        self.queue = asyncio.PriorityQueue()
+        self.batch_full = asyncio.Event()
+        tasks = [asyncio.ensure_future(self.work()) for _ in range(self.workers)]
+        tasks.append(asyncio.ensure_future(self.submit()))
+        try:
+            async for log in self.node.logs(self.scatter_address, from_block):
+                self.handle(log)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def handle(self, log):
+        decoded = self.decoder.decode(log)
+        if decoded is None or log.get('removed'):
+            return
+        name, args = decoded
+        bid_id = args['bidId']
+
+        if name == 'Pinned':
+            if bid_id not in self.seen and args['hoster'] != self.signer.address:
+                self.seen.add(bid_id)
+                asyncio.ensure_future(self.enqueue(bid_id, args['hoster'], args['fileHash']))
+
+        elif name == 'HosterPaid':
+            self.closed.add(bid_id)
+            self.verdicts.pop(bid_id, None)
+
+        elif name == 'ValidationOcurred' and args['validator'] == self.signer.address:
+            self.validated[bid_id] = args['isValid']
+
+    async def enqueue(self, bid_id, hoster, file_hash):
+        """ Queue a check for a pinned bid by its deadline """
+        try:
+            pinned, duration, validated = await asyncio.gather(
+                self.call(self.bid_store_address, self.get_pinned_fn, [bid_id]),
+                self.call(self.bid_store_address, self.get_duration_fn, [bid_id]),
+                self.call(self.bid_store_address, self.has_validated_fn, [
+                    bid_id,
+                    self.signer.address,
+                ]),
+            )
+        except Exception as err:
+            self.errors.append((bid_id, err))
+            return
+        if not validated:
+            self.queue.put_nowait(Check(pinned + duration, bid_id, hoster, file_hash))
+
+    async def work(self):
+        while True:
+            check = await self.queue.get()
+            try:
+                if check.bid_id not in self.closed:
+                    await self.throttle(check.hoster)
+                    self.verdicts[check.bid_id] = bool(
+                        await self.ipfs.has(check.file_hash, self.check_timeout)
+                    )
+                    if len(self.verdicts) >= self.batch_size:
+                        self.batch_full.set()
+            except Exception as err:
+                self.errors.append((check.bid_id, err))
+            finally:
+                self.queue.task_done()
+
+    async def throttle(self, hoster):
+        """ Wait for this hoster's next check slot """
+        now = asyncio.get_event_loop().time()
+        start = max(now, self.next_check.get(hoster, now))
+        self.next_check[hoster] = start + self.hoster_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def submit(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.batch_full.wait(), self.batch_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.batch_full.clear()
+            await self.flush()
+
+    async def flush(self):
+        """ Send every verdict we have, batch_size bids per transaction """
+        sends = []
+        while self.verdicts:
+            bid_ids = []
+            verdicts = []
+            for bid_id in list(self.verdicts)[:self.batch_size]:
+                verdict = self.verdicts.pop(bid_id)
+                if bid_id not in self.closed:
+                    bid_ids.append(bid_id)
+                    verdicts.append(verdict)
+            if bid_ids:
+                sends.append(self.send_batch(bid_ids, verdicts))
+        await asyncio.gather(*sends)
+
+    async def send_batch(self, bid_ids, verdicts):
+        """ Send one validateMany() and wait on it.  If it reverts, send each half again. """
+        try:
+            txhash = await self.signer.send(
+                self.scatter_address,
+                self.validate_many_fn.encode([bid_ids, verdicts]),
+                self.base_gas + self.gas_per_bid * len(bid_ids),
+            )
+            receipt = await self.wait_for_receipt(txhash)
+        except Exception as err:
+            self.errors.append((bid_ids, err))
+            return
+
+        if receipt['status'] == 1:
+            self.batches.append(bid_ids)
+            return
+
+        self.reverted.append(bid_ids)
+        if len(bid_ids) == 1:
+            self.errors.append((bid_ids, ValueError("validateMany reverted")))
+            return
+
+        # Bids paid out while we waited need no verdict
+        remaining = [(b, v) for b, v in zip(bid_ids, verdicts) if b not in self.closed]
+        half = (len(remaining) + 1) // 2
+        await asyncio.gather(*[
+            self.send_batch([b for b, _ in part], [v for _, v in part])
+            for part in (remaining[:half], remaining[half:]) if part
+        ])
+
+    async def wait_for_receipt(self, txhash):
+        """ Poll for a transaction's receipt until receipt_timeout """
+        waited = 0
+        while True:
+            receipt = await self.node.get_transaction_receipt(txhash)
+            if receipt is not None:
+                return receipt
+            if waited >= self.receipt_timeout:
+                raise asyncio.TimeoutError("No receipt for {}".format(txhash))
+            await asyncio.sleep(self.receipt_interval)
+            waited += self.receipt_interval
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate the pins of Scatter bids')
+    parser.add_argument('--network', required=True,
+                        help='websocket or IPC network in networks.yml')
+    parser.add_argument('--scatter', required=True, help='Scatter contract address')
+    parser.add_argument('--abi', required=True, help='Scatter ABI JSON file')
+    parser.add_argument('--bid-store-abi', required=True, help='BidStore ABI JSON file')
+    parser.add_argument('--ipfs', default='http://127.0.0.1:5001', help='IPFS API URL')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--hoster-interval', type=float, default=DEFAULT_HOSTER_INTERVAL)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--chain-id', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.abi) as abi_file:
+        abi = json.load(abi_file)
+    with open(args.bid_store_abi) as abi_file:
+        bid_store_abi = json.load(abi_file)
+
+    node = node_from_network(args.network)
+    validator = Validator(
+        node,
+        Signer(node, os.environ[KEY_ENV], args.chain_id),
+        args.scatter,
+        abi,
+        bid_store_abi,
+        IPFSClient(args.ipfs),
+        workers=args.workers,
+        hoster_interval=args.hoster_interval,
+        batch_size=args.batch_size,
+    )
+    asyncio.get_event_loop().run_until_complete(validator.run())
+
+
+if __name__ == '__main__':
+    main()
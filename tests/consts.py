@@ -11,6 +11,8 @@ ENV_CONTRACT_NAME = 'Env'
 ROUTER_CONTRACT_NAME = 'Router'
 REGISTER_CONTRACT_NAME = 'Register'
 USER_STORE_CONTRACT_NAME = 'UserStore'
+CHALLENGE_CONTRACT_NAME = 'Challenge'
+CHALLENGE_STORE_CONTRACT_NAME = 'ChallengeStore'
 
 STD_GAS = int(1e5)
 STD_GAS_PRICE = int(3e9)
@@ -33,3 +35,7 @@ ENV_ACCEPT_WAIT = Web3.sha3(text='acceptHoldDuration')
 ENV_DEFAULT_MIN_VALIDATIONS = Web3.sha3(text='defaultMinValidations')
 ENV_MIN_DURATION = Web3.sha3(text='minDuration')
 ENV_MIN_BID = Web3.sha3(text='minBid')
+ENV_MAX_LOSSES = Web3.sha3(text='maxLosses')
+
+# Seconds to wait on an agent in tests
+WAIT_TIMEOUT = 30
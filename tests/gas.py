@@ -0,0 +1,207 @@
+""" Gas measurement helpers for the benchmark and regression tests """
+import os
+import json
+
+BENCH_ENV = 'SCATTER_BENCH'
+BENCH_OUT_ENV = 'SCATTER_BENCH_OUT'
+BENCH_SIZES = (1, 100, 1000, 10000)
+DEFAULT_BENCH_OUT = 'gas-benchmark.json'
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gas-baseline.json')
+GAS_THRESHOLD_ENV = 'SCATTER_GAS_THRESHOLD'
+GAS_UPDATE_ENV = 'SCATTER_GAS_UPDATE'
+DEFAULT_GAS_THRESHOLD = 2.0  # percent
+
+
+def bench_sizes():
+    """ Return the benchmark sizes enabled by the SCATTER_BENCH env var.
+
+    SCATTER_BENCH is the largest N to run, e.g. SCATTER_BENCH=1000 runs 1, 100 and 1000.  An
+    empty list means benchmarks are disabled.
+    """
+    max_size = os.environ.get(BENCH_ENV)
+    if not max_size:
+        return []
+    return [n for n in BENCH_SIZES if n <= int(max_size)]
+
+
+def gas_threshold():
+    """ Return the allowed gas increase in percent, from SCATTER_GAS_THRESHOLD """
+    return float(os.environ.get(GAS_THRESHOLD_ENV, DEFAULT_GAS_THRESHOLD))
+
+
+def send(web3, contract_fn, tx):
+    """ Send a transaction and return its receipt """
+    txhash = contract_fn.transact(tx)
+    receipt = web3.eth.waitForTransactionReceipt(txhash)
+    assert receipt.status == 1, "Transaction failed. Receipt: {}".format(receipt)
+    return receipt
+
+
+def chunks(items, size):
+    """ Split a list into lists of at most size items """
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def result_key(result):
+    """ Name a result as Contract.function or Contract.function[scenario] """
+    key = '{}.{}'.format(result['contract'], result['function'])
+    if result.get('scenario'):
+        key += '[{}]'.format(result['scenario'])
+    return key
+
+
+def load_baseline(path=BASELINE_PATH):
+    """ Load the committed {result key: gasUsed} baseline """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file).get('gasUsed', {})
+
+
+def write_baseline(gas_used, path=BASELINE_PATH):
+    """ Replace the committed baseline """
+    with open(path, 'w') as baseline_file:
+        json.dump({'gasUsed': gas_used}, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+    return path
+
+
+def compare(baseline, current, threshold):
+    """ Compare current gas figures against the baseline.
+
+    Returns a row per key with a status of ok, regressed, improved, new or missing.  A key
+    regresses when it uses more than threshold percent over the baseline.
+    """
+    rows = []
+    for key in sorted(set(baseline) | set(current)):
+        base = baseline.get(key)
+        now = current.get(key)
+        row = {'key': key, 'baseline': base, 'current': now, 'diff': None, 'percent': None}
+
+        if base is None:
+            row['status'] = 'new'
+        elif now is None:
+            row['status'] = 'missing'
+        else:
+            row['diff'] = now - base
+            row['percent'] = row['diff'] * 100.0 / base if base else 0.0
+            if row['percent'] > threshold:
+                row['status'] = 'regressed'
+            elif row['diff'] < 0:
+                row['status'] = 'improved'
+            else:
+                row['status'] = 'ok'
+
+        rows.append(row)
+    return rows
+
+
+def format_rows(rows):
+    """ Align a list of rows of strings into a plain text table """
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return '\n'.join(
+        '  '.join(col.ljust(widths[i]) for i, col in enumerate(row)).rstrip() for row in rows
+    )
+
+
+def diff_table(rows):
+    """ Format the output of compare() as a plain text table """
+    def fmt(value, pattern='{}'):
+        return '-' if value is None else pattern.format(value)
+
+    table = [['function', 'baseline', 'current', 'diff', '%', 'status']]
+    for row in rows:
+        table.append([
+            row['key'],
+            fmt(row['baseline']),
+            fmt(row['current']),
+            fmt(row['diff'], '{:+d}'),
+            fmt(row['percent'], '{:+.2f}'),
+            row['status'],
+        ])
+    return format_rows(table)
+
+
+class GasReport(object):
+    """ Collects gasUsed by contract, function and scenario """
+
+    def __init__(self):
+        self.results = []
+
+    def record(self, contract, function, gas, n=None, scenario=None):
+        """ Record the gas used by one call """
+        self.results.append({
+            'contract': contract,
+            'function': function,
+            'scenario': scenario,
+            'n': n,
+            'gasUsed': gas,
+        })
+
+    def record_receipt(self, contract, function, receipt, n=None, scenario=None):
+        """ Record the gasUsed of a mined transaction """
+        assert receipt.status == 1, "{}.{} failed. Receipt: {}".format(
+            contract,
+            function,
+            receipt,
+        )
+        self.record(contract, function, receipt.gasUsed, n, scenario)
+
+    def curves(self):
+        """ Return {result key: [[n, gasUsed], ...]} for results recorded with n """
+        curves = {}
+        for res in self.results:
+            if res['n'] is None:
+                continue
+            key = result_key(res)
+            curves.setdefault(key, []).append([res['n'], res['gasUsed']])
+        for points in curves.values():
+            points.sort()
+        return curves
+
+    def growth(self):
+        """ Return the gas added per 1,000 extra N for every curve with more than one point """
+        growth = {}
+        for key, points in self.curves().items():
+            if len(points) < 2 or points[-1][0] == points[0][0]:
+                continue
+            (first_n, first_gas), (last_n, last_gas) = points[0], points[-1]
+            growth[key] = (last_gas - first_gas) * 1000 / (last_n - first_n)
+        return growth
+
+    def table(self):
+        """ Format the curves as a plain text table """
+        curves = self.curves()
+        growth = self.growth()
+        sizes = sorted(set(n for points in curves.values() for n, _ in points))
+
+        header = ['function'] + ['n={}'.format(n) for n in sizes] + ['gas/1k n']
+        rows = [header]
+        for key in sorted(curves):
+            by_n = dict(curves[key])
+            row = [key] + [str(by_n.get(n, '-')) for n in sizes]
+            row.append('{:.0f}'.format(growth[key]) if key in growth else '-')
+            rows.append(row)
+
+        return format_rows(rows)
+
+    def snapshot(self):
+        """ Return {result key: gasUsed} for use with compare() """
+        return dict((result_key(res), res['gasUsed']) for res in self.results)
+
+    def to_dict(self):
+        return {
+            'results': self.results,
+            'curves': self.curves(),
+            'growth_per_1k': self.growth(),
+        }
+
+    def write(self, path=None):
+        """ Write the report as JSON, to SCATTER_BENCH_OUT by default """
+        if path is None:
+            path = os.environ.get(BENCH_OUT_ENV, DEFAULT_BENCH_OUT)
+        with open(path, 'w') as out:
+            json.dump(self.to_dict(), out, indent=2, sort_keys=True)
+        return path
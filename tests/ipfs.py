@@ -0,0 +1,28 @@
+""" A local stand-in for an IPFS node
+
+Agents only use pin() and has(), so this keeps a set of file hashes that are "on the network".
+"""
+import asyncio
+
+
+class LocalIPFS(object):
+    """ Files are available once added, and pins take delay seconds """
+
+    def __init__(self, files=None, delay=0):
+        self.files = set(bytes(f) for f in files or [])
+        self.delay = delay
+        self.pinned = []
+        self.checked = []
+
+    def add(self, file_hash):
+        self.files.add(bytes(file_hash))
+
+    async def pin(self, file_hash):
+        await asyncio.sleep(self.delay)
+        self.pinned.append(bytes(file_hash))
+        return bytes(file_hash) in self.files
+
+    async def has(self, file_hash, timeout=None):
+        await asyncio.sleep(self.delay)
+        self.checked.append(bytes(file_hash))
+        return bytes(file_hash) in self.files
@@ -0,0 +1,94 @@
+""" A local JSON-RPC HTTP endpoint for the test chain
+
+The eth_tester chain is only reachable in process.  RPCServer serves it over HTTP, with batch
+requests and keep-alive connections, so HTTP clients can be tested and benchmarked against it.
+It counts HTTP requests (round trips), JSON-RPC requests and connections.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def to_json(value):
+    """ JSON default for what web3 results contain """
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    if hasattr(value, 'items'):
+        return dict(value.items())
+    raise TypeError("Can't serialize {!r}".format(value))
+
+
+class RPCServer(object):
+    """ Serve a web3 instance over HTTP on a random local port """
+
+    def __init__(self, web3):
+        self.web3 = web3
+        self.round_trips = 0
+        self.requests = 0
+        self.connections = 0
+        # A thread per connection so open keep-alive connections don't block shutdown.  The
+        # chain itself is used from one thread at a time.
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def uri(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def handle(self, request):
+        self.requests += 1
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        try:
+            response['result'] = self.web3.manager.request_blocking(
+                request['method'],
+                request.get('params', []),
+            )
+        except Exception as err:
+            response['error'] = {'code': -32000, 'message': str(err)}
+        return response
+
+    def handler(self):
+        rpc = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def setup(self):
+                with rpc.lock:
+                    rpc.connections += 1
+                super().setup()
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with rpc.lock:
+                    rpc.round_trips += 1
+                    if isinstance(payload, list):
+                        response = [rpc.handle(request) for request in payload]
+                    else:
+                        response = rpc.handle(payload)
+
+                body = json.dumps(response, default=to_json).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def reset(self):
+        self.round_trips = 0
+        self.requests = 0
+        self.connections = 0
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
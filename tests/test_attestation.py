@@ -0,0 +1,143 @@
+""" Tests for validator attestations relayed with Scatter.attest() """
+from scatter.attestation import (
+    Attestation,
+    attest_args,
+    attestation_hash,
+    claim_args,
+    leaf,
+    merkle_root,
+    order,
+    sign_attestation,
+)
+from .gas import send
+from .test_challenge import VALIDATION_POOL, make_bid
+from .utils import (
+    funded_account,
+    get_accounts,
+    get_event,
+    has_event,
+    send_signed,
+    signed_tx_failed,
+    time_travel,
+    tx_failed,
+)
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    DURATION_1,
+)
+
+VERDICTS = (True, True, False, True, False)
+
+
+def pinned_bid(web3, scatter, bidder, hoster):
+    bid_id = make_bid(web3, scatter, bidder)
+    send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+    return bid_id
+
+
+def sign_all(scatter, bid_id, validators):
+    """ Each validator's signed verdict, in the order attest() takes them """
+    return order([
+        Attestation(
+            validator.address,
+            verdict,
+            sign_attestation(scatter.address, bid_id, verdict, validator.privateKey),
+        )
+        for validator, verdict in zip(validators, VERDICTS)
+    ])
+
+
+def test_attest(web3, contracts):
+    """ One transaction stores the tally and the root and pays the bid out, and validators claim
+    with a Merkle proof
+    """
+    _, bidder, hoster, relayer, validator, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    bid_id = pinned_bid(web3, scatter, bidder, hoster)
+    validators = [funded_account(web3) for _ in VERDICTS]
+    attestations = sign_all(scatter, bid_id, validators)
+
+    assert scatter.functions.attestationHash(bid_id, True).call() \
+        == attestation_hash(scatter.address, bid_id, True)
+
+    # The root closes the bid to validate(), so it can't go in before the bid can be paid out
+    assert tx_failed(web3, scatter.functions.attest(*attest_args(bid_id, attestations)), {
+        'from': relayer,
+        'gas': int(2e6),
+    }), "Attesting before the duration passed should fail"
+
+    time_travel(web3, DURATION_1 + 1)
+
+    # Out of order, or the same validator twice
+    assert tx_failed(web3, scatter.functions.attest(*attest_args(bid_id, attestations[::-1])), {
+        'from': relayer,
+        'gas': int(2e6),
+    }), "Unsorted attestations should fail"
+    assert tx_failed(web3, scatter.functions.attest(*attest_args(
+        bid_id,
+        attestations[:1] * 2,
+    )), {
+        'from': relayer,
+        'gas': int(2e6),
+    }), "Duplicate attestations should fail"
+
+    receipt = send(web3, scatter.functions.attest(*attest_args(bid_id, attestations)), {
+        'from': relayer,
+        'gas': int(2e6),
+    })
+    print('attest() gas per validation: {}'.format(receipt.gasUsed // len(attestations)))
+
+    root = merkle_root([leaf(i, att.validator, att.verdict) for i, att in enumerate(attestations)])
+    attested = get_event(scatter, 'Attested', receipt).args
+    assert attested.root == root
+    assert (attested.validCount, attested.invalidCount) == (3, 2)
+    assert has_event(scatter, 'ValidationOcurred', receipt)
+    assert get_event(scatter, 'HosterPaid', receipt).args.bidId == bid_id
+
+    assert bidStore.functions.getAttestationRoot(bid_id).call() == root
+    assert bidStore.functions.getAttestationCount(bid_id).call() == len(attestations)
+    assert bidStore.functions.getValidationTally(bid_id).call()[:2] == [3, 2]
+    assert bidStore.functions.getValidationCount(bid_id).call() == 0
+
+    share = VALIDATION_POOL // len(VERDICTS)
+    assert bidStore.functions.getValidatorShare(bid_id).call() == [share, len(VERDICTS)]
+
+    # Attestations go in once, and replace validate() for the bid
+    assert tx_failed(web3, scatter.functions.attest(*attest_args(bid_id, attestations)), {
+        'from': relayer,
+        'gas': int(2e6),
+    }), "Attesting twice should fail"
+    assert tx_failed(web3, scatter.functions.validate(bid_id), {
+        'from': validator,
+        'gas': int(1e6),
+    }), "validate() after attest() should fail"
+
+    # A proof for the wrong verdict doesn't match the root
+    lying = claim_args(bid_id, attestations, validators[0].address)
+    assert signed_tx_failed(web3, validators[0], scatter.functions.claimAttestation(
+        bid_id,
+        lying[1],
+        not lying[2],
+        lying[3],
+    ))
+
+    for validator in validators:
+        args = claim_args(bid_id, attestations, validator.address)
+        receipt = send_signed(web3, validator, scatter.functions.claimAttestation(*args))
+        assert receipt.status == 1, "claimAttestation() failed"
+        assert get_event(scatter, 'Claimed', receipt).args.value == share
+        assert scatter.functions.balance(validator.address).call() == share
+        assert bidStore.functions.isAttestationClaimed(bid_id, args[1]).call()
+
+    # Claims are paid once
+    args = claim_args(bid_id, attestations, validators[0].address)
+    receipt = send_signed(web3, validators[0], scatter.functions.claimAttestation(*args))
+    assert not has_event(scatter, 'Claimed', receipt)
+    assert scatter.functions.balance(validators[0].address).call() == share
+
+    # Someone else can't use another validator's proof
+    outsider = funded_account(web3)
+    assert signed_tx_failed(web3, outsider, scatter.functions.claimAttestation(*args))
@@ -6,14 +6,17 @@ The general process for bid storage:
 
 1) ...
 """
+import pytest
 from datetime import datetime
 from .utils import (
+    REVERT_ERRORS,
     get_accounts,
     std_tx,
     has_event,
     get_event,
     event_topics,
     normalize_filehash,
+    tx_failed,
 )
 from .consts import (
     ZERO_ADDRESS,
@@ -123,6 +126,26 @@ def test_add_bid(web3, contracts):
     assert bidStore.functions.getBidAmount(0).call() == bidValue
     assert bidStore.functions.getValidationCount(0).call() == 0
 
+    # New bids land in the open queue
+    assert bidStore.functions.getOpenBidCount().call() == 1
+    assert bidStore.functions.getFirstOpenBid().call() == 0
+    assert bidStore.functions.getNextOpenBid(0).call() == -1
+
+    # Values too large for the packed Bid are refused
+    assert tx_failed(web3, bidStore.functions.addBid(
+        bidder,
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        2**128,
+        validationPool,
+        minValidations,
+        duration
+    ), std_tx({
+        'from': sAddress,
+        'gas': int(1e6)
+    })), "oversized bidValue should fail"
+    assert bidStore.functions.bidCount().call() == 1
+
 
 def test_add_validation(web3, contracts):
     """ Test a simple addBid """
@@ -155,6 +178,9 @@ def test_add_validation(web3, contracts):
     assert bidStore.functions.getValidationIsValid(BID_ID, 0).call()
     assert bidStore.functions.getValidator(BID_ID, 0).call() == validator1
     assert bidStore.functions.getValidatorIndex(BID_ID, validator1).call() == 0
+    assert bidStore.functions.hasValidated(BID_ID, validator1).call()
+    assert not bidStore.functions.hasValidated(BID_ID, validator2).call()
+    assert bidStore.functions.getValidatorIndex(BID_ID, validator2).call() == 2**256 - 1
 
     # Add a negative validation
     txhash = bidStore.functions.addValidation(BID_ID, validator2, False).transact(std_tx({
@@ -192,6 +218,9 @@ def test_add_validation(web3, contracts):
     assert bidStore.functions.getValidator(BID_ID, 2).call() == validator3
     assert bidStore.functions.getValidatorIndex(BID_ID, validator3).call() == 2
 
+    # Running tally of valid/invalid validations and minValidations
+    assert bidStore.functions.getValidationTally(BID_ID).call() == [2, 1, 2]
+
     assert bidStore.functions.setValidatorPaid(BID_ID, 0).transact(std_tx({
             'from': sAddress,
             'gas': AV_GAS,
@@ -241,6 +270,8 @@ def test_pinning(web3, contracts):
     assert orig_count > 0
     bidId = orig_count - 1
     assert bidStore.functions.bidExists(bidId).call()
+    orig_open_count = bidStore.functions.getOpenBidCount().call()
+    assert orig_open_count > 0
 
     # Verify it's untouched
     assert bidStore.functions.getAccepted(bidId).call() == 0
@@ -259,6 +290,11 @@ def test_pinning(web3, contracts):
     assert bidStore.functions.getPinned(bidId).call() == 0
     assert bidStore.functions.getHoster(bidId).call() == hoster
 
+    # Accepted bids are moved to the back of the open queue
+    assert bidStore.functions.getOpenBidCount().call() == orig_open_count
+    assert bidStore.functions.getFirstOpenBid().call() != bidId
+    assert bidStore.functions.getNextOpenBid(bidId).call() == -1
+
     # Set pin
     accept_hash = bidStore.functions.setPinned(bidId, otherHoster).transact(std_tx({
             'from': sAddress
@@ -271,9 +307,123 @@ def test_pinning(web3, contracts):
     assert bidStore.functions.getPinned(bidId).call() > int(datetime.now().timestamp()) - 60 * 5
     assert bidStore.functions.getHoster(bidId).call() == otherHoster
 
+    # The whole lifecycle state in one call
+    (
+        state_bidder,
+        state_hoster,
+        state_file_hash,
+        state_file_size,
+        state_accepted,
+        state_pinned,
+        state_duration,
+        state_paid,
+    ) = bidStore.functions.getBidState(bidId).call()
+    assert state_bidder == bidder
+    assert state_hoster == otherHoster
+    assert normalize_filehash(state_file_hash) == FILE_HASH_1
+    assert state_file_size == FILE_SIZE_1
+    assert state_accepted == bidStore.functions.getAccepted(bidId).call()
+    assert state_pinned == bidStore.functions.getPinned(bidId).call()
+    assert state_duration == duration
+    assert state_paid is False
+
+    # Pinned bids are no longer open
+    assert bidStore.functions.getOpenBidCount().call() == orig_open_count - 1
+    assert bidStore.functions.getFirstOpenBid().call() != bidId
+
     # Set Scatter back so other tests don't fail
     txhash = bidStore.functions.setScatter(scatter.address).transact(std_tx({
             'from': admin
         }))
     receipt = web3.eth.waitForTransactionReceipt(txhash)
     assert receipt.status == 1
+
+
+def test_bulk_reads(web3, contracts):
+    """ Test the paginated range views """
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    bid_count = bidStore.functions.getBidCount().call()
+    assert bid_count > 1
+
+    # getBids matches the single bid getter
+    page = bidStore.functions.getBids(0, 2).call()
+    assert len(page) == 7, "Unexpected return values"
+    assert all(len(column) == 2 for column in page)
+    for i in range(2):
+        assert [column[i] for column in page] == bidStore.functions.getBid(i).call()
+
+    # Pages are clipped to the bid count
+    page = bidStore.functions.getBids(bid_count - 1, 10).call()
+    assert all(len(column) == 1 for column in page)
+    page = bidStore.functions.getBids(bid_count, 10).call()
+    assert all(len(column) == 0 for column in page)
+    page = bidStore.functions.getBids(-1, 10).call()
+    assert all(len(column) == 0 for column in page)
+
+    # getBidStates matches the single state getter
+    hosters, accepted, pinned, paid, valid, invalid = bidStore.functions.getBidStates(
+        0,
+        bid_count
+    ).call()
+    assert len(hosters) == bid_count
+    for i in range(bid_count):
+        state = bidStore.functions.getBidState(i).call()
+        assert hosters[i] == state[1]
+        assert accepted[i] == state[4]
+        assert pinned[i] == state[5]
+        assert paid[i] == state[7]
+        assert [valid[i], invalid[i]] == bidStore.functions.getValidationTally(i).call()[:2]
+
+    # getValidations matches the single validation getter
+    validation_count = bidStore.functions.getValidationCount(0).call()
+    assert validation_count >= 3
+    whens, validators, is_valids, paids = bidStore.functions.getValidations(
+        0,
+        0,
+        validation_count
+    ).call()
+    assert len(whens) == validation_count
+    for i in range(validation_count):
+        assert [
+            whens[i],
+            validators[i],
+            is_valids[i],
+            paids[i],
+        ] == bidStore.functions.getValidation(0, i).call()
+
+    whens, validators, _, _ = bidStore.functions.getValidations(0, 1, 1).call()
+    assert len(whens) == 1
+    assert validators[0] == bidStore.functions.getValidator(0, 1).call()
+    whens, _, _, _ = bidStore.functions.getValidations(0, validation_count, 10).call()
+    assert len(whens) == 0
+
+    # Walk the open queue one bid at a time
+    open_ids = []
+    cursor = -1
+    while True:
+        bid_ids, bidders, file_hashes, _, _, cursor = bidStore.functions.getOpenBids(
+            cursor,
+            1
+        ).call()
+        assert len(bid_ids) <= 1
+        for i, bid_id in enumerate(bid_ids):
+            assert bidders[i] == bidStore.functions.getBidder(bid_id).call()
+            assert file_hashes[i] == bidStore.functions.getFileHash(bid_id).call()
+        open_ids.extend(bid_ids)
+        if cursor == -1:
+            break
+
+    assert len(open_ids) == bidStore.functions.getOpenBidCount().call()
+    assert open_ids[0] == bidStore.functions.getFirstOpenBid().call()
+    assert all(not bidStore.functions.isPinned(bid_id).call() for bid_id in open_ids)
+
+    # One page gets the whole queue
+    bid_ids, _, _, _, _, cursor = bidStore.functions.getOpenBids(-1, bid_count).call()
+    assert bid_ids == open_ids
+    assert cursor == -1
+
+    # An empty page has no cursor to hand back
+    assert len(open_ids) > 0
+    with pytest.raises(REVERT_ERRORS):
+        bidStore.functions.getOpenBids(-1, 0).call()
@@ -0,0 +1,373 @@
+""" Tests for the Challenge and ChallengeStore contracts """
+import os
+import tempfile
+import pytest
+from web3 import Web3
+from scatter.attestation import split_signature
+from scatter.prover import (
+    chunk_range,
+    defense_hash,
+    proof_hash,
+    prove,
+    read_chunk,
+    sign_defense,
+)
+from .gas import send
+from .utils import (
+    funded_account,
+    get_accounts,
+    get_event,
+    has_event,
+    send_signed,
+    signed_tx_failed,
+    time_travel,
+    tx_failed,
+)
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    ENV_CONTRACT_NAME,
+    CHALLENGE_CONTRACT_NAME,
+    CHALLENGE_STORE_CONTRACT_NAME,
+    ROUTER_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+    ENV_MAX_LOSSES,
+)
+
+BID_VALUE = int(1e16)
+VALIDATION_POOL = int(1e14)
+STAKE = BID_VALUE // 2
+DEFEND_DURATION = 60 * 60 * 24
+
+
+@pytest.fixture
+def data_file():
+    with tempfile.NamedTemporaryFile() as tmp:
+        tmp.write(os.urandom(FILE_SIZE_1))
+        tmp.flush()
+        yield tmp.name
+
+
+def make_bid(web3, scatter, bidder):
+    receipt = send(web3, scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        DURATION_1,
+        BID_VALUE,
+        VALIDATION_POOL
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': BID_VALUE + VALIDATION_POOL,
+    })
+    return get_event(scatter, 'BidSuccessful', receipt).args.bidId
+
+
+def chunk_hash(path, seed, account):
+    """ The uniqueHash of account's chunk of the file for a seed """
+    start, size = chunk_range(seed, account.address, os.path.getsize(path))
+    return Web3.sha3(primitive=read_chunk(path, start, size))
+
+
+def signed_proof(challenge, bid_id, account, path, seed):
+    """ (uniqueHash, v, r, s) for prove() on a bid, signed by account """
+    proof = prove(path, seed, account.privateKey, challenge.address, bid_id)
+    return (proof.unique_hash,) + split_signature(proof.signature)
+
+
+def signed_defense(challenge, opened, account, unique_hash):
+    """ (uniqueHash, v, r, s) answering an opened challenge, signed by account """
+    signature = sign_defense(
+        challenge.address,
+        opened.challengeId,
+        opened.seed,
+        unique_hash,
+        account.privateKey,
+    )
+    return (unique_hash,) + split_signature(signature)
+
+
+def open_challenge(web3, challenge, challenger, bid_id, defendant):
+    receipt = send_signed(web3, challenger, challenge.functions.challenge(bid_id, defendant))
+    assert receipt.status == 1, "challenge() failed"
+    return get_event(challenge, 'ChallengeOpened', receipt).args
+
+
+def test_challenge_references(web3, contracts):
+    """ Challenge and ChallengeStore are registered and point at each other """
+    router = contracts.get(ROUTER_CONTRACT_NAME)
+    challenge = contracts.get(CHALLENGE_CONTRACT_NAME)
+    challengeStore = contracts.get(CHALLENGE_STORE_CONTRACT_NAME)
+
+    assert router.functions.get(web3.sha3(text='Challenge')).call() == challenge.address
+    assert router.functions.get(web3.sha3(text='ChallengeStore')).call() \
+        == challengeStore.address
+    assert challenge.functions.challengeStore().call() == challengeStore.address
+    assert challengeStore.functions.challengeAddress().call() == challenge.address
+
+
+def test_challenge(web3, contracts, data_file):
+    """ A mediated challenge moves the loser's stake to the winner and the mediator """
+    _, bidder, hoster, _, mediator, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    challenge = contracts.get(CHALLENGE_CONTRACT_NAME)
+    challengeStore = contracts.get(CHALLENGE_STORE_CONTRACT_NAME)
+
+    # Mediators are validators of the bid
+    bid_id = make_bid(web3, scatter, bidder)
+    send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+    send(web3, scatter.functions.validate(bid_id), {'from': mediator, 'gas': int(1e6)})
+    hoster_a, hoster_b, hoster_c = [funded_account(web3) for _ in range(3)]
+
+    # Stakes have to be half the bid value, and there are two spots
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.stake(bid_id), {'value': STAKE - 1})
+    for hoster in (hoster_a, hoster_b):
+        receipt = send_signed(web3, hoster, challenge.functions.stake(bid_id), {'value': STAKE})
+        assert receipt.status == 1, "stake() failed"
+    assert signed_tx_failed(web3, hoster_c, challenge.functions.stake(bid_id), {'value': STAKE})
+
+    assert challengeStore.functions.getBidStakes(bid_id).call()[:2] == [
+        hoster_a.address,
+        hoster_b.address,
+    ]
+
+    # The first proof for the bid, relayed by someone else
+    seed = web3.eth.getBlock(web3.eth.blockNumber).hash
+    proof = signed_proof(challenge, bid_id, hoster_a, data_file, seed)
+    assert challenge.functions.proofHash(bid_id, proof[0]).call() \
+        == proof_hash(challenge.address, bid_id, proof[0])
+    send(web3, challenge.functions.prove(bid_id, *proof), {
+        'from': bidder,
+        'gas': int(1e6),
+    })
+    assert challengeStore.functions.getStake(bid_id, hoster_a.address).call()[3] == proof[0]
+
+    # Only staked hosters can challenge
+    assert signed_tx_failed(web3, hoster_c, challenge.functions.challenge(
+        bid_id,
+        hoster_b.address,
+    ))
+    opened = open_challenge(web3, challenge, hoster_a, bid_id, hoster_b.address)
+    challenge_id = opened.challengeId
+    assert opened.seed != b'\x00' * 32
+
+    # One challenge at a time
+    assert signed_tx_failed(web3, hoster_b, challenge.functions.challenge(
+        bid_id,
+        hoster_a.address,
+    ))
+
+    # Both answer.  hoster_b doesn't have the file.
+    answer_a = chunk_hash(data_file, opened.seed, hoster_a)
+    answer_b = Web3.sha3(text='not the chunk')
+    assert challenge.functions.defenseHash(challenge_id, answer_a).call() \
+        == defense_hash(challenge.address, challenge_id, opened.seed, answer_a)
+    send(web3, challenge.functions.defend(
+        challenge_id,
+        *signed_defense(challenge, opened, hoster_a, answer_a)
+    ), {
+        'from': bidder,
+        'gas': int(1e6),
+    })
+    assert tx_failed(web3, challenge.functions.settle(challenge_id), {
+        'from': bidder,
+        'gas': int(1e6),
+    }), "settle() before the defend window passed should fail"
+    send(web3, challenge.functions.defend(
+        challenge_id,
+        *signed_defense(challenge, opened, hoster_b, answer_b)
+    ), {
+        'from': bidder,
+        'gas': int(1e6),
+    })
+    assert tx_failed(web3, challenge.functions.defend(
+        challenge_id,
+        *signed_defense(challenge, opened, hoster_b, answer_a)
+    ), {
+        'from': bidder,
+        'gas': int(1e6),
+    }), "Answering twice should fail"
+
+    # The mediator checks the answers against the file
+    assert chunk_hash(data_file, opened.seed, hoster_b) != answer_b
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.mediate(challenge_id, False))
+    assert signed_tx_failed(web3, hoster_c, challenge.functions.mediate(challenge_id, False)), \
+        "Mediating without validating the bid should fail"
+    send(web3, challenge.functions.mediate(challenge_id, False), {
+        'from': mediator,
+        'gas': int(1e6),
+    })
+
+    receipt = send(web3, challenge.functions.settle(challenge_id), {
+        'from': bidder,
+        'gas': int(1e6),
+    })
+    settled = get_event(challenge, 'ChallengeSettled', receipt).args
+    assert settled.winner == hoster_a.address
+    assert settled.loser == hoster_b.address
+    assert settled.value == STAKE
+
+    mediator_cut = STAKE * 20 // 100
+    assert challenge.functions.getBalance(hoster_a.address).call() == STAKE - mediator_cut
+    assert challenge.functions.getBalance(mediator).call() == mediator_cut
+    assert challenge.functions.getBalance(hoster_b.address).call() == 0
+    assert challengeStore.functions.getLosses(hoster_b.address).call() == 1
+    assert not challengeStore.functions.isBanned(hoster_b.address).call()
+    assert challengeStore.functions.getChallenge(challenge_id).call()[4] == 3
+    assert challengeStore.functions.getStake(bid_id, hoster_a.address).call()[2] == 0
+
+    # The loser's spot is open to another hoster
+    receipt = send_signed(web3, hoster_c, challenge.functions.stake(bid_id), {'value': STAKE})
+    assert receipt.status == 1, "stake() failed"
+    assert tx_failed(web3, challenge.functions.settle(challenge_id), {
+        'from': bidder,
+        'gas': int(1e6),
+    }), "Settling twice should fail"
+
+    balance_before = web3.eth.getBalance(mediator)
+    send(web3, challenge.functions.withdraw(), {
+        'from': mediator,
+        'gas': int(1e6),
+        'gasPrice': 0,
+    })
+    assert web3.eth.getBalance(mediator) == balance_before + mediator_cut
+
+
+def test_challenge_unanswered(web3, contracts, data_file):
+    """ Whoever doesn't answer in time loses, too many losses get a hoster banned, and stakes
+    come back once the bid has been paid out and passed validation
+    """
+    admin, bidder, hoster, validator1, validator2, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    env = contracts.get(ENV_CONTRACT_NAME)
+    challenge = contracts.get(CHALLENGE_CONTRACT_NAME)
+    challengeStore = contracts.get(CHALLENGE_STORE_CONTRACT_NAME)
+
+    bid_id = make_bid(web3, scatter, bidder)
+    send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+    send(web3, scatter.functions.validate(bid_id), {'from': validator1, 'gas': int(1e6)})
+
+    hoster_a, hoster_b = funded_account(web3), funded_account(web3)
+    for staker in (hoster_a, hoster_b):
+        send_signed(web3, staker, challenge.functions.stake(bid_id), {'value': STAKE})
+
+    # Only a hoster who proved their stake can challenge
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.challenge(
+        bid_id,
+        hoster_b.address,
+    ))
+    seed = web3.eth.getBlock(web3.eth.blockNumber).hash
+    send_signed(web3, hoster_a, challenge.functions.prove(
+        bid_id,
+        *signed_proof(challenge, bid_id, hoster_a, data_file, seed)
+    ))
+
+    opened = open_challenge(web3, challenge, hoster_a, bid_id, hoster_b.address)
+    answer = chunk_hash(data_file, opened.seed, hoster_a)
+    send_signed(web3, hoster_a, challenge.functions.defend(
+        opened.challengeId,
+        *signed_defense(challenge, opened, hoster_a, answer)
+    ))
+
+    time_travel(web3, DEFEND_DURATION + 1)
+    assert signed_tx_failed(web3, hoster_b, challenge.functions.defend(
+        opened.challengeId,
+        *signed_defense(challenge, opened, hoster_b, answer)
+    )), "Answering after the defend window should fail"
+
+    # One loss is too many with maxLosses at 0
+    orig_max_losses = env.functions.getuint(ENV_MAX_LOSSES).call()
+    send(web3, env.functions.setuint(ENV_MAX_LOSSES, 0), {'from': admin, 'gas': int(1e5)})
+
+    receipt = send_signed(web3, hoster_a, challenge.functions.settle(opened.challengeId))
+    settled = get_event(challenge, 'ChallengeSettled', receipt).args
+    assert (settled.winner, settled.loser) == (hoster_a.address, hoster_b.address)
+    # No mediator, no cut
+    assert challenge.functions.getBalance(hoster_a.address).call() == STAKE
+
+    send(web3, env.functions.setuint(ENV_MAX_LOSSES, orig_max_losses), {
+        'from': admin,
+        'gas': int(1e5),
+    })
+    assert get_event(challenge, 'HosterBanned', receipt).args.hoster == hoster_b.address
+    assert challengeStore.functions.getLosses(hoster_b.address).call() == 1
+    assert challengeStore.functions.isBanned(hoster_b.address).call()
+    assert signed_tx_failed(web3, hoster_b, challenge.functions.stake(make_bid(
+        web3,
+        scatter,
+        bidder,
+    )), {'value': STAKE}), "A banned hoster shouldn't be able to stake"
+
+    # Not until the bid's duration has passed
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.claim(bid_id))
+    time_travel(web3, DURATION_1)
+
+    # ...and the bid has been paid out with enough valid validations
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.claim(bid_id))
+    receipt = send(web3, scatter.functions.validate(bid_id), {
+        'from': validator2,
+        'gas': int(1e6),
+    })
+    assert has_event(scatter, 'HosterPaid', receipt), "Bid was not paid out"
+    assert scatter.functions.satisfied(bid_id).call()
+
+    receipt = send_signed(web3, hoster_a, challenge.functions.claim(bid_id))
+    assert get_event(challenge, 'StakeClaimed', receipt).args.value == STAKE
+    assert challenge.functions.getBalance(hoster_a.address).call() == 2 * STAKE
+    assert signed_tx_failed(web3, hoster_b, challenge.functions.claim(bid_id))
+
+
+def test_challenge_replay(web3, contracts, data_file):
+    """ Signatures can't be replayed on another bid, twice on the same stake or as the
+    defendant's answer
+    """
+    _, bidder, _, _, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    challenge = contracts.get(CHALLENGE_CONTRACT_NAME)
+    challengeStore = contracts.get(CHALLENGE_STORE_CONTRACT_NAME)
+
+    bid_id = make_bid(web3, scatter, bidder)
+    other_bid_id = make_bid(web3, scatter, bidder)
+    hoster_a, hoster_b = funded_account(web3), funded_account(web3)
+    for hoster in (hoster_a, hoster_b):
+        send_signed(web3, hoster, challenge.functions.stake(bid_id), {'value': STAKE})
+    send_signed(web3, hoster_b, challenge.functions.stake(other_bid_id), {'value': STAKE})
+
+    seed = web3.eth.getBlock(web3.eth.blockNumber).hash
+    send_signed(web3, hoster_a, challenge.functions.prove(
+        bid_id,
+        *signed_proof(challenge, bid_id, hoster_a, data_file, seed)
+    ))
+    proved = signed_proof(challenge, bid_id, hoster_b, data_file, seed)
+    receipt = send_signed(web3, hoster_a, challenge.functions.prove(bid_id, *proved))
+    assert receipt.status == 1, "prove() failed"
+
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.prove(bid_id, *proved)), \
+        "Relaying a proof twice should fail"
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.prove(other_bid_id, *proved)), \
+        "A proof signed for another bid should fail"
+    assert challengeStore.functions.getStake(other_bid_id, hoster_b.address).call()[3] \
+        == b'\x00' * 32
+
+    opened = open_challenge(web3, challenge, hoster_a, bid_id, hoster_b.address)
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.defend(
+        opened.challengeId,
+        *proved
+    )), "Replaying a prove() signature into defend() should fail"
+
+    # Neither is an answer signed for another challenge
+    signature = sign_defense(
+        challenge.address,
+        opened.challengeId + 1,
+        opened.seed,
+        proved[0],
+        hoster_b.privateKey,
+    )
+    assert signed_tx_failed(web3, hoster_a, challenge.functions.defend(
+        opened.challengeId,
+        proved[0],
+        *split_signature(signature)
+    )), "An answer for another challenge should fail"
+
+    assert challengeStore.functions.getDefense(opened.challengeId).call()[2] == b'\x00' * 32
@@ -0,0 +1,156 @@
+""" Gas benchmark for the challenge lifecycle
+
+Overview
+--------
+Disabled unless SCATTER_BENCH is set (see gas.py).  For each N in the enabled sizes, the chain is
+topped up to N bids and the defendant to min(N, HISTORY_LIMIT) lost challenges, then one full
+challenge is run on a new bid and gasUsed is printed for each call (run with -s).
+
+Challenge records are fixed size and reached by key, so nothing should cost more as bids and
+losses pile up.  Calls at later sizes can cost less, where a counter the first round set from
+zero is only updated.
+
+    SCATTER_BENCH=10000 sb test -k challenge_benchmark -s
+"""
+import pytest
+from web3 import Web3
+from scatter.attestation import split_signature
+from scatter.prover import sign_proof
+from .gas import bench_sizes, chunks, format_rows, send
+from .test_challenge import BID_VALUE, STAKE, VALIDATION_POOL, make_bid, signed_defense
+from .utils import funded_account, get_accounts, get_event, send_signed
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    ENV_CONTRACT_NAME,
+    CHALLENGE_CONTRACT_NAME,
+    CHALLENGE_STORE_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+    ENV_MAX_LOSSES,
+)
+
+HISTORY_LIMIT = 100
+CALLS = ('stake', 'prove', 'challenge', 'defend', 'mediate', 'settle')
+
+
+def challenge_round(web3, contracts, bidder, hoster, mediator, challenger, defendant):
+    """ Run one mediated challenge the defendant loses on a new bid and return gasUsed by call """
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    challenge = contracts.get(CHALLENGE_CONTRACT_NAME)
+    gas = {}
+
+    # The mediator has to be a validator of the bid
+    bid_id = make_bid(web3, scatter, bidder)
+    send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+    send(web3, scatter.functions.validate(bid_id), {'from': mediator, 'gas': int(1e6)})
+    send_signed(web3, challenger, challenge.functions.stake(bid_id), {'value': STAKE})
+    receipt = send_signed(web3, defendant, challenge.functions.stake(bid_id), {'value': STAKE})
+    gas['stake'] = receipt.gasUsed
+
+    # Only a hoster who proved their stake can challenge
+    answer = Web3.sha3(text='answer')
+    signature = sign_proof(challenge.address, bid_id, answer, challenger.privateKey)
+    receipt = send_signed(web3, challenger, challenge.functions.prove(
+        bid_id,
+        answer,
+        *split_signature(signature)
+    ))
+    gas['prove'] = receipt.gasUsed
+
+    receipt = send_signed(web3, challenger, challenge.functions.challenge(
+        bid_id,
+        defendant.address,
+    ))
+    gas['challenge'] = receipt.gasUsed
+    opened = get_event(challenge, 'ChallengeOpened', receipt).args
+    challenge_id = opened.challengeId
+
+    send_signed(web3, challenger, challenge.functions.defend(
+        challenge_id,
+        *signed_defense(challenge, opened, challenger, answer)
+    ))
+    receipt = send_signed(web3, defendant, challenge.functions.defend(
+        challenge_id,
+        *signed_defense(challenge, opened, defendant, answer)
+    ))
+    gas['defend'] = receipt.gasUsed
+
+    receipt = send(web3, challenge.functions.mediate(challenge_id, False), {
+        'from': mediator,
+        'gas': int(1e6),
+    })
+    gas['mediate'] = receipt.gasUsed
+
+    receipt = send(web3, challenge.functions.settle(challenge_id), {
+        'from': mediator,
+        'gas': int(1e6),
+    })
+    gas['settle'] = receipt.gasUsed
+    return gas
+
+
+@pytest.mark.skipif(not bench_sizes(), reason="SCATTER_BENCH is not set")
+def test_challenge_benchmark(web3, contracts):
+    admin, bidder, hoster, _, mediator, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    env = contracts.get(ENV_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    challengeStore = contracts.get(CHALLENGE_STORE_CONTRACT_NAME)
+    gas_limit = web3.eth.getBlock('latest').gasLimit
+
+    challenger = funded_account(web3, int(1e20))
+    defendant = funded_account(web3, int(1e20))
+
+    # The defendant has to lose every round without being banned
+    orig_max_losses = env.functions.getuint(ENV_MAX_LOSSES).call()
+    send(web3, env.functions.setuint(ENV_MAX_LOSSES, HISTORY_LIMIT + len(bench_sizes())), {
+        'from': admin,
+        'gas': int(1e5),
+    })
+
+    rows = [['bids', 'losses'] + list(CALLS)]
+    results = []
+    for size in bench_sizes():
+        missing = size - bidStore.functions.getBidCount().call()
+        for batch in chunks([None] * max(missing, 0), 50):
+            count = len(batch)
+            send(web3, scatter.functions.bidMany(
+                [FILE_HASH_1] * count,
+                [FILE_SIZE_1] * count,
+                [DURATION_1] * count,
+                [BID_VALUE] * count,
+                [VALIDATION_POOL] * count,
+            ), {
+                'from': bidder,
+                'gas': gas_limit,
+                'value': (BID_VALUE + VALIDATION_POOL) * count,
+            })
+
+        history = min(size, HISTORY_LIMIT)
+        while challengeStore.functions.getLosses(defendant.address).call() < history - 1:
+            challenge_round(web3, contracts, bidder, hoster, mediator, challenger, defendant)
+
+        losses = challengeStore.functions.getLosses(defendant.address).call()
+        gas = challenge_round(web3, contracts, bidder, hoster, mediator, challenger, defendant)
+        results.append(gas)
+        rows.append([
+            str(bidStore.functions.getBidCount().call()),
+            str(losses),
+        ] + [str(gas[call]) for call in CALLS])
+
+    send(web3, env.functions.setuint(ENV_MAX_LOSSES, orig_max_losses), {
+        'from': admin,
+        'gas': int(1e5),
+    })
+
+    print()
+    print(format_rows(rows))
+
+    for gas in results[1:]:
+        for call in CALLS:
+            assert gas[call] <= results[0][call], "{} costs more as bids and losses grow".format(
+                call,
+            )
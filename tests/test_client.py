@@ -0,0 +1,108 @@
+""" Tests for the scatter client package """
+import pytest
+from scatter import RPCError, ScatterClient
+from .rpc import RPCServer
+from .utils import get_accounts, std_tx
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    ROUTER_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    FILE_HASH_2,
+    FILE_SIZE_2,
+    DURATION_1,
+    DURATION_2,
+)
+
+BID_VALUE = int(1e16)
+VALIDATION_POOL = int(1e14)
+
+
+def place_bids(web3, scatter, bidder):
+    """ Place two bids and return their IDs """
+    txhash = scatter.functions.bidMany(
+        [FILE_HASH_1, FILE_HASH_2],
+        [FILE_SIZE_1, FILE_SIZE_2],
+        [DURATION_1, DURATION_2],
+        [BID_VALUE, BID_VALUE],
+        [VALIDATION_POOL, VALIDATION_POOL],
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': int(6e6),
+        'value': (BID_VALUE + VALIDATION_POOL) * 2,
+    }))
+    receipt = web3.eth.waitForTransactionReceipt(txhash)
+    assert receipt.status == 1, "bidMany transaction failed"
+    return [e.args.bidId for e in scatter.events.BidSuccessful().processReceipt(receipt)]
+
+
+def test_client_reads(web3, contracts):
+    """ Client reads match the contracts and independent reads share a round trip """
+    _, bidder, hoster, _, _, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    bid_ids = place_bids(web3, scatter, bidder)
+
+    with RPCServer(web3) as server:
+        client = ScatterClient.from_contracts(server.uri, contracts, account=hoster)
+
+        bids = client.get_bids(bid_ids + [bidStore.functions.getBidCount().call()])
+        assert server.round_trips == 1
+        assert server.requests == 6
+
+        assert bids[-1] is None, "Bid past the end should not exist"
+        for bid, bid_id in zip(bids, bid_ids):
+            assert bid.bid_id == bid_id
+            assert bid.bidder == bidder
+            assert bid.bid_amount == BID_VALUE
+            assert bid.validation_pool == VALIDATION_POOL
+            assert bid.accepted == 0
+            assert bid.paid is False
+        assert bids[0].file_hash == bidStore.functions.getFileHash(bid_ids[0]).call()
+        assert bids[1].file_size == FILE_SIZE_2
+        assert bids[1].duration == DURATION_2
+
+        assert client.get_bid(bid_ids[0]) == bids[0]
+        assert client.get_bid_range(bid_ids[0], 2) == bids[:2]
+        assert client.get_validations(bid_ids[0]) == []
+
+        jobs = client.open_jobs()
+        job_ids = [job.bid_id for job in jobs]
+        assert set(bid_ids) <= set(job_ids)
+        assert job_ids == scatter.functions.getOpenJobs(-1, len(job_ids)).call({
+            'from': hoster,
+        })[0]
+
+        balances = client.balances([bidder, hoster])
+        assert balances[bidder] == scatter.functions.balance(bidder).call()
+
+        # Everything went over one kept-alive connection
+        assert server.connections == 1
+        client.close()
+
+
+def test_client_resolve(web3, contracts):
+    """ Addresses can come from the Router """
+    router = contracts.get(ROUTER_CONTRACT_NAME)
+
+    with RPCServer(web3) as server:
+        full = ScatterClient.from_contracts(server.uri, contracts)
+        client = ScatterClient(
+            server.uri,
+            {name: contracts.get(name).abi for name in ('Router', 'BidStore')},
+            {'Router': router.address},
+        )
+        server.reset()
+
+        client.resolve()
+        assert server.round_trips == 1
+        assert client.addresses['BidStore'] == full.addresses['BidStore']
+        assert client.call('BidStore', 'getBidCount') \
+            == contracts.get(STORE_CONTRACT_NAME).functions.getBidCount().call()
+
+        # Node errors surface as RPCError
+        client.addresses['BidStore'] = router.address
+        with pytest.raises(RPCError):
+            client.call('BidStore', 'getBidCount')
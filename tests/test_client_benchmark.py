@@ -0,0 +1,119 @@
+""" Round trip benchmark for the scatter client
+
+Overview
+--------
+Disabled unless SCATTER_BENCH is set.  Reads every field of BENCH_BIDS bids from a local HTTP
+endpoint three ways and prints the HTTP round trips, connections and time for each (run with
+-s):
+
+- per call: one request per getter over a new connection, like separate functions.X().call()s
+  against a node without keep-alive
+- pooled: one request per getter over a kept-alive connection
+- batched: ScatterClient.get_bids, every getter in one JSON-RPC batch
+
+    SCATTER_BENCH=1 sb test -k client_benchmark -s
+"""
+import os
+import time
+import pytest
+from scatter import HTTPRPC, ScatterClient
+from scatter.rpc import pooled_session
+from .gas import BENCH_ENV, chunks, format_rows, send
+from .rpc import RPCServer
+from .utils import get_accounts
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+)
+
+BENCH_BIDS = 100
+BID_VALUE = int(1e15)
+VALIDATION_POOL = int(1e13)
+
+# What a Bid is made of when read one getter at a time
+BID_GETTERS = (
+    'getBidder',
+    'getFileHash',
+    'getFileSize',
+    'getBidAmount',
+    'getValidationPool',
+    'getDuration',
+    'getMinValidations',
+    'getHoster',
+    'getAccepted',
+    'getPinned',
+    'getValidationTally',
+)
+
+
+def unpooled_session():
+    session = pooled_session(1)
+    session.headers['Connection'] = 'close'
+    return session
+
+
+def read_per_call(client, bid_ids):
+    """ Read every bid one getter per request """
+    for bid_id in bid_ids:
+        for getter in BID_GETTERS:
+            client.call('BidStore', getter, bid_id)
+
+
+@pytest.mark.skipif(not os.environ.get(BENCH_ENV), reason="SCATTER_BENCH is not set")
+def test_client_benchmark(web3, contracts):
+    _, bidder, _, _, _, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    gas_limit = web3.eth.getBlock('latest').gasLimit
+
+    first_id = bidStore.functions.getBidCount().call()
+    for batch in chunks([None] * BENCH_BIDS, 50):
+        size = len(batch)
+        send(web3, scatter.functions.bidMany(
+            [FILE_HASH_1] * size,
+            [FILE_SIZE_1] * size,
+            [DURATION_1] * size,
+            [BID_VALUE] * size,
+            [VALIDATION_POOL] * size,
+        ), {
+            'from': bidder,
+            'gas': gas_limit,
+            'value': (BID_VALUE + VALIDATION_POOL) * size,
+        })
+    bid_ids = list(range(first_id, first_id + BENCH_BIDS))
+
+    rows = [['mode', 'round trips', 'connections', 'seconds']]
+    results = {}
+
+    with RPCServer(web3) as server:
+        modes = (
+            ('per call', unpooled_session(), read_per_call),
+            ('pooled', pooled_session(), read_per_call),
+            ('batched', pooled_session(), lambda client, ids: client.get_bids(ids)),
+        )
+        for mode, session, read in modes:
+            client = ScatterClient.from_contracts(
+                HTTPRPC(server.uri, session=session),
+                contracts,
+            )
+            server.reset()
+            start = time.time()
+            read(client, bid_ids)
+            elapsed = time.time() - start
+
+            results[mode] = (server.round_trips, server.connections, elapsed)
+            rows.append([mode, str(server.round_trips), str(server.connections),
+                         '{:.3f}'.format(elapsed)])
+            client.close()
+
+    print()
+    print("Reading {} bids".format(BENCH_BIDS))
+    print(format_rows(rows))
+
+    assert results['per call'][0] == BENCH_BIDS * len(BID_GETTERS)
+    assert results['batched'][0] == 1
+    assert results['pooled'][1] == 1
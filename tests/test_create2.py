@@ -0,0 +1,69 @@
+""" Tests for offline CREATE2 address computation """
+import pytest
+from web3 import Web3
+from deploy.create2 import (
+    compute_address,
+    compute_address_from_hash,
+    init_code,
+    link_bytecode,
+    salt_for,
+)
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+ZERO_SALT = '0x' + '00' * 32
+DEADBEEF_ADDRESS = '0xdeadbeef00000000000000000000000000000000'
+LIBRARY_ADDRESS = '0x16c55d9E9CA5b673cAfAA112195a5ad78CeB104E'
+
+
+def test_compute_address():
+    """ Examples from EIP-1014 """
+    assert compute_address(ZERO_ADDRESS, ZERO_SALT, '0x00') \
+        == '0x4D1A2e2bB4F88F0250f26Ffff098B0b30B26BF38'
+    assert compute_address(DEADBEEF_ADDRESS, ZERO_SALT, '0x00') \
+        == '0xB928f69Bb1D91Cd65274e3c79d8986362984fDA3'
+    assert compute_address(
+        DEADBEEF_ADDRESS,
+        '0x000000000000000000000000feed000000000000000000000000000000000000',
+        '0x00',
+    ) == '0xD04116cDd17beBE565EB2422F2497E06cC1C9833'
+    assert compute_address(ZERO_ADDRESS, ZERO_SALT, '0xdeadbeef') \
+        == '0x70f2b2914A2a4b783FaEFb75f459A580616Fcb5e'
+    assert compute_address(ZERO_ADDRESS, ZERO_SALT, '0x') \
+        == '0xE33C0C7F7df4809055C3ebA6c09CFe4BaF1BD9e0'
+
+    code = bytes.fromhex('deadbeef')
+    assert compute_address_from_hash(ZERO_ADDRESS, ZERO_SALT, Web3.sha3(code)) \
+        == compute_address(ZERO_ADDRESS, ZERO_SALT, code)
+
+
+def test_salt():
+    assert salt_for('Scatter') == Web3.sha3(text='scatter:Scatter')
+    assert salt_for('Scatter', 2) == Web3.sha3(text='scatter:Scatter:2')
+    assert salt_for('Scatter') != salt_for('BidStore')
+
+
+def test_link_bytecode():
+    """ Both solc placeholder styles are replaced by library name """
+    hashed = '__${}$__'.format(Web3.sha3(text='lib/SafeMath.sol:SafeMath').hex()[2:36])
+    legacy = '__' + 'lib/SafeMath.sol:SafeMath'.ljust(38, '_')
+    assert len(hashed) == len(legacy) == 40
+
+    for placeholder in (hashed, legacy):
+        linked = link_bytecode('0x6000' + placeholder + '00', {'SafeMath': LIBRARY_ADDRESS})
+        assert linked == '0x6000' + LIBRARY_ADDRESS[2:].lower() + '00'
+
+    # Anything left unlinked can't be deployed
+    with pytest.raises(ValueError):
+        link_bytecode('0x6000' + hashed + '00', {'Rewards': LIBRARY_ADDRESS})
+
+
+def test_init_code():
+    """ Constructor arguments are ABI encoded after the bytecode """
+    abi = [{'type': 'constructor', 'inputs': [{'name': '_router', 'type': 'address'}]}]
+    code = init_code(abi, '0x6000', [LIBRARY_ADDRESS])
+    assert code == bytes.fromhex('6000' + '00' * 12 + LIBRARY_ADDRESS[2:].lower())
+
+    assert init_code([], '0x6000') == bytes.fromhex('6000')
+
+    with pytest.raises(AssertionError):
+        init_code(abi, '0x6000')
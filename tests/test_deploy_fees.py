@@ -0,0 +1,114 @@
+""" Tests for the deploy fee module """
+from types import SimpleNamespace
+from deploy.fees import (
+    BlockGasPriceOracle,
+    Fees,
+    StaticGasPrice,
+    find_deploy_receipt,
+    percentile,
+)
+
+DEPLOYER = '0x208B6e328105148Baf90C5d6a8F65A0accd17A95'
+OTHER = '0x16c55d9E9CA5b673cAfAA112195a5ad78CeB104E'
+CREATED = '0x000000000000000000000000000000000000c0de'
+
+
+class FakeEth(object):
+    """ A chain with a fixed set of gas prices paid per block """
+
+    def __init__(self, blocks, node_price=int(1e9)):
+        self.blocks = blocks
+        self.blockNumber = len(blocks) - 1
+        self.gasPrice = node_price
+
+    def getBlock(self, number, full_transactions=False):
+        assert full_transactions
+        return SimpleNamespace(transactions=[{'gasPrice': p} for p in self.blocks[number]])
+
+
+class FakeDeployEth(object):
+    """ A chain with a list of (from, to, contractAddress) transactions per block """
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.blockNumber = len(blocks) - 1
+        self.receipts = {}
+        self.estimated = []
+
+    def getBlock(self, number, full_transactions=False):
+        assert full_transactions
+        transactions = []
+        for i, (sender, to, created) in enumerate(self.blocks[number]):
+            txhash = '{}-{}'.format(number, i)
+            self.receipts[txhash] = SimpleNamespace(contractAddress=created, gasUsed=1000 + i)
+            transactions.append({'hash': txhash, 'from': sender, 'to': to})
+        return SimpleNamespace(transactions=transactions)
+
+    def getTransactionReceipt(self, txhash):
+        return self.receipts[txhash]
+
+    def estimateGas(self, tx):
+        self.estimated.append(tx)
+        return 100000
+
+
+def test_percentile():
+    assert percentile([5], 90) == 5
+    assert percentile([3, 1, 2, 5, 4], 0) == 1
+    assert percentile([3, 1, 2, 5, 4], 50) == 3
+    assert percentile([3, 1, 2, 5, 4], 100) == 5
+
+
+def test_block_oracle():
+    """ Faster speeds pay a higher percentile of recent prices """
+    blocks = [[100], [1, 2, 3], [4, 5], [6, 7, 8, 9, 10]]
+    web3 = SimpleNamespace(eth=FakeEth(blocks))
+
+    oracle = BlockGasPriceOracle(web3, blocks=3)
+    assert oracle.recent_prices() == list(range(1, 11))
+    assert oracle.gas_price('slow') < oracle.gas_price('standard') < oracle.gas_price('fast')
+    assert oracle.gas_price('fast') == 9
+
+    # Empty blocks fall back to the node's price
+    empty = BlockGasPriceOracle(SimpleNamespace(eth=FakeEth([[], []])))
+    assert empty.gas_price() == int(1e9)
+
+
+def test_fees():
+    """ Estimates get the margin and costs are totalled """
+    fees = Fees(StaticGasPrice(int(2e9)), 'fast', margin=1.5)
+    assert fees.gas_price() == int(2e9)
+
+    contract_fn = SimpleNamespace(estimateGas=lambda tx: 40000)
+    assert fees.estimate_gas(contract_fn, {}) == 60000
+
+    fees.record('a', SimpleNamespace(gasUsed=30000), int(2e9))
+    fees.record('b', SimpleNamespace(gasUsed=20000), int(1e9))
+    assert fees.total_cost() == 30000 * int(2e9) + 20000 * int(1e9)
+
+    report = fees.report()
+    assert 'fast' in report
+    assert '0.000080' in report
+
+
+def test_deploy_fees():
+    """ Deploys are estimated from their init code and found by the contract they created """
+    eth = FakeDeployEth([
+        [(DEPLOYER, None, OTHER)],
+        [(OTHER, None, CREATED), (DEPLOYER, OTHER, None)],
+        [(DEPLOYER, None, CREATED.upper().replace('0X', '0x'))],
+    ])
+    web3 = SimpleNamespace(eth=eth)
+
+    fees = Fees(StaticGasPrice(int(1e9)), margin=1.5)
+    assert fees.estimate_deploy_gas(web3, DEPLOYER, b'\x60\x80') == 150000
+    assert eth.estimated == [{'from': DEPLOYER, 'data': '0x6080'}]
+
+    # Only creations from the deployer, from the first block asked for
+    receipt = find_deploy_receipt(web3, DEPLOYER.lower(), CREATED, 1)
+    assert receipt is eth.receipts['2-0']
+    assert find_deploy_receipt(web3, DEPLOYER, OTHER, 1) is None
+    assert find_deploy_receipt(web3, DEPLOYER, OTHER, 0) is eth.receipts['0-0']
+
+    fees.record('deployRouter', receipt, int(1e9))
+    assert 'deployRouter' in fees.report()
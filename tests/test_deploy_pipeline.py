@@ -0,0 +1,188 @@
+""" Tests for the deployment pipeline ordering and checkpoints """
+import json
+import pytest
+from types import SimpleNamespace
+from deploy.checkpoint import CONFIRMED, PENDING, Checkpoints, call_fingerprint
+from deploy.fees import Fees, StaticGasPrice
+from deploy.pipeline import Pipeline
+
+ACCOUNT = '0x208B6e328105148Baf90C5d6a8F65A0accd17A95'
+
+
+class TxHash(bytes):
+    """ Transaction hashes render as 0x prefixed hex like web3's HexBytes """
+
+    def hex(self):
+        return '0x' + super().hex()
+
+
+def hash_key(txhash):
+    return txhash.hex() if isinstance(txhash, bytes) else txhash
+
+
+class FakeEth(object):
+    """ Records sent transactions and returns a successful receipt for each """
+
+    def __init__(self):
+        self.sent = []
+        self.txs = {}
+
+    def getTransactionCount(self, account, block_identifier):
+        return len(self.txs)
+
+    def getTransaction(self, txhash):
+        return self.txs.get(hash_key(txhash))
+
+    def waitForTransactionReceipt(self, txhash, timeout=None):
+        assert hash_key(txhash) in self.txs, "Unknown transaction"
+        return SimpleNamespace(
+            status=1,
+            transactionHash=TxHash(bytes.fromhex(hash_key(txhash)[2:])),
+            gasUsed=21000,
+            blockNumber=len(self.txs),
+        )
+
+
+class FakeFunction(object):
+    def __init__(self, eth, name):
+        self.eth = eth
+        self.name = name
+        self.address = ACCOUNT
+        self.fn_name = name
+        self.args = (1, 'a')
+
+    def estimateGas(self, tx):
+        return 1000
+
+    def transact(self, tx):
+        assert tx['nonce'] == len(self.eth.txs), "Nonces should be sequential"
+        self.eth.sent.append((self.name, tx))
+        txhash = TxHash('{}-{}'.format(self.name, tx['nonce']).encode())
+        self.eth.txs[txhash.hex()] = tx
+        return txhash
+
+
+def test_pipeline_waves():
+    """ Independent transactions go out in one wave and dependants wait for it """
+    web3 = SimpleNamespace(eth=FakeEth())
+    eth = web3.eth
+    fees = Fees(StaticGasPrice(1))
+    pipeline = Pipeline(web3, ACCOUNT, fees)
+    order = []
+
+    def deploy(name):
+        def action(results):
+            order.append(name)
+            return name
+        return action
+
+    def tx(name):
+        def action(results):
+            return (FakeFunction(eth, name), {})
+        return action
+
+    pipeline.deploy('Router', deploy('Router'))
+    pipeline.deploy('Env', deploy('Env'))
+    pipeline.transact('setEnv', tx('setEnv'), ['Router', 'Env'])
+    pipeline.transact('setOther', tx('setOther'), ['Router'])
+    pipeline.transact('skipped', lambda results: None, ['Router'])
+    pipeline.deploy('Scatter', deploy('Scatter'), ['setEnv'])
+    pipeline.transact('setScatter', tx('setScatter'), ['Scatter'])
+
+    results = pipeline.run()
+
+    assert order == ['Router', 'Env', 'Scatter']
+    assert pipeline.waves == [['setEnv', 'setOther'], ['setScatter']]
+    assert [name for name, _ in eth.sent] == ['setEnv', 'setOther', 'setScatter']
+    assert all(sent['from'] == ACCOUNT and sent['gasPrice'] == 1 for _, sent in eth.sent)
+    assert all(sent['gas'] == 1200 for _, sent in eth.sent), "Estimate plus margin"
+    assert fees.total_cost() == 21000 * 3
+    assert results['skipped'] is None
+    assert results['setScatter'].status == 1
+
+
+def test_pipeline_cycle():
+    """ Steps that can never run are reported """
+    pipeline = Pipeline(SimpleNamespace(eth=FakeEth()), ACCOUNT, Fees(StaticGasPrice(1)))
+    pipeline.transact('a', lambda results: None, ['b'])
+    pipeline.transact('b', lambda results: None, ['a'])
+
+    with pytest.raises(ValueError):
+        pipeline.run()
+
+
+def build_pipeline(web3, checkpoints):
+    """ Two deploys and two dependent transactions """
+    pipeline = Pipeline(web3, ACCOUNT, Fees(StaticGasPrice(1)), checkpoints)
+
+    def deploy(name):
+        return lambda results: SimpleNamespace(address=name)
+
+    def tx(name):
+        return lambda results: (FakeFunction(web3.eth, name), {})
+
+    pipeline.deploy('Router', deploy('Router'))
+    pipeline.transact('setEnv', tx('setEnv'), ['Router'])
+    pipeline.deploy('Scatter', deploy('Scatter'), ['setEnv'])
+    pipeline.transact('setScatter', tx('setScatter'), ['Scatter'])
+    return pipeline
+
+
+@pytest.fixture
+def metafile(tmp_path):
+    path = tmp_path / 'metafile.json'
+    path.write_text(json.dumps({'contracts': [], 'defaultAccount': ACCOUNT}))
+    return str(path)
+
+
+def test_checkpoints(metafile):
+    """ Checkpoints are kept per network next to the rest of the metafile """
+    checkpoints = Checkpoints(metafile, 1)
+    assert checkpoints.get('setEnv') is None
+
+    checkpoints.record('setEnv', PENDING, call='abc', txHash='0x01')
+    assert checkpoints.get('setEnv')['status'] == PENDING
+    assert checkpoints.get('setEnv', 'abc')['txHash'] == '0x01'
+    assert checkpoints.get('setEnv', 'def') is None, "Different call"
+    assert Checkpoints(metafile, 2).get('setEnv') is None, "Different network"
+
+    with open(metafile) as meta:
+        assert json.load(meta)['defaultAccount'] == ACCOUNT
+
+    checkpoints.clear()
+    assert checkpoints.get('setEnv') is None
+
+
+def test_pipeline_rerun(metafile):
+    """ A rerun skips confirmed transactions """
+    checkpoints = Checkpoints(metafile, 1)
+    web3 = SimpleNamespace(eth=FakeEth())
+    build_pipeline(web3, checkpoints).run()
+
+    assert [name for name, _ in web3.eth.sent] == ['setEnv', 'setScatter']
+    assert checkpoints.get('setScatter')['status'] == CONFIRMED
+    assert checkpoints.get('Scatter')['address'] == 'Scatter'
+
+    rerun = build_pipeline(web3, checkpoints)
+    rerun.run()
+    assert len(web3.eth.sent) == 2, "Nothing should be sent again"
+    assert rerun.waves == []
+
+
+def test_pipeline_resume_pending(metafile):
+    """ A rerun waits on a transaction it sent before instead of sending it again """
+    checkpoints = Checkpoints(metafile, 1)
+    web3 = SimpleNamespace(eth=FakeEth())
+
+    # An earlier run sent setEnv and stopped before the receipt
+    earlier = FakeFunction(web3.eth, 'setEnv')
+    txhash = earlier.transact({'nonce': 0, 'gasPrice': 1})
+    checkpoints.record('setEnv', PENDING, call=call_fingerprint(earlier), txHash=txhash.hex())
+
+    pipeline = build_pipeline(web3, checkpoints)
+    pipeline.run()
+
+    assert [name for name, _ in web3.eth.sent] == ['setEnv', 'setScatter']
+    assert pipeline.waves == [['setEnv'], ['setScatter']]
+    assert checkpoints.get('setEnv')['status'] == CONFIRMED
+    assert checkpoints.get('setEnv')['txHash'] == txhash.hex()
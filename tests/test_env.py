@@ -110,3 +110,33 @@ def test_env_str(web3, contracts):
     strval = env.functions.getstr(STR_HASH_1).call()
 
     assert strval == STR_VAL_1, "value returned from contract does not match"
+
+
+def test_env_config_version(web3, contracts):
+    """ Test that the config version moves with every stored value change """
+
+    admin, bidder, _, _, _, _, _ = get_accounts(web3)
+
+    env = contracts.get(ENV_CONTRACT_NAME)
+
+    assert env is not None, "env contract missing"
+
+    version = env.functions.configVersion().call()
+    assert version > 0, "config version should start above zero"
+
+    set_txhash = env.functions.setuint(UINT_HASH_1, UINT_VAL_1 + 1).transact(std_tx({
+            'from': admin,
+        }))
+    set_receipt = web3.eth.waitForTransactionReceipt(set_txhash)
+    assert set_receipt.status == 1, "setuint() transaction reverted"
+    assert env.functions.configVersion().call() == version + 1
+
+    set_txhash2 = env.functions.setstr(STR_HASH_1, STR_VAL_1).transact(std_tx({
+            'from': admin,
+        }))
+    set_receipt2 = web3.eth.waitForTransactionReceipt(set_txhash2)
+    assert set_receipt2.status == 1, "setstr() transaction reverted"
+    assert env.functions.configVersion().call() == version + 2
+
+    # Ban status and config version in one call
+    assert env.functions.banStatus(bidder).call() == [False, version + 2]
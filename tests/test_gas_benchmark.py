@@ -0,0 +1,187 @@
+""" Gas benchmarks for Scatter
+
+Overview
+--------
+Disabled unless SCATTER_BENCH is set to the largest N to run.  For each N in 1, 100, 1,000 and
+10,000 the chain is topped up to N pinned bids with N validations, then gasUsed is recorded for
+every Scatter entry point.  Views are measured with estimateGas.  The results are written as JSON
+to SCATTER_BENCH_OUT (gas-benchmark.json by default) and printed as a table (run with -s).
+
+    SCATTER_BENCH=1000 sb test -k gas_benchmark -s
+"""
+import pytest
+from .gas import (
+    BENCH_ENV,
+    GasReport,
+    bench_sizes,
+    chunks,
+    send,
+)
+from .utils import get_accounts, has_event, time_travel
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+)
+
+BID_VALUE = int(1e15)
+VALIDATION_POOL = int(1e13)
+
+# Open bids kept in the queue for getJob to walk through.  More than Scatter.JOB_SCAN_LIMIT.
+OPEN_BACKLOG = 100
+
+
+def place_bid(web3, scatter, bidder, duration):
+    """ Place a single bid and return its receipt and ID """
+    receipt = send(web3, scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        duration,
+        BID_VALUE,
+        VALIDATION_POOL
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': BID_VALUE + VALIDATION_POOL,
+    })
+    evnts = scatter.events.BidSuccessful().processReceipt(receipt)
+    assert len(evnts) == 1, "BidSuccessful event not found"
+    return receipt, evnts[0].args.bidId
+
+
+def place_bids(web3, scatter, bidder, count, batch_size, gas_limit):
+    """ Place count bids with bidMany and return their IDs """
+    bid_ids = []
+    for batch in chunks([None] * count, batch_size):
+        size = len(batch)
+        receipt = send(web3, scatter.functions.bidMany(
+            [FILE_HASH_1] * size,
+            [FILE_SIZE_1] * size,
+            [DURATION_1] * size,
+            [BID_VALUE] * size,
+            [VALIDATION_POOL] * size,
+        ), {
+            'from': bidder,
+            'gas': gas_limit,
+            'value': (BID_VALUE + VALIDATION_POOL) * size,
+        })
+        evnts = scatter.events.BidSuccessful().processReceipt(receipt)
+        assert len(evnts) == size, "Not all bids succeeded"
+        bid_ids.extend([e.args.bidId for e in evnts])
+    return bid_ids
+
+
+def pin_bids(web3, scatter, hoster, bid_ids):
+    """ Accept and pin a list of bids """
+    for bid_id in bid_ids:
+        send(web3, scatter.functions.accept(bid_id), {'from': hoster, 'gas': int(1e6)})
+        send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+
+
+def test_gas_benchmark(web3, contracts):
+    """ Record gas used by every Scatter entry point as bid and validation counts grow """
+    sizes = bench_sizes()
+    if not sizes:
+        pytest.skip("Set {} to the largest N to benchmark".format(BENCH_ENV))
+
+    _, bidder, hoster, validator1, validator2, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    gas_limit = web3.eth.getBlock('latest').gasLimit
+    report = GasReport()
+
+    # Size the batches used to build up state from the cost of one bid
+    bid_receipt, _ = place_bid(web3, scatter, bidder, DURATION_1)
+    batch_size = gas_limit // (bid_receipt.gasUsed * 2)
+
+    filled = 0
+    backlog = 0
+
+    for n in sizes:
+        # Top up to n pinned bids with one validation each
+        bid_ids = place_bids(web3, scatter, bidder, n - filled, batch_size, gas_limit)
+        pin_bids(web3, scatter, hoster, bid_ids)
+        for batch in chunks(bid_ids, batch_size):
+            send(web3, scatter.functions.validateMany(batch, [True] * len(batch)), {
+                'from': validator1,
+                'gas': gas_limit,
+            })
+        filled = n
+
+        # Keep the bidder's own bids at the front of the open queue
+        open_count = min(n, OPEN_BACKLOG)
+        place_bids(web3, scatter, bidder, open_count - backlog, batch_size, gas_limit)
+        backlog = open_count
+
+        # The bid lifecycle
+        bid_receipt, bid_id = place_bid(web3, scatter, bidder, DURATION_1)
+        report.record_receipt('Scatter', 'bid', bid_receipt, n)
+
+        receipt = send(web3, scatter.functions.accept(bid_id), {'from': hoster, 'gas': int(1e6)})
+        report.record_receipt('Scatter', 'accept', receipt, n)
+
+        receipt = send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(1e6)})
+        report.record_receipt('Scatter', 'pinned', receipt, n)
+
+        receipt = send(web3, scatter.functions.validate(bid_id), {
+            'from': validator2,
+            'gas': int(1e6),
+        })
+        report.record_receipt('Scatter', 'validate', receipt, n)
+
+        # Views
+        report.record(
+            'Scatter',
+            'getJob',
+            scatter.functions.getJob().estimateGas({'from': hoster}),
+            n
+        )
+        report.record(
+            'Scatter',
+            'getJob',
+            scatter.functions.getJob().estimateGas({'from': bidder}),
+            n,
+            'own bids'
+        )
+        report.record(
+            'Scatter',
+            'validationSway',
+            scatter.functions.validationSway(bid_id).estimateGas({'from': hoster}),
+            n
+        )
+        report.record(
+            'Scatter',
+            'satisfied',
+            scatter.functions.satisfied(bid_id).estimateGas({'from': hoster}),
+            n
+        )
+
+        # Payout, claim and withdraw need a bid whose duration has passed
+        _, payout_id = place_bid(web3, scatter, bidder, DURATION_1)
+        pin_bids(web3, scatter, hoster, [payout_id])
+        time_travel(web3, DURATION_1 + 1)
+
+        receipt = send(web3, scatter.functions.validate(payout_id), {
+            'from': validator1,
+            'gas': int(1e6),
+        })
+        assert has_event(scatter, 'HosterPaid', receipt), "Bid was not paid out"
+        report.record_receipt('Scatter', 'validate', receipt, n, 'payout')
+
+        receipt = send(web3, scatter.functions.claim(payout_id), {
+            'from': validator1,
+            'gas': int(1e6),
+        })
+        assert has_event(scatter, 'Claimed', receipt), "Nothing was claimed"
+        report.record_receipt('Scatter', 'claim', receipt, n)
+
+        receipt = send(web3, scatter.functions.withdraw(), {'from': hoster, 'gas': int(1e6)})
+        assert has_event(scatter, 'Withdraw', receipt), "Hoster had nothing to withdraw"
+        report.record_receipt('Scatter', 'withdraw', receipt, n)
+
+    print(report.table())
+    print("Gas benchmark written to {}".format(report.write()))
+
+    assert len(report.results) > 0
@@ -0,0 +1,272 @@
+""" Gas regression check against the committed baseline
+
+Overview
+--------
+Records gasUsed for a fixed set of calls on Scatter, BidStore, Env, Register and Router and
+compares them with tests/gas-baseline.json.  The test fails if any call uses more than
+SCATTER_GAS_THRESHOLD percent (2 by default) over its baseline.  Every state changing call is
+made once before it is measured so first-write costs don't depend on test order.
+
+Refresh the baseline after an intended change with:
+
+    SCATTER_GAS_UPDATE=1 sb test -k gas_regression -s
+"""
+import os
+from web3 import Web3
+from .gas import (
+    GAS_UPDATE_ENV,
+    GasReport,
+    compare,
+    diff_table,
+    gas_threshold,
+    load_baseline,
+    send,
+    write_baseline,
+)
+from .utils import get_accounts
+from .consts import (
+    ADDRESS_1,
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    ENV_CONTRACT_NAME,
+    ROUTER_CONTRACT_NAME,
+    REGISTER_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_HASH_2,
+    FILE_SIZE_1,
+    DURATION_1,
+)
+
+BATCH_SIZE = 10
+BID_VALUE = int(1e15)
+VALIDATION_POOL = int(1e13)
+BASELINE_KEY = Web3.sha3(text='gasBaseline')
+TX_GAS = int(1e6)
+
+
+def measure(web3, report, contract, function, contract_fn, tx, scenario=None):
+    """ Send a transaction twice and record the gas used by the second one """
+    send(web3, contract_fn, tx)
+    receipt = send(web3, contract_fn, tx)
+    report.record_receipt(contract, function, receipt, scenario=scenario)
+    return receipt
+
+
+def measure_view(report, contract, function, contract_fn, tx, scenario=None):
+    """ Record the gas estimate for a view """
+    report.record(contract, function, contract_fn.estimateGas(tx), scenario=scenario)
+
+
+def bid_many(web3, scatter, bidder, size):
+    """ Place size bids in one transaction and return the receipt and bid IDs """
+    receipt = send(web3, scatter.functions.bidMany(
+        [FILE_HASH_1] * size,
+        [FILE_SIZE_1] * size,
+        [DURATION_1] * size,
+        [BID_VALUE] * size,
+        [VALIDATION_POOL] * size,
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': (BID_VALUE + VALIDATION_POOL) * size,
+    })
+    bid_ids = [e.args.bidId for e in scatter.events.BidSuccessful().processReceipt(receipt)]
+    assert len(bid_ids) == size, "Not all bids succeeded"
+    return receipt, bid_ids
+
+
+def measure_scatter(web3, contracts, report):
+    """ The Scatter bid lifecycle and views """
+    _, bidder, hoster, validator1, validator2, _, nobody = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    # Warm up the bid counters so the measured bids are not the first
+    bid_many(web3, scatter, bidder, 1)
+
+    receipt, (bid_id,) = bid_many(web3, scatter, bidder, 1)
+    report.record_receipt('Scatter', 'bidMany', receipt, scenario='1')
+    receipt, bid_ids = bid_many(web3, scatter, bidder, BATCH_SIZE)
+    report.record_receipt('Scatter', 'bidMany', receipt, scenario=str(BATCH_SIZE))
+
+    receipt = send(web3, scatter.functions.bid(
+        FILE_HASH_2,
+        FILE_SIZE_1,
+        DURATION_1,
+        BID_VALUE,
+        VALIDATION_POOL
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': BID_VALUE + VALIDATION_POOL,
+    })
+    report.record_receipt('Scatter', 'bid', receipt)
+
+    measure_view(report, 'Scatter', 'getJob', scatter.functions.getJob(), {'from': hoster})
+    measure_view(
+        report,
+        'Scatter',
+        'getOpenJobs',
+        scatter.functions.getOpenJobs(-1, BATCH_SIZE),
+        {'from': hoster},
+        str(BATCH_SIZE)
+    )
+
+    receipt = send(web3, scatter.functions.accept(bid_id), {'from': hoster, 'gas': TX_GAS})
+    report.record_receipt('Scatter', 'accept', receipt)
+    receipt = send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': TX_GAS})
+    report.record_receipt('Scatter', 'pinned', receipt)
+
+    receipt = send(web3, scatter.functions.validate(bid_id), {'from': validator1, 'gas': TX_GAS})
+    report.record_receipt('Scatter', 'validate', receipt)
+    receipt = send(web3, scatter.functions.invalidate(bid_id), {
+        'from': validator2,
+        'gas': TX_GAS,
+    })
+    report.record_receipt('Scatter', 'invalidate', receipt)
+
+    for batch_id in bid_ids:
+        send(web3, scatter.functions.accept(batch_id), {'from': hoster, 'gas': TX_GAS})
+        send(web3, scatter.functions.pinned(batch_id), {'from': hoster, 'gas': TX_GAS})
+    receipt = send(web3, scatter.functions.validateMany(bid_ids, [True] * len(bid_ids)), {
+        'from': validator1,
+        'gas': int(6e6),
+    })
+    report.record_receipt('Scatter', 'validateMany', receipt, scenario=str(BATCH_SIZE))
+
+    measure_view(report, 'Scatter', 'validationSway', scatter.functions.validationSway(bid_id), {
+        'from': hoster,
+    })
+    measure_view(report, 'Scatter', 'satisfied', scatter.functions.satisfied(bid_id), {
+        'from': hoster,
+    })
+    measure_view(report, 'Scatter', 'getBid', scatter.functions.getBid(bid_id), {'from': hoster})
+
+    # Nothing to claim or withdraw before the bid is paid out
+    receipt = send(web3, scatter.functions.claim(bid_id), {'from': validator1, 'gas': TX_GAS})
+    report.record_receipt('Scatter', 'claim', receipt, scenario='unpaid')
+    if scatter.functions.balance(nobody).call() == 0:
+        receipt = send(web3, scatter.functions.withdraw(), {'from': nobody, 'gas': TX_GAS})
+        report.record_receipt('Scatter', 'withdraw', receipt, scenario='zero balance')
+
+    return bid_id
+
+
+def measure_bid_store(web3, contracts, report, bid_id):
+    """ The BidStore views """
+    _, _, hoster, _, _, _, _ = get_accounts(web3)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    tx = {'from': hoster}
+
+    measure_view(report, 'BidStore', 'getBid', bidStore.functions.getBid(bid_id), tx)
+    measure_view(report, 'BidStore', 'getBidState', bidStore.functions.getBidState(bid_id), tx)
+    measure_view(
+        report,
+        'BidStore',
+        'getValidationTally',
+        bidStore.functions.getValidationTally(bid_id),
+        tx
+    )
+    measure_view(
+        report,
+        'BidStore',
+        'getBids',
+        bidStore.functions.getBids(bid_id, BATCH_SIZE),
+        tx,
+        str(BATCH_SIZE)
+    )
+    measure_view(
+        report,
+        'BidStore',
+        'getBidStates',
+        bidStore.functions.getBidStates(bid_id, BATCH_SIZE),
+        tx,
+        str(BATCH_SIZE)
+    )
+    measure_view(
+        report,
+        'BidStore',
+        'getValidations',
+        bidStore.functions.getValidations(bid_id, 0, BATCH_SIZE),
+        tx,
+        str(BATCH_SIZE)
+    )
+    measure_view(
+        report,
+        'BidStore',
+        'getOpenBids',
+        bidStore.functions.getOpenBids(-1, BATCH_SIZE),
+        tx,
+        str(BATCH_SIZE)
+    )
+
+
+def measure_env(web3, contracts, report):
+    """ Env config and bans """
+    admin, _, _, _, _, _, _ = get_accounts(web3)
+    env = contracts.get(ENV_CONTRACT_NAME)
+    tx = {'from': admin, 'gas': TX_GAS}
+
+    measure(web3, report, 'Env', 'setuint', env.functions.setuint(BASELINE_KEY, 1), tx)
+    measure(web3, report, 'Env', 'setstr', env.functions.setstr(BASELINE_KEY, 'gas'), tx)
+
+    send(web3, env.functions.unban(ADDRESS_1), tx)
+    receipt = send(web3, env.functions.ban(ADDRESS_1), tx)
+    report.record_receipt('Env', 'ban', receipt)
+    receipt = send(web3, env.functions.unban(ADDRESS_1), tx)
+    report.record_receipt('Env', 'unban', receipt)
+
+    measure_view(report, 'Env', 'getuint', env.functions.getuint(BASELINE_KEY), {'from': admin})
+    measure_view(report, 'Env', 'banStatus', env.functions.banStatus(ADDRESS_1), {'from': admin})
+
+
+def measure_register(web3, contracts, report):
+    """ User registration """
+    _, _, _, _, _, _, user = get_accounts(web3)
+    register = contracts.get(REGISTER_CONTRACT_NAME)
+
+    measure(web3, report, 'Register', 'register', register.functions.register(FILE_HASH_1), {
+        'from': user,
+        'gas': TX_GAS,
+    })
+    measure_view(report, 'Register', 'getUserFile', register.functions.getUserFile(user), {
+        'from': user,
+    })
+
+
+def measure_router(web3, contracts, report):
+    """ Router records """
+    admin, _, _, _, _, _, _ = get_accounts(web3)
+    router = contracts.get(ROUTER_CONTRACT_NAME)
+
+    measure(web3, report, 'Router', 'set', router.functions.set(BASELINE_KEY, ADDRESS_1), {
+        'from': admin,
+        'gas': TX_GAS,
+    })
+    measure_view(report, 'Router', 'get', router.functions.get(BASELINE_KEY), {'from': admin})
+
+
+def test_gas_regression(web3, contracts):
+    """ Compare gas used against tests/gas-baseline.json """
+    report = GasReport()
+
+    bid_id = measure_scatter(web3, contracts, report)
+    measure_bid_store(web3, contracts, report, bid_id)
+    measure_env(web3, contracts, report)
+    measure_register(web3, contracts, report)
+    measure_router(web3, contracts, report)
+
+    current = report.snapshot()
+
+    if os.environ.get(GAS_UPDATE_ENV):
+        print("Gas baseline written to {}".format(write_baseline(current)))
+        return
+
+    threshold = gas_threshold()
+    rows = compare(load_baseline(), current, threshold)
+    print(diff_table(rows))
+
+    regressed = [row['key'] for row in rows if row['status'] == 'regressed']
+    assert not regressed, "Gas use went up more than {}% for: {}".format(
+        threshold,
+        ', '.join(regressed),
+    )
@@ -0,0 +1,251 @@
+""" Tests for the hoster agent and the agent node transports """
+import asyncio
+import json
+import os
+import tempfile
+from scatter.hoster import Hoster
+from scatter.node import IPCNode, Web3Node
+from scatter.signer import Signer
+from .ipfs import LocalIPFS
+from .gas import send
+from .utils import funded_account, get_accounts, run, time_travel, wait_for
+from .consts import (
+    ENV_ACCEPT_WAIT,
+    ENV_CONTRACT_NAME,
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+)
+
+BID_VALUE = int(1e16)
+VALIDATION_POOL = int(1e14)
+
+
+def test_hoster(web3, contracts):
+    """ A bid is accepted in the next block and pinned without any getJob() calls """
+    _, bidder, _, _, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    account = funded_account(web3)
+    ipfs = LocalIPFS([bytes.fromhex(FILE_HASH_1[2:])])
+
+    async def scenario():
+        node = Web3Node(web3, poll_interval=0.01)
+        hoster = Hoster(
+            node,
+            Signer(node, account.privateKey),
+            scatter.address,
+            scatter.abi,
+            ipfs,
+        )
+        agent = asyncio.ensure_future(hoster.run())
+        await asyncio.sleep(0.05)
+
+        receipt = send(web3, scatter.functions.bid(
+            FILE_HASH_1,
+            FILE_SIZE_1,
+            DURATION_1,
+            BID_VALUE,
+            VALIDATION_POOL
+        ), {
+            'from': bidder,
+            'gas': int(6e6),
+            'value': BID_VALUE + VALIDATION_POOL,
+        })
+        bid_id = scatter.events.BidSuccessful().processReceipt(receipt)[0].args.bidId
+
+        await wait_for(lambda: bid_id in hoster.pinned or hoster.errors)
+        agent.cancel()
+        return hoster, bid_id
+
+    hoster, bid_id = run(scenario())
+
+    assert hoster.errors == []
+    assert bid_id not in hoster.open_bids
+    assert bidStore.functions.getHoster(bid_id).call() == account.address
+    assert bidStore.functions.isPinned(bid_id).call()
+    assert hoster.latencies == [1], "accept() should be in the block after the bid"
+    assert hoster.signer.sent == 2
+    assert ipfs.pinned == [bytes.fromhex(FILE_HASH_1[2:])]
+
+
+def test_hoster_reopen(web3, contracts):
+    """ A bid accepted by someone else is taken once their acceptance runs out unpinned """
+    _, bidder, other_hoster, _, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    env = contracts.get(ENV_CONTRACT_NAME)
+
+    account = funded_account(web3)
+    ipfs = LocalIPFS([bytes.fromhex(FILE_HASH_1[2:])])
+
+    receipt = send(web3, scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        DURATION_1,
+        BID_VALUE,
+        VALIDATION_POOL
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': BID_VALUE + VALIDATION_POOL,
+    })
+    bid_id = scatter.events.BidSuccessful().processReceipt(receipt)[0].args.bidId
+    from_block = receipt.blockNumber
+
+    send(web3, scatter.functions.accept(bid_id), {'from': other_hoster, 'gas': int(6e6)})
+    assert bidStore.functions.getHoster(bid_id).call() == other_hoster
+
+    # The other hoster never pins
+    time_travel(web3, env.functions.getuint(ENV_ACCEPT_WAIT).call() + 1)
+
+    async def scenario():
+        node = Web3Node(web3, poll_interval=0.01)
+        hoster = Hoster(
+            node,
+            Signer(node, account.privateKey),
+            scatter.address,
+            scatter.abi,
+            ipfs,
+            # The chain has moved on but our clock hasn't
+            accept_hold_duration=0,
+        )
+        agent = asyncio.ensure_future(hoster.run(from_block))
+        await wait_for(lambda: bid_id in hoster.pinned or hoster.errors)
+        agent.cancel()
+        return hoster
+
+    hoster = run(scenario())
+
+    assert hoster.errors == []
+    assert bid_id not in hoster.open_bids
+    assert bid_id not in hoster.reserved
+    assert bidStore.functions.getHoster(bid_id).call() == account.address
+    assert bidStore.functions.isPinned(bid_id).call()
+
+
+def test_ipc_node():
+    """ Subscriptions over IPC, with past logs first and duplicates dropped """
+    first = {'blockNumber': '0x1', 'logIndex': '0x0', 'topics': [], 'data': '0x'}
+    second = {'blockNumber': '0x2', 'logIndex': '0x0', 'topics': [], 'data': '0x'}
+
+    disconnected = []
+
+    async def handle(reader, writer):
+        buffer = b''
+        decoder = json.JSONDecoder()
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                writer.close()
+                disconnected.append(True)
+                return
+            buffer += chunk
+            request, end = decoder.raw_decode(buffer.decode('utf-8'))
+            buffer = buffer[end:]
+
+            if request['method'] == 'eth_subscribe':
+                result = '0xsub'
+            else:
+                result = [first]
+            # Responses and notifications aren't delimited, and can share a read
+            writer.write(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result})
+                         .encode('utf-8'))
+            if request['method'] == 'eth_getLogs':
+                for log in (first, second):
+                    writer.write(json.dumps({
+                        'jsonrpc': '2.0',
+                        'method': 'eth_subscription',
+                        'params': {'subscription': '0xsub', 'result': log},
+                    }).encode('utf-8'))
+            await writer.drain()
+
+    async def scenario(path):
+        server = await asyncio.start_unix_server(handle, path)
+        node = IPCNode(path)
+        logs = []
+        async for log in node.logs('0x0000000000000000000000000000000000000001', 1):
+            logs.append(log)
+            if len(logs) == 2:
+                break
+        await node.close()
+        while not disconnected:
+            await asyncio.sleep(0.01)
+        server.close()
+        return logs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = run(scenario(os.path.join(tmp, 'node.ipc')))
+
+    assert [log['blockNumber'] for log in logs] == [1, 2]
+
+
+def test_ipc_node_reconnect():
+    """ A dropped connection fails waiting requests, and logs() picks up where it left off """
+    logs_by_block = {
+        n: {'blockNumber': hex(n), 'logIndex': '0x0', 'topics': [], 'data': '0x'}
+        for n in (1, 2, 3)
+    }
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(True)
+        buffer = b''
+        decoder = json.JSONDecoder()
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                writer.close()
+                return
+            buffer += chunk
+            request, end = decoder.raw_decode(buffer.decode('utf-8'))
+            buffer = buffer[end:]
+
+            if request['method'] == 'eth_blockNumber':
+                # Never answered, the connection drops instead
+                writer.close()
+                return
+            elif request['method'] == 'eth_subscribe':
+                result = '0xsub'
+            else:
+                from_block = int(request['params'][0]['fromBlock'], 16)
+                last_block = 1 if len(connections) == 1 else 2
+                result = [logs_by_block[n] for n in range(from_block, last_block + 1)]
+            writer.write(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result})
+                         .encode('utf-8'))
+            if request['method'] == 'eth_getLogs' and len(connections) > 1:
+                for n in (2, 3):
+                    writer.write(json.dumps({
+                        'jsonrpc': '2.0',
+                        'method': 'eth_subscription',
+                        'params': {'subscription': '0xsub', 'result': logs_by_block[n]},
+                    }).encode('utf-8'))
+            await writer.drain()
+
+    async def scenario(path):
+        server = await asyncio.start_unix_server(handle, path)
+        node = IPCNode(path, reconnect_interval=0.01)
+        logs = []
+        errors = []
+        async for log in node.logs('0x0000000000000000000000000000000000000001', 1):
+            logs.append(log)
+            if len(logs) == 1:
+                try:
+                    await node.block_number()
+                except ConnectionError as err:
+                    errors.append(err)
+            if len(logs) == 3:
+                break
+        await node.close()
+        server.close()
+        return logs, errors
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logs, errors = run(scenario(os.path.join(tmp, 'node.ipc')))
+
+    assert len(errors) == 1, "The request waiting on the dropped connection should fail"
+    assert len(connections) == 2
+    assert [log['blockNumber'] for log in logs] == [1, 2, 3]
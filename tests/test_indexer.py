@@ -0,0 +1,164 @@
+""" Tests for the SQLite event indexer
+
+The benchmark is disabled unless SCATTER_BENCH is set.  It times catching up on INDEX_BENCH_BLOCKS
+blocks (run with -s):
+
+    SCATTER_BENCH=1 sb test -k indexer_benchmark -s
+"""
+import os
+import time
+import pytest
+from scatter.indexer import ACCEPTED, OPEN, PAID, PINNED, Indexer
+from .gas import BENCH_ENV, send
+from .utils import get_accounts, time_travel
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    FILE_HASH_2,
+    FILE_SIZE_2,
+    DURATION_1,
+)
+
+BID_VALUE = int(1e16)
+VALIDATION_POOL = int(1e14)
+INDEX_BENCH_BLOCKS = 5000
+
+
+def place_bid(web3, scatter, bidder, file_hash, file_size, duration):
+    receipt = send(web3, scatter.functions.bid(
+        file_hash,
+        file_size,
+        duration,
+        BID_VALUE,
+        VALIDATION_POOL
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': BID_VALUE + VALIDATION_POOL,
+    })
+    return scatter.events.BidSuccessful().processReceipt(receipt)[0].args.bidId
+
+
+def test_indexer(web3, contracts):
+    """ Bid state follows the events """
+    _, bidder, hoster, validator, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    indexer = Indexer(web3, scatter.address, scatter.abi, start_block=web3.eth.blockNumber + 1)
+
+    open_id = place_bid(web3, scatter, bidder, FILE_HASH_1, FILE_SIZE_1, DURATION_1)
+    accepted_id = place_bid(web3, scatter, bidder, FILE_HASH_2, FILE_SIZE_2, DURATION_1)
+    paid_id = place_bid(web3, scatter, bidder, FILE_HASH_1, FILE_SIZE_1, 1)
+
+    send(web3, scatter.functions.accept(accepted_id), {'from': hoster, 'gas': int(1e6)})
+    send(web3, scatter.functions.accept(paid_id), {'from': hoster, 'gas': int(1e6)})
+    send(web3, scatter.functions.pinned(paid_id), {'from': hoster, 'gas': int(1e6)})
+
+    assert indexer.sync() > 0
+    assert indexer.bid(open_id)['status'] == OPEN
+    assert indexer.bid(accepted_id)['status'] == ACCEPTED
+    assert indexer.bid(accepted_id)['hoster'] == hoster
+    assert indexer.bid(paid_id)['status'] == PINNED
+    assert indexer.bid(open_id)['file_hash'] == FILE_HASH_1
+    assert int(indexer.bid(open_id)['bid_value']) == BID_VALUE
+
+    # Past the duration, the validation pays the hoster
+    time_travel(web3, 2)
+    send(web3, scatter.functions.validate(paid_id), {'from': validator, 'gas': int(3e6)})
+
+    assert indexer.sync() > 0
+    paid = indexer.bid(paid_id)
+    assert paid['status'] == PAID
+    assert int(paid['paid_value']) == BID_VALUE
+    assert paid['valid_count'] == 1
+    assert [row['validator'] for row in indexer.validations(paid_id)] == [validator]
+
+    assert [row['bid_id'] for row in indexer.bids(status=OPEN, bidder=bidder)] == [open_id]
+    assert indexer.status_counts() == {OPEN: 1, ACCEPTED: 1, PAID: 1}
+    assert [e['bidId'] for e in indexer.events('HosterPaid', hoster)] == [paid_id]
+
+    # Nothing new
+    assert indexer.sync() == 0
+    indexer.close()
+
+
+def test_indexer_reorg(web3, contracts):
+    """ Events from blocks that left the chain are rolled back """
+    _, bidder, hoster, validator1, validator2, validator3, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    indexer = Indexer(
+        web3,
+        scatter.address,
+        scatter.abi,
+        start_block=web3.eth.blockNumber + 1,
+        reorg_depth=2,
+    )
+    snapshot = web3.testing.snapshot()
+
+    orphan_id = place_bid(web3, scatter, bidder, FILE_HASH_1, FILE_SIZE_1, DURATION_1)
+    indexer.sync()
+    assert indexer.bid(orphan_id) is not None
+
+    # Replace the block with one holding a different bid
+    web3.testing.revert(snapshot)
+    replaced_id = place_bid(web3, scatter, bidder, FILE_HASH_2, FILE_SIZE_2, DURATION_1)
+    web3.testing.mine(3)
+    assert replaced_id == orphan_id
+
+    indexer.sync()
+    bid = indexer.bid(replaced_id)
+    assert bid['file_hash'] == FILE_HASH_2
+    assert bid['file_size'] == FILE_SIZE_2
+    assert len(indexer.events('BidSuccessful')) == 1
+    assert indexer.last_block()[0] == web3.eth.blockNumber
+    assert indexer.check_reorg() == 0
+
+    # One validation stays on the chain and one is replaced.  The kept one is past the end of
+    # the last range that survives the rollback, and must not be counted again.
+    send(web3, scatter.functions.pinned(replaced_id), {'from': hoster, 'gas': int(1e6)})
+    indexer.sync()
+    send(web3, scatter.functions.validate(replaced_id), {'from': validator1, 'gas': int(1e6)})
+    web3.testing.mine(2)
+    snapshot = web3.testing.snapshot()
+    send(web3, scatter.functions.invalidate(replaced_id), {'from': validator2, 'gas': int(1e6)})
+    indexer.sync()
+    assert indexer.bid(replaced_id)['invalid_count'] == 1
+
+    web3.testing.revert(snapshot)
+    send(web3, scatter.functions.validate(replaced_id), {'from': validator3, 'gas': int(1e6)})
+    web3.testing.mine(3)
+
+    indexer.sync()
+    bid = indexer.bid(replaced_id)
+    assert (bid['valid_count'], bid['invalid_count']) == (2, 0)
+    assert [row['validator'] for row in indexer.validations(replaced_id)] == [
+        validator1,
+        validator3,
+    ]
+    assert len(indexer.events('ValidationOcurred')) == 2
+    indexer.close()
+
+
+@pytest.mark.skipif(not os.environ.get(BENCH_ENV), reason="SCATTER_BENCH is not set")
+def test_indexer_benchmark(web3, contracts):
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    start_block = web3.eth.blockNumber + 1
+    web3.testing.mine(INDEX_BENCH_BLOCKS)
+
+    indexer = Indexer(web3, scatter.address, scatter.abi, start_block=start_block)
+    start = time.time()
+    indexed = indexer.sync()
+    elapsed = time.time() - start
+
+    assert indexed == INDEX_BENCH_BLOCKS
+    print()
+    print("Indexed {} blocks in {:.3f}s ({:.0f} blocks/s, final range {} blocks)".format(
+        indexed,
+        elapsed,
+        indexed / elapsed,
+        indexer.chunk_size,
+    ))
+    indexer.close()
@@ -0,0 +1,89 @@
+""" Tests for the chunk challenge prover """
+import mmap
+import os
+import tempfile
+import pytest
+from eth_account import Account
+from eth_account.messages import defunct_hash_message
+from web3 import Web3
+from scatter.prover import CHUNK_SIZE, Prover, chunk_range, proof_hash, prove, read_chunk
+from .consts import ADDRESS_1, ZERO_BYTES32
+
+SEED_1 = Web3.sha3(text='seed')
+# A seed lower than the file size, so the chunk isn't moved back
+SMALL_SEED = '0x' + '00' * 31 + '01'
+FILE_SIZE = 3 * mmap.ALLOCATIONGRANULARITY + 123
+BID_ID = 7
+
+
+@pytest.fixture
+def data_file():
+    data = os.urandom(FILE_SIZE)
+    with tempfile.NamedTemporaryFile() as tmp:
+        tmp.write(data)
+        tmp.flush()
+        yield tmp.name, data
+
+
+def test_chunk_range():
+    """ chunkStart and chunkSize follow docs/protocol.md """
+    digest = int.from_bytes(Web3.sha3(primitive=bytes(SEED_1) + Web3.toBytes(hexstr=ADDRESS_1)),
+                            'big')
+
+    start, size = chunk_range(SEED_1, ADDRESS_1, 10 ** 9)
+    assert start == max(digest % 10 ** 9 - CHUNK_SIZE, 0)
+    assert size == CHUNK_SIZE
+
+    start, size = chunk_range(SMALL_SEED, ADDRESS_1, 5000)
+    small_digest = int.from_bytes(
+        Web3.sha3(primitive=Web3.toBytes(hexstr=SMALL_SEED) + Web3.toBytes(hexstr=ADDRESS_1)),
+        'big',
+    )
+    assert start == small_digest % 5000
+    assert size == min(CHUNK_SIZE, 5000 - start)
+
+    # Chunks stop at EOF and never start before the file
+    for file_size in (1, 10, 999, 1000, 1001):
+        start, size = chunk_range(SEED_1, ADDRESS_1, file_size)
+        assert start >= 0 and size > 0
+        assert start + size <= file_size
+
+    with pytest.raises(ValueError):
+        chunk_range(ZERO_BYTES32, ADDRESS_1, 0)
+
+
+def test_read_chunk(data_file):
+    """ Chunks are read right on either side of page boundaries """
+    path, data = data_file
+    page = mmap.ALLOCATIONGRANULARITY
+    for start in (0, 1, page - 1, page, 2 * page + 17, FILE_SIZE - 5):
+        size = min(CHUNK_SIZE, FILE_SIZE - start)
+        assert read_chunk(path, start, size) == data[start:start + size]
+
+
+def test_prove(data_file):
+    """ A proof hashes the right chunk and is signed by the hoster for the bid """
+    path, data = data_file
+    account = Account.create()
+
+    proof = prove(path, SEED_1, account.privateKey, ADDRESS_1, BID_ID)
+    start, size = chunk_range(SEED_1, account.address, FILE_SIZE)
+    assert (proof.chunk_start, proof.chunk_size) == (start, size)
+    assert proof.unique_hash == Web3.sha3(primitive=data[start:start + size])
+    assert Account.recoverHash(
+        defunct_hash_message(primitive=proof_hash(ADDRESS_1, BID_ID, proof.unique_hash)),
+        signature=proof.signature,
+    ) == account.address
+
+
+def test_prove_many(data_file):
+    """ Proofs from the process pool match proofs made in process, in order """
+    path, _ = data_file
+    account = Account.create()
+    seeds = [Web3.sha3(text=str(i)) for i in range(100)]
+
+    with Prover(account.privateKey, ADDRESS_1, processes=2, task_size=8) as prover:
+        proofs = prover.prove_many([(path, seed, BID_ID) for seed in seeds])
+        assert prover.prove_many([]) == []
+
+    assert proofs == [prove(path, seed, account.privateKey, ADDRESS_1, BID_ID) for seed in seeds]
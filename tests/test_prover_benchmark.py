@@ -0,0 +1,78 @@
+""" Throughput benchmark for the chunk challenge prover
+
+Overview
+--------
+Disabled unless SCATTER_BENCH is set.  Answers BENCH_CHALLENGES challenges spread over
+BENCH_FILES files of BENCH_FILE_SIZE bytes, in process and over a process pool, and prints the
+challenges per second for each (run with -s).
+
+The files are sparse, so this measures mapping, hashing and signing rather than the disk.  Set
+SCATTER_BENCH_FILES to a comma separated list of paths to use real files instead.
+
+    SCATTER_BENCH=1 sb test -k prover_benchmark -s
+"""
+import os
+import tempfile
+import time
+import pytest
+from eth_account import Account
+from web3 import Web3
+from scatter.prover import Prover
+from .gas import BENCH_ENV, format_rows
+from .consts import ADDRESS_1
+
+BENCH_FILES_ENV = 'SCATTER_BENCH_FILES'
+BENCH_FILES = 4
+BENCH_FILE_SIZE = 4 * 1024 ** 3  # 4 GiB
+BENCH_CHALLENGES = 5000
+
+
+def sparse_files(directory):
+    paths = []
+    for i in range(BENCH_FILES):
+        path = os.path.join(directory, 'file{}'.format(i))
+        with open(path, 'wb') as bench_file:
+            bench_file.truncate(BENCH_FILE_SIZE)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.skipif(not os.environ.get(BENCH_ENV), reason="SCATTER_BENCH is not set")
+def test_prover_benchmark():
+    account = Account.create()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.environ.get(BENCH_FILES_ENV):
+            paths = os.environ[BENCH_FILES_ENV].split(',')
+        else:
+            paths = sparse_files(tmp)
+        file_size = os.path.getsize(paths[0])
+
+        challenges = [
+            (paths[i % len(paths)], Web3.sha3(text=str(i)), i) for i in range(BENCH_CHALLENGES)
+        ]
+
+        rows = [['mode', 'processes', 'seconds', 'challenges/s']]
+        results = {}
+        for mode, processes in (('in process', 1), ('pool', os.cpu_count())):
+            with Prover(account.privateKey, ADDRESS_1, processes=processes) as prover:
+                start = time.time()
+                if processes == 1:
+                    proofs = [prover.prove(*challenge) for challenge in challenges]
+                else:
+                    proofs = prover.prove_many(challenges)
+                elapsed = time.time() - start
+
+            results[mode] = proofs
+            rows.append([mode, str(processes), '{:.3f}'.format(elapsed),
+                         '{:.0f}'.format(len(challenges) / elapsed)])
+
+    print()
+    print("Answering {} challenges over {} files of {} bytes".format(
+        len(challenges),
+        len(paths),
+        file_size,
+    ))
+    print(format_rows(rows))
+
+    assert results['pool'] == results['in process']
@@ -4,6 +4,7 @@ from .utils import (
     std_tx,
     has_event,
     get_event,
+    tx_failed,
 )
 from .consts import (
     ROUTER_CONTRACT_NAME,
@@ -30,3 +31,38 @@ def test_router(web3, contracts):
     receipt = web3.eth.waitForTransactionReceipt(txhash)
     assert receipt.status == 1
     assert router.functions.get(SCATTER_HASH).call() == ADDRESS_1
+
+
+def test_router_many(web3, contracts):
+    """ Test batch registration and resolution """
+
+    admin, other, _, _, _, _, _ = get_accounts(web3)
+
+    router = contracts.get(ROUTER_CONTRACT_NAME)
+
+    names = [web3.sha3(text='RouterTest1'), web3.sha3(text='RouterTest2')]
+    targets = [ADDRESS_1, other]
+
+    assert router.functions.getMany(names).call() == [ZERO_ADDRESS, ZERO_ADDRESS]
+
+    txhash = router.functions.setMany(names, targets).transact(std_tx({
+            'from': admin
+        }))
+    receipt = web3.eth.waitForTransactionReceipt(txhash)
+    assert receipt.status == 1
+    assert router.functions.getMany(names).call() == targets
+    assert router.functions.get(names[1]).call() == other
+
+    # Unknown names resolve to the zero address
+    unknown = web3.sha3(text='RouterTestUnknown')
+    assert router.functions.getMany([names[0], unknown]).call() == [ADDRESS_1, ZERO_ADDRESS]
+
+    # Lengths have to match
+    assert tx_failed(web3, router.functions.setMany(names, [ADDRESS_1]), std_tx({
+            'from': admin
+        }))
+
+    # Only the owner can set records
+    assert tx_failed(web3, router.functions.setMany(names, targets), std_tx({
+            'from': other
+        }))
@@ -8,12 +8,15 @@ The general process for bidding:
 """
 from hexbytes import HexBytes
 from .utils import (
+    funded_account,
     get_accounts,
+    send_signed,
     std_tx,
     has_event,
     get_event,
     normalize_filehash,
     time_travel,
+    tx_failed,
 )
 from .consts import (
     MAIN_CONTRACT_NAME,
@@ -32,6 +35,9 @@ from .consts import (
     ENV_MIN_DURATION,
 )
 
+# Scatter.JOB_SCAN_LIMIT
+JOB_SCAN_LIMIT = 50
+
 
 def calculate_sway(min_valid, validations):
     assert min_valid <= len(validations)
@@ -138,6 +144,96 @@ def test_bid_with_minvalidations(web3, contracts):
     assert minValidations == 5, "Invalid validationPool: {}".format(evnt.args.validationPool)
 
 
+def test_bid_many(web3, contracts):
+    """ Test batched bids and compare gas per bid against single bids """
+    _, bidder, _, _, _, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+
+    bid_value = int(1e16)
+    validation_pool = int(1e14)
+
+    # A single bid for reference
+    single_hash = scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        DURATION_1,
+        bid_value,
+        validation_pool
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': int(6e6),
+        'value': bid_value + validation_pool
+    }))
+    single_receipt = web3.eth.waitForTransactionReceipt(single_hash)
+    assert single_receipt.status == 1, "Bid transaction failed. Receipt: {}".format(single_receipt)
+    assert has_event(scatter, 'BidSuccessful', single_receipt), 'BidSuccessful event not found'
+
+    # Not enough value for the whole batch
+    orig_bid_count = scatter.functions.getBidCount().call()
+    short_hash = scatter.functions.bidMany(
+        [FILE_HASH_1, FILE_HASH_2],
+        [FILE_SIZE_1, FILE_SIZE_2],
+        [DURATION_1, DURATION_2],
+        [bid_value, bid_value],
+        [validation_pool, validation_pool],
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': int(6e6),
+        'value': bid_value + validation_pool
+    }))
+    short_receipt = web3.eth.waitForTransactionReceipt(short_hash)
+    assert short_receipt.status == 1, "bidMany transaction failed"
+    assert has_event(scatter, 'BidInvalid', short_receipt), 'BidInvalid event not found'
+    assert scatter.functions.getBidCount().call() == orig_bid_count
+
+    gas_limit = web3.eth.getBlock('latest').gasLimit
+    gas_per_bid = {}
+
+    for batch_size in (1, 10, 100):
+        if single_receipt.gasUsed * batch_size > gas_limit:
+            print("bidMany x{} skipped: may not fit the block gas limit of {}".format(
+                batch_size,
+                gas_limit,
+            ))
+            continue
+
+        orig_bid_count = scatter.functions.getBidCount().call()
+
+        batch_hash = scatter.functions.bidMany(
+            [FILE_HASH_1] * batch_size,
+            [FILE_SIZE_1] * batch_size,
+            [DURATION_1] * batch_size,
+            [bid_value] * batch_size,
+            [validation_pool] * batch_size,
+        ).transact(std_tx({
+            'from': bidder,
+            'gas': gas_limit,
+            'value': (bid_value + validation_pool) * batch_size
+        }))
+        batch_receipt = web3.eth.waitForTransactionReceipt(batch_hash)
+        assert batch_receipt.status == 1, "bidMany transaction failed"
+        assert not has_event(scatter, 'BidInvalid', batch_receipt), 'Unexpected BidInvalid'
+
+        evnts = scatter.events.BidSuccessful().processReceipt(batch_receipt)
+        assert [e.args.bidId for e in evnts] == list(
+            range(orig_bid_count, orig_bid_count + batch_size)
+        )
+        assert scatter.functions.getBidCount().call() == orig_bid_count + batch_size
+
+        gas_per_bid[batch_size] = batch_receipt.gasUsed // batch_size
+
+    print("bid() gas: {}".format(single_receipt.gasUsed))
+    for batch_size, gas in sorted(gas_per_bid.items()):
+        print("bidMany x{} gas per bid: {} ({:.1%} of bid())".format(
+            batch_size,
+            gas,
+            gas / single_receipt.gasUsed,
+        ))
+
+    assert gas_per_bid[10] < single_receipt.gasUsed, "Batching should be cheaper per bid"
+
+
 def test_accept(web3, contracts):
     """ Test accepting bids """
     _, bidder, hoster, _, _, joe, _ = get_accounts(web3)
@@ -240,6 +336,141 @@ def test_pinned(web3, contracts):
     assert has_event(scatter, 'Pinned', pin_receipt), "Pinned event not found"
 
 
+def test_get_job(web3, contracts):
+    """ Test that getJob only hands out bids that can be accepted """
+    _, bidder, hoster, _, _, jake, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    # Bid
+    bid_hash = scatter.functions.bid(
+        FILE_HASH_2,
+        FILE_SIZE_2,
+        DURATION_2,
+        int(1e16),
+        int(1e14)
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': int(6e6),
+        'value': int(1e16) + int(1e14)
+    }))
+    bid_receipt = web3.eth.waitForTransactionReceipt(bid_hash)
+    assert bid_receipt.status == 1, "Bid transaction failed. Receipt: {}".format(bid_receipt)
+    bid_id = get_event(scatter, 'BidSuccessful', bid_receipt).args.bidId
+
+    open_count = bidStore.functions.getOpenBidCount().call()
+    assert open_count > 0
+
+    job_id, job_hash, job_size = scatter.functions.getJob().call({'from': hoster})
+    assert job_id > -1, "No job found"
+    assert scatter.functions.isBidOpenForAccept(job_id, hoster).call()
+    assert job_hash == bidStore.functions.getFileHash(job_id).call()
+    assert job_size == bidStore.functions.getFileSize(job_id).call()
+
+    # Bidders are never handed their own bids
+    job_id, _, _ = scatter.functions.getJob().call({'from': bidder})
+    assert job_id == -1 or bidStore.functions.getBidder(job_id).call() != bidder
+
+    # The paginated view hands out the same jobs
+    job_ids, job_hashes, job_sizes, cursor = scatter.functions.getOpenJobs(-1, open_count).call({
+        'from': hoster
+    })
+    assert cursor == -1
+    assert bid_id in job_ids
+    for i, open_id in enumerate(job_ids):
+        assert scatter.functions.isBidOpenForAccept(open_id, hoster).call()
+        assert job_hashes[i] == bidStore.functions.getFileHash(open_id).call()
+        assert job_sizes[i] == bidStore.functions.getFileSize(open_id).call()
+    job_ids, _, _, _ = scatter.functions.getOpenJobs(-1, open_count).call({'from': bidder})
+    assert bid_id not in job_ids
+
+    # Accept
+    accept_hash = scatter.functions.accept(bid_id).transact(std_tx({'from': hoster}))
+    accept_receipt = web3.eth.waitForTransactionReceipt(accept_hash)
+    assert accept_receipt.status == 1, "accept failed"
+    assert has_event(scatter, 'Accepted', accept_receipt), "Accepted event not found"
+
+    # Reserved bids are not handed out to anyone else
+    job_id, _, _ = scatter.functions.getJob().call({'from': jake})
+    assert job_id != bid_id
+
+    # Pin
+    pin_hash = scatter.functions.pinned(bid_id).transact(std_tx({
+        'from': hoster,
+        'gas': int(6e6)
+    }))
+    pin_receipt = web3.eth.waitForTransactionReceipt(pin_hash)
+    assert pin_receipt.status == 1, "pin failed"
+    assert bidStore.functions.getOpenBidCount().call() == open_count - 1
+
+    # Pinned bids are not handed out at all
+    job_id, _, _ = scatter.functions.getJob().call({'from': jake})
+    assert job_id != bid_id
+    job_ids, _, _, _ = scatter.functions.getOpenJobs(-1, open_count).call({'from': jake})
+    assert bid_id not in job_ids
+
+
+def test_get_job_scan_limit(web3, contracts):
+    """ getJob() only looks at the front of the queue.  getOpenJobs() finds what it misses. """
+    _, bidder, _, _, _, jake, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    bid_value = int(1e16)
+    validation_pool = int(1e14)
+
+    # Reserve whatever the bidder could take already.  Reserved bids move to the back.
+    reserver = funded_account(web3)
+    open_count = bidStore.functions.getOpenBidCount().call()
+    if open_count > 0:
+        job_ids, _, _, _ = scatter.functions.getOpenJobs(-1, open_count).call({'from': bidder})
+        for job_id in job_ids:
+            assert send_signed(web3, reserver, scatter.functions.accept(job_id)).status == 1
+
+    # A full scan of the bidder's own bids ahead of one they could take
+    for _ in range(JOB_SCAN_LIMIT // 10):
+        batch_hash = scatter.functions.bidMany(
+            [FILE_HASH_1] * 10,
+            [FILE_SIZE_1] * 10,
+            [DURATION_1] * 10,
+            [bid_value] * 10,
+            [validation_pool] * 10,
+        ).transact(std_tx({
+            'from': bidder,
+            'gas': int(6e6),
+            'value': (bid_value + validation_pool) * 10,
+        }))
+        assert web3.eth.waitForTransactionReceipt(batch_hash).status == 1, "bidMany failed"
+
+    bid_hash = scatter.functions.bid(
+        FILE_HASH_2,
+        FILE_SIZE_2,
+        DURATION_2,
+        bid_value,
+        validation_pool
+    ).transact(std_tx({
+        'from': jake,
+        'gas': int(6e6),
+        'value': bid_value + validation_pool
+    }))
+    bid_receipt = web3.eth.waitForTransactionReceipt(bid_hash)
+    assert bid_receipt.status == 1, "Bid transaction failed"
+    bid_id = get_event(scatter, 'BidSuccessful', bid_receipt).args.bidId
+
+    job_id, _, _ = scatter.functions.getJob().call({'from': bidder})
+    assert job_id == -1, "The scan should stop before the job"
+
+    found = []
+    cursor = -1
+    while True:
+        job_ids, _, _, cursor = scatter.functions.getOpenJobs(cursor, JOB_SCAN_LIMIT).call({
+            'from': bidder
+        })
+        found.extend(job_ids)
+        if cursor == -1:
+            break
+    assert bid_id in found
+
+
 def test_validation(web3, contracts):
     """ Test the full validation process
 
@@ -297,6 +528,14 @@ def test_validation(web3, contracts):
     assert evnt.args.bidId == bid_id
     assert evnt.args.validator == validator1
     assert evnt.args.isValid
+    assert scatter.functions.validatorIndex(bid_id, validator1).call() == 0
+
+    # Validators only get one say per bid
+    assert tx_failed(web3, scatter.functions.validate(bid_id), std_tx({
+        'from': validator1,
+        'gas': int(6e6)
+    })), "duplicate validation should fail"
+    assert scatter.functions.getValidationCount(bid_id).call() == 1
 
     # Validation #2 (invalid)
     v2_hash = scatter.functions.invalidate(bid_id).transact(std_tx({
@@ -394,6 +633,91 @@ def test_validation(web3, contracts):
     assert satisfied, "bid should be satisfied but got: {}".format(satisfied)
 
 
+def test_validate_many(web3, contracts):
+    """ Test validating many bids in one transaction """
+    _, bidder, hoster, validator1, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    bid_value = int(1e16)
+    validation_pool = int(1e14)
+    verdicts = [True, False, True]
+
+    # Bid
+    bid_hash = scatter.functions.bidMany(
+        [FILE_HASH_1] * len(verdicts),
+        [FILE_SIZE_1] * len(verdicts),
+        [DURATION_1] * len(verdicts),
+        [bid_value] * len(verdicts),
+        [validation_pool] * len(verdicts),
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': int(6e6),
+        'value': (bid_value + validation_pool) * len(verdicts)
+    }))
+    bid_receipt = web3.eth.waitForTransactionReceipt(bid_hash)
+    assert bid_receipt.status == 1, "bidMany transaction failed"
+    bid_ids = [e.args.bidId for e in scatter.events.BidSuccessful().processReceipt(bid_receipt)]
+    assert len(bid_ids) == len(verdicts)
+
+    # Unpinned bids are skipped rather than reverting the batch
+    skip_hash = scatter.functions.validateMany(bid_ids, verdicts).transact(std_tx({
+        'from': validator1,
+        'gas': int(6e6)
+    }))
+    skip_receipt = web3.eth.waitForTransactionReceipt(skip_hash)
+    assert skip_receipt.status == 1, "validateMany of unpinned bids should not revert"
+    assert not scatter.events.ValidationOcurred().processReceipt(skip_receipt)
+    for bid_id in bid_ids:
+        assert scatter.functions.getValidationCount(bid_id).call() == 0
+
+    # Pin
+    for bid_id in bid_ids:
+        pin_hash = scatter.functions.pinned(bid_id).transact(std_tx({
+            'from': hoster,
+            'gas': int(6e6)
+        }))
+        pin_receipt = web3.eth.waitForTransactionReceipt(pin_hash)
+        assert pin_receipt.status == 1, "pin failed"
+
+    # Mismatched arrays are refused
+    assert tx_failed(web3, scatter.functions.validateMany(bid_ids, verdicts[:2]), std_tx({
+        'from': validator1,
+        'gas': int(6e6)
+    })), "mismatched validateMany should fail"
+
+    # Validate them all at once
+    v_hash = scatter.functions.validateMany(bid_ids, verdicts).transact(std_tx({
+        'from': validator1,
+        'gas': int(6e6)
+    }))
+    v_receipt = web3.eth.waitForTransactionReceipt(v_hash)
+    assert v_receipt.status == 1, "validateMany tx failed"
+
+    evnts = scatter.events.ValidationOcurred().processReceipt(v_receipt)
+    assert [e.args.bidId for e in evnts] == bid_ids
+    assert [e.args.isValid for e in evnts] == verdicts
+    assert all(e.args.validator == validator1 for e in evnts)
+
+    for bid_id, verdict in zip(bid_ids, verdicts):
+        assert scatter.functions.getValidationCount(bid_id).call() == 1
+        valid_count, invalid_count, _ = bidStore.functions.getValidationTally(bid_id).call()
+        assert valid_count == (1 if verdict else 0)
+        assert invalid_count == (0 if verdict else 1)
+        assert scatter.functions.validatorIndex(bid_id, validator1).call() == 0
+
+    # Validators only get one say per bid, repeats are skipped
+    dupe_hash = scatter.functions.validateMany(bid_ids, verdicts).transact(std_tx({
+        'from': validator1,
+        'gas': int(6e6)
+    }))
+    dupe_receipt = web3.eth.waitForTransactionReceipt(dupe_hash)
+    assert dupe_receipt.status == 1, "duplicate validateMany should not revert"
+    assert not scatter.events.ValidationOcurred().processReceipt(dupe_receipt)
+    for bid_id in bid_ids:
+        assert scatter.functions.getValidationCount(bid_id).call() == 1
+
+
 def test_withdraw(web3, contracts):
     """ Test withdraw functionality """
 
@@ -445,8 +769,9 @@ def test_withdraw(web3, contracts):
     }))
     web3.eth.waitForTransactionReceipt(v1_hash)
     web3.eth.waitForTransactionReceipt(v2_hash)
-    web3.eth.waitForTransactionReceipt(v3_hash)
+    v3_receipt = web3.eth.waitForTransactionReceipt(v3_hash)
     assert scatter.functions.satisfied(bid_id).call(), "Bid should be satisfied"
+    assert has_event(scatter, 'HosterPaid', v3_receipt), "HosterPaid event not found"
 
     # Bidder has nothing to withdraw
     bidder_txhash = scatter.functions.withdraw().transact(std_tx({'from': bidder}))
@@ -498,6 +823,97 @@ def test_withdraw(web3, contracts):
     predicted_difference = hoster_withdraw_evnt.args.value - (gas_price * med_gas)
     assert seen_difference - predicted_difference < (gas_price * med_gas), "Invalid change"
 
+    # Validators pull their own share of the validation pool
+    validator_share = validation_value // 3
+    assert scatter.functions.balance(validator1).call() == 0, \
+        "Validators should not be pushed funds"
+    claim_txhash = scatter.functions.claim(bid_id).transact(std_tx({
+        'from': validator1,
+        'gas': med_gas,
+    }))
+    claim_receipt = web3.eth.waitForTransactionReceipt(claim_txhash)
+    assert claim_receipt.status == 1, "claim failed"
+    assert has_event(scatter, 'Claimed', claim_receipt), 'Claimed event not found'
+    claim_evnt = get_event(scatter, 'Claimed', claim_receipt)
+    assert claim_evnt.args.bidId == bid_id
+    assert claim_evnt.args.validator == validator1
+    assert claim_evnt.args.value == validator_share
+    assert scatter.functions.balance(validator1).call() == validator_share
+
+    # A share can only be claimed once
+    claim2_txhash = scatter.functions.claim(bid_id).transact(std_tx({
+        'from': validator1,
+        'gas': med_gas,
+    }))
+    claim2_receipt = web3.eth.waitForTransactionReceipt(claim2_txhash)
+    assert claim2_receipt.status == 1, "claim failed"
+    assert not has_event(scatter, 'Claimed', claim2_receipt), 'Share claimed twice'
+    assert scatter.functions.balance(validator1).call() == validator_share
+
+    # Only validators have a share to claim
+    claim3_txhash = scatter.functions.claim(bid_id).transact(std_tx({
+        'from': kristen,
+        'gas': med_gas,
+    }))
+    claim3_receipt = web3.eth.waitForTransactionReceipt(claim3_txhash)
+    assert claim3_receipt.status == 1, "claim failed"
+    assert not has_event(scatter, 'Claimed', claim3_receipt), 'Non-validator claimed a share'
+    assert scatter.functions.balance(kristen).call() == 0
+
+    # No more validations once the bid has been paid out
+    assert tx_failed(web3, scatter.functions.validate(bid_id), std_tx({
+        'from': kristen,
+        'gas': med_gas,
+    })), "validation after payout should fail"
+
+
+def test_env_cache(web3, contracts):
+    """ Test that Scatter picks up Env changes after the config version moves """
+
+    admin, bidder, _, _, _, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    env = contracts.get(ENV_CONTRACT_NAME)
+
+    bid_value = int(1e18)  # 1 Ether
+    validation_value = int(1e17)  # 0.1 Ether
+    gas = int(3e6)
+
+    orig_min_bid = env.functions.getuint(ENV_MIN_BID).call()
+
+    set_txhash = env.functions.setuint(ENV_MIN_BID, bid_value + 1).transact(std_tx({
+        'from': admin,
+    }))
+    set_receipt = web3.eth.waitForTransactionReceipt(set_txhash)
+    assert set_receipt.status == 1, "setuint() transaction reverted"
+
+    # The next bid refreshes the cache and sees the new minimum
+    bid_hash = scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        DURATION_1,
+        bid_value,
+        validation_value
+    ).transact(std_tx({
+        'from': bidder,
+        'gas': gas,
+        'value': bid_value + validation_value,
+    }))
+    bid_receipt = web3.eth.waitForTransactionReceipt(bid_hash)
+    assert bid_receipt.status == 1, "Bid transaction failed. Receipt: {}".format(bid_receipt)
+    assert has_event(scatter, 'BidInvalid', bid_receipt), 'BidInvalid event not found'
+
+    # Put it back
+    set_txhash = env.functions.setuint(ENV_MIN_BID, orig_min_bid).transact(std_tx({
+        'from': admin,
+    }))
+    set_receipt = web3.eth.waitForTransactionReceipt(set_txhash)
+    assert set_receipt.status == 1, "setuint() transaction reverted"
+
+    refresh_txhash = scatter.functions.refreshEnv().transact(std_tx({'from': bidder}))
+    refresh_receipt = web3.eth.waitForTransactionReceipt(refresh_txhash)
+    assert refresh_receipt.status == 1, "refreshEnv() transaction reverted"
+
 
 def test_invalid_bids(web3, contracts):
     """ Test that the contract responds properly to invalid bids """
@@ -0,0 +1,65 @@
+""" Tests for the EVM tracer """
+from .utils import (
+    get_accounts,
+    trace_call,
+    trace_transaction,
+)
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    ENV_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_SIZE_1,
+    DURATION_1,
+)
+
+
+def test_trace_bid(web3, contracts):
+    """ Trace a bid through Scatter and BidStore """
+    _, bidder, hoster, _, _, _, _ = get_accounts(web3)
+
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+    env = contracts.get(ENV_CONTRACT_NAME)
+    named = {
+        'Scatter': scatter,
+        'BidStore': bidStore,
+        'Env': env,
+    }
+
+    receipt, trace = trace_transaction(web3, scatter.functions.bid(
+        FILE_HASH_1,
+        FILE_SIZE_1,
+        DURATION_1,
+        int(1e16),
+        int(1e14)
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': int(1e16) + int(1e14),
+    }, named)
+    assert receipt.status == 1, "Bid transaction failed. Receipt: {}".format(receipt)
+    print(trace.table())
+
+    bid_stats = trace.stats[('Scatter', 'bid')]
+    assert bid_stats['count'] == 1
+    assert bid_stats['calls'] > 0, "bid() should call out to Env and BidStore"
+    assert bid_stats['gas'] >= bid_stats['own_gas']
+
+    add_stats = trace.stats[('BidStore', 'addBid')]
+    assert add_stats['count'] == 1
+    assert add_stats['sstore'] > 0
+    assert add_stats['calls'] == 0
+    assert bid_stats['gas'] - bid_stats['own_gas'] >= add_stats['gas']
+
+    assert ('Env', 'banStatus') in trace.stats
+    assert trace.by_contract()['BidStore']['sstore'] == add_stats['sstore']
+    assert trace.gas_used == receipt.gasUsed
+
+    # Views
+    result, trace = trace_call(scatter.functions.getJob(), {'from': hoster}, named)
+    assert len(result) == 3
+    job_stats = trace.stats[('Scatter', 'getJob')]
+    assert job_stats['count'] == 1
+    assert job_stats['sstore'] == 0
+    assert trace.stats[('BidStore', 'getFirstOpenBid')]['count'] == 1
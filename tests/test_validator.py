@@ -0,0 +1,145 @@
+""" Tests for the validator agent """
+import asyncio
+from eth_abi import decode_abi
+from web3 import Web3
+from scatter.node import Web3Node
+from scatter.signer import Signer
+from scatter.validator import Validator
+from .ipfs import LocalIPFS
+from .gas import send
+from .utils import funded_account, get_accounts, run, wait_for
+from .consts import (
+    MAIN_CONTRACT_NAME,
+    STORE_CONTRACT_NAME,
+    FILE_HASH_1,
+    FILE_HASH_2,
+    FILE_SIZE_1,
+    DURATION_1,
+    DURATION_2,
+)
+
+BID_VALUE = int(1e16)
+VALIDATION_POOL = int(1e14)
+
+SCATTER_ABI = [
+    {'type': 'function', 'name': 'validateMany', 'inputs': [
+        {'name': 'bidIds', 'type': 'int256[]'},
+        {'name': 'verdicts', 'type': 'bool[]'},
+    ], 'outputs': []},
+    {'type': 'function', 'name': 'bidStore', 'inputs': [], 'outputs': [
+        {'name': '', 'type': 'address'},
+    ]},
+]
+BID_STORE_ABI = [
+    {'type': 'function', 'name': name, 'inputs': inputs, 'outputs': [{'name': '', 'type': out}]}
+    for name, inputs, out in (
+        ('getPinned', [{'name': 'bidId', 'type': 'int256'}], 'uint256'),
+        ('getDuration', [{'name': 'bidId', 'type': 'int256'}], 'uint256'),
+        ('hasValidated', [
+            {'name': 'bidId', 'type': 'int256'},
+            {'name': '_validator', 'type': 'address'},
+        ], 'bool'),
+    )
+]
+
+
+class RevertingChain(object):
+    """ Stands in for the node and signer.  validateMany() reverts if it has a bad bid. """
+
+    def __init__(self, bad_bids):
+        self.address = '0x' + '11' * 20
+        self.bad_bids = set(bad_bids)
+        self.sent = []
+
+    async def send(self, to, data, gas, value=0):
+        bid_ids, _ = decode_abi(['int256[]', 'bool[]'], Web3.toBytes(hexstr=data)[4:])
+        self.sent.append(list(bid_ids))
+        return len(self.sent) - 1
+
+    async def get_transaction_receipt(self, txhash):
+        reverted = self.bad_bids.intersection(self.sent[txhash])
+        return {'status': 0 if reverted else 1}
+
+
+def test_validator(web3, contracts):
+    """ Pins are checked soonest deadline first and verdicts go out in one validateMany() """
+    _, bidder, hoster, _, _, _, _ = get_accounts(web3)
+    scatter = contracts.get(MAIN_CONTRACT_NAME)
+    bidStore = contracts.get(STORE_CONTRACT_NAME)
+
+    file_hashes = [FILE_HASH_1, FILE_HASH_2, FILE_HASH_1]
+    durations = [DURATION_2, DURATION_1, DURATION_2 * 2]
+
+    receipt = send(web3, scatter.functions.bidMany(
+        file_hashes,
+        [FILE_SIZE_1] * len(file_hashes),
+        durations,
+        [BID_VALUE] * len(file_hashes),
+        [VALIDATION_POOL] * len(file_hashes),
+    ), {
+        'from': bidder,
+        'gas': int(6e6),
+        'value': (BID_VALUE + VALIDATION_POOL) * len(file_hashes),
+    })
+    bid_ids = [e.args.bidId for e in scatter.events.BidSuccessful().processReceipt(receipt)]
+    assert len(bid_ids) == len(file_hashes)
+
+    from_block = web3.eth.blockNumber + 1
+    for bid_id in bid_ids:
+        send(web3, scatter.functions.pinned(bid_id), {'from': hoster, 'gas': int(6e6)})
+
+    account = funded_account(web3)
+    # FILE_HASH_2 can't be found
+    ipfs = LocalIPFS([bytes.fromhex(FILE_HASH_1[2:])])
+
+    async def scenario():
+        node = Web3Node(web3, poll_interval=0.01)
+        validator = Validator(
+            node,
+            Signer(node, account.privateKey),
+            scatter.address,
+            scatter.abi,
+            bidStore.abi,
+            ipfs,
+            workers=1,
+            hoster_interval=0.01,
+            batch_size=len(bid_ids),
+            batch_interval=60,
+        )
+        agent = asyncio.ensure_future(validator.run(from_block))
+        await wait_for(lambda: len(validator.validated) == len(bid_ids) or validator.errors)
+        agent.cancel()
+        return validator
+
+    validator = run(scenario())
+
+    assert validator.errors == []
+    assert validator.batches == [[bid_ids[1], bid_ids[0], bid_ids[2]]], "Expected one batch"
+    assert validator.signer.sent == 1
+    assert ipfs.checked == [bytes.fromhex(h[2:]) for h in (FILE_HASH_2, FILE_HASH_1, FILE_HASH_1)]
+    assert validator.validated == {bid_ids[0]: True, bid_ids[1]: False, bid_ids[2]: True}
+
+    for bid_id in bid_ids:
+        assert bidStore.functions.hasValidated(bid_id, account.address).call()
+
+
+def test_validator_split_reverted():
+    """ A reverted batch is split and sent again until only the bad bid is left """
+    chain = RevertingChain([3])
+    validator = Validator(
+        chain,
+        chain,
+        '0x' + '22' * 20,
+        SCATTER_ABI,
+        BID_STORE_ABI,
+        None,
+        batch_size=4,
+    )
+    validator.verdicts = {bid_id: True for bid_id in range(1, 6)}
+
+    run(validator.flush())
+
+    assert chain.sent == [[1, 2, 3, 4], [5], [1, 2], [3, 4], [3], [4]]
+    assert sorted(validator.batches) == [[1, 2], [4], [5]]
+    assert validator.reverted == [[1, 2, 3, 4], [3, 4], [3]]
+    assert [bid_ids for bid_ids, _ in validator.errors] == [[3]]
@@ -0,0 +1,221 @@
+""" Storage and call tracing for the eth_tester/py-evm test chain
+
+The tracer patches py-evm's Computation while a transaction or call runs and tallies, per
+contract and function:
+
+- sload/sstore: storage reads and writes made by the function's own code
+- calls: CALL, CALLCODE, DELEGATECALL and STATICCALL made by the function
+- gas: gas used by the call including any calls it made
+- own_gas: gas used by the call minus what the calls it made used
+- count: how many times the function was entered
+
+Contracts are named from the web3 contract objects handed to the tracer.  Linked library
+functions show up under the library since they run through DELEGATECALL.
+"""
+from collections import OrderedDict
+from web3 import Web3
+
+SLOAD = 0x54
+SSTORE = 0x55
+CALL_OPCODES = {
+    0xf1: 'CALL',
+    0xf2: 'CALLCODE',
+    0xf4: 'DELEGATECALL',
+    0xfa: 'STATICCALL',
+}
+
+
+def load_computation_class():
+    """ Get py-evm's base Computation class.  The package was renamed from evm to eth. """
+    try:
+        from eth.vm.computation import BaseComputation
+    except ImportError:
+        try:
+            from evm.vm.computation import BaseComputation
+        except ImportError:
+            raise RuntimeError("EVM tracing needs the py-evm backend used by eth_tester")
+    return BaseComputation
+
+
+def function_selectors(web3contract):
+    """ Map the 4 byte selectors of a contract's functions to their names """
+    selectors = {}
+    for abi in web3contract.abi:
+        if abi.get('type') != 'function':
+            continue
+        args = ','.join([a.get('type') for a in abi.get('inputs')])
+        sig = '{}({})'.format(abi.get('name'), args)
+        selectors[bytes(Web3.sha3(text=sig)[:4])] = abi.get('name')
+    return selectors
+
+
+class Frame(object):
+    """ One message call while it is running """
+
+    def __init__(self, key, gas):
+        self.key = key
+        self.gas = gas
+        self.children_gas = 0
+
+
+class Trace(object):
+    """ The tallies for one traced transaction or call """
+
+    def __init__(self, contracts=None):
+        self.names = {}
+        self.selectors = {}
+        self.stats = OrderedDict()
+        self.frames = []
+        self.runs = 0
+        self.gas_used = None
+
+        for name, web3contract in (contracts or {}).items():
+            address = bytes(Web3.toBytes(hexstr=web3contract.address))
+            self.names[address] = name
+            self.selectors[address] = function_selectors(web3contract)
+
+    def name_call(self, message):
+        """ Return (contract, function) for a message """
+        if len(bytes(message.to)) == 0:
+            return ('new contract', 'constructor')
+
+        address = bytes(message.code_address)
+        contract = self.names.get(address, Web3.toChecksumAddress('0x' + address.hex()))
+
+        data = bytes(message.data)
+        if len(data) < 4:
+            return (contract, 'fallback')
+        selector = data[:4]
+        function = self.selectors.get(address, {}).get(selector, '0x' + selector.hex())
+        return (contract, function)
+
+    def tally(self, key):
+        if key not in self.stats:
+            self.stats[key] = {
+                'count': 0,
+                'sload': 0,
+                'sstore': 0,
+                'calls': 0,
+                'gas': 0,
+                'own_gas': 0,
+            }
+        return self.stats[key]
+
+    def enter(self, message):
+        if message.depth == 0:
+            self.runs += 1
+        if self.runs > 1:
+            # Only the first run of a transaction counts if the backend replays it
+            return
+        frame = Frame(self.name_call(message), message.gas)
+        self.tally(frame.key)['count'] += 1
+        self.frames.append(frame)
+
+    def exit(self, message, computation):
+        if self.runs > 1 or not self.frames:
+            return
+        frame = self.frames.pop()
+        gas = frame.gas - computation.get_gas_remaining()
+        stats = self.tally(frame.key)
+        stats['gas'] += gas
+        stats['own_gas'] += gas - frame.children_gas
+        if self.frames:
+            self.frames[-1].children_gas += gas
+
+    def opcode(self, opcode):
+        if self.runs > 1 or not self.frames:
+            return
+        stats = self.tally(self.frames[-1].key)
+        if opcode == SLOAD:
+            stats['sload'] += 1
+        elif opcode == SSTORE:
+            stats['sstore'] += 1
+        elif opcode in CALL_OPCODES:
+            stats['calls'] += 1
+
+    def by_contract(self):
+        """ Sum the tallies for each contract """
+        totals = OrderedDict()
+        for (contract, _), stats in self.stats.items():
+            total = totals.setdefault(contract, dict((k, 0) for k in stats))
+            for k, v in stats.items():
+                total[k] += v
+        return totals
+
+    def table(self):
+        """ Format the tallies as a plain text table """
+        columns = ['count', 'sload', 'sstore', 'calls', 'gas', 'own_gas']
+        rows = [['contract', 'function'] + columns]
+        for (contract, function), stats in self.stats.items():
+            rows.append([contract, function] + [str(stats[c]) for c in columns])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ['  '.join(col.ljust(widths[i]) for i, col in enumerate(row)).rstrip()
+                 for row in rows]
+        if self.gas_used is not None:
+            lines.append('gasUsed: {}'.format(self.gas_used))
+        return '\n'.join(lines)
+
+
+class Tracer(object):
+    """ Context manager that patches py-evm to feed a Trace """
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.computation_class = load_computation_class()
+        self.orig_apply = None
+        self.orig_get_opcode_fn = None
+
+    def __enter__(self):
+        trace = self.trace
+        klass = self.computation_class
+        if 'get_opcode_fn' not in klass.__dict__:
+            raise RuntimeError("This version of py-evm does not look up opcodes through "
+                               "get_opcode_fn and can not be traced")
+        orig_apply = klass.__dict__['apply_computation'].__func__
+        orig_get_opcode_fn = klass.__dict__['get_opcode_fn']
+
+        def apply_computation(cls, state, message, transaction_context):
+            trace.enter(message)
+            computation = orig_apply(cls, state, message, transaction_context)
+            trace.exit(message, computation)
+            return computation
+
+        def get_opcode_fn(computation, *args):
+            # Older py-evm passes the opcode table before the opcode
+            trace.opcode(args[-1])
+            return orig_get_opcode_fn(computation, *args)
+
+        self.orig_apply = orig_apply
+        self.orig_get_opcode_fn = orig_get_opcode_fn
+        klass.apply_computation = classmethod(apply_computation)
+        klass.get_opcode_fn = get_opcode_fn
+        return trace
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.computation_class.apply_computation = classmethod(self.orig_apply)
+        self.computation_class.get_opcode_fn = self.orig_get_opcode_fn
+        return False
+
+
+def trace_transaction(web3, contract_fn, tx, contracts=None):
+    """ Send a transaction with the tracer on and return the receipt and Trace
+
+    contracts is a dict of names to web3 contract objects used to name the calls, e.g.
+    {'Scatter': scatter, 'BidStore': bidStore}.  Give tx a gas value or the gas estimate will
+    be traced instead of the transaction.
+    """
+    assert 'gas' in tx, "Set gas on traced transactions so the estimate is not traced"
+    trace = Trace(contracts)
+    with Tracer(trace):
+        txhash = contract_fn.transact(tx)
+        receipt = web3.eth.waitForTransactionReceipt(txhash)
+    trace.gas_used = receipt.gasUsed
+    return receipt, trace
+
+
+def trace_call(contract_fn, tx=None, contracts=None):
+    """ Run a call with the tracer on and return the result and Trace """
+    trace = Trace(contracts)
+    with Tracer(trace):
+        result = contract_fn.call(tx or {})
+    return result, trace
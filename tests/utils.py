@@ -1,11 +1,18 @@
 import sys
 import math
+import asyncio
 from datetime import datetime
 from attrdict import AttrDict
+from eth_account import Account
+from eth_tester.exceptions import TransactionFailed
 from hexbytes import HexBytes
 from web3 import Web3
 from web3.utils.events import get_event_data
-from .consts import DEPLOYER_ACCOUNT, STD_GAS, STD_GAS_PRICE
+from .consts import DEPLOYER_ACCOUNT, STD_GAS, STD_GAS_PRICE, WAIT_TIMEOUT
+from .trace import trace_call, trace_transaction  # noqa: F401
+
+# What a revert raises: eth_tester raises TransactionFailed, JSON-RPC nodes a ValueError
+REVERT_ERRORS = (TransactionFailed, ValueError)
 
 
 def std_tx(tx):
@@ -86,6 +93,16 @@ def has_event(web3contract, event_name, rcpt):
     return False
 
 
+def tx_failed(web3, contract_fn, tx):
+    """ Send a transaction and return True if it reverted """
+    try:
+        txhash = contract_fn.transact(tx)
+    except REVERT_ERRORS:  # Some backends raise on a revert instead of mining it
+        return True
+    receipt = web3.eth.waitForTransactionReceipt(txhash)
+    return receipt.status == 0
+
+
 def normalize_filehash(fH):
     return '0x' + fH.hex()
 
@@ -93,7 +110,8 @@ def normalize_filehash(fH):
 def time_travel(web3, secs):
     """ Time travel the chain """
     block_before = web3.eth.getBlock('latest')
-    now = int(datetime.now().timestamp())
+    # The chain is ahead of the clock after an earlier time travel
+    now = max(int(datetime.now().timestamp()), int(block_before.timestamp))
     drift = 30  # A magical amount of correction for drift that eth_tester sometimes has
 
     # eth_tester
@@ -126,3 +144,61 @@ def block_travel(web3: Web3, blocks: int):
     web3.testing.mine(math.ceil(blocks))
     block_after = web3.eth.getBlock('latest')
     assert block_after.number - block_before.number == blocks , "Block travel failed"
+
+
+def run(coroutine):
+    """ Run a coroutine on a new event loop, then cancel whatever it left running """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(asyncio.wait(pending))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def funded_account(web3, value=int(1e18)):
+    """ A new account with a private key we hold """
+    account = Account.create()
+    txhash = web3.eth.sendTransaction({
+        'from': web3.eth.accounts[0],
+        'to': account.address,
+        'value': value,
+    })
+    assert web3.eth.waitForTransactionReceipt(txhash).status == 1, "Funding failed"
+    return account
+
+
+async def wait_for(condition, timeout=WAIT_TIMEOUT):
+    """ Wait until condition() is true, polling every 10ms """
+    waited = 0
+    while not condition():
+        assert waited < timeout, "Timed out"
+        await asyncio.sleep(0.01)
+        waited += 0.01
+
+
+def send_signed(web3, account, contract_fn, tx=None):
+    """ Sign a transaction with a local account, send it and return its receipt """
+    std = std_tx({
+        'from': account.address,
+        'gas': int(1e6),
+        'nonce': web3.eth.getTransactionCount(account.address),
+    })
+    std.update(tx or {})
+    signed = account.signTransaction(contract_fn.buildTransaction(std))
+    try:
+        txhash = web3.eth.sendRawTransaction(signed.rawTransaction)
+    except REVERT_ERRORS:  # Some backends raise on a revert instead of mining it
+        return None
+    return web3.eth.waitForTransactionReceipt(txhash)
+
+
+def signed_tx_failed(web3, account, contract_fn, tx=None):
+    """ Send a locally signed transaction and return True if it reverted """
+    receipt = send_signed(web3, account, contract_fn, tx)
+    return receipt is None or receipt.status == 0